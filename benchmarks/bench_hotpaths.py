@@ -0,0 +1,278 @@
+"""
+Benchmark the hot paths of downloading, caching and uploading series.
+
+Covered are CSV parsing (``_blob_to_df``), merging of overlapping blobs
+(``Storage.get``), the file cache (``StorageCache`` put, get and eviction),
+assembly of multi-day series (``Client.get``), paging of aggregated samples
+(``Client.get_samples_aggregate``) and CSV serialization (``_df_to_blob``,
+and the CSV writer ``iter_csv`` side by side with ``DataFrame.to_csv``),
+with synthetic numeric and string data of several sizes. Blobs and the API
+are served by the local stand-in server (``benchmarks/server.py``), so
+network latency is not included.
+
+Save the results of one commit and compare another commit against them::
+
+    git checkout main
+    python benchmarks/bench_hotpaths.py --save main.json
+    git checkout my-branch
+    python benchmarks/bench_hotpaths.py --compare main.json
+
+In comparison mode, the exit code is 1 if any benchmark is slower than the
+baseline by more than ``--threshold`` (best of ``--repeat`` runs).
+
+Usage::
+
+    python benchmarks/bench_hotpaths.py [--repeat 5] [--filter parse]
+        [--save FILE] [--compare FILE] [--threshold 1.2]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import requests
+from server import StandInServer
+
+import datareservoirio as drio
+from datareservoirio._utils import _to_csv, iter_csv
+from datareservoirio.globalsettings import environment
+from datareservoirio.storage.storage import (
+    Storage,
+    StorageCache,
+    _blob_to_df,
+    _df_to_blob,
+)
+
+SIZES = [1_000, 100_000, 864_000]  # samples; 864 000 is one day at 10 Hz
+KINDS = ["numeric", "string"]
+OVERLAPS = [0.0, 0.5, 1.0]  # overlap of two blobs, as fraction of their size
+CLIENT_DAYS = [1, 7, 30]  # days at 1 Hz
+AGGREGATE_PAGE_SIZES = [100, 1_000, 10_000]  # one day at 1 Hz, 1 s aggregates
+
+START = pd.Timestamp("2024-01-01", tz="UTC").value
+
+
+def make_df(samples, kind="numeric", offset=0, seed=0):
+    index = START + (offset + np.arange(samples, dtype="int64")) * 100_000_000
+    rng = np.random.default_rng(seed)
+    if kind == "numeric":
+        values = rng.random(samples)
+    else:
+        values = np.char.add("value-", rng.integers(0, 1000, samples).astype(str))
+    return pd.DataFrame({"index": index, "values": values})
+
+
+def put_blob(server, session, path, df):
+    url = f"{server.url}/blob/{path}"
+    _df_to_blob(df, url, session=session)
+    return {"Endpoint": url, "Path": path, "ContentMd5": path}
+
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        time_start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - time_start)
+    return times
+
+
+def bench_parse(server, session, kind, samples):
+    chunk = put_blob(server, session, f"parse/{kind}/{samples}", make_df(samples, kind))
+    return lambda: _blob_to_df(chunk["Endpoint"], session=session)
+
+
+def bench_serialize(server, session, kind, samples):
+    df = make_df(samples, kind)
+    url = f"{server.url}/blob/serialize/{kind}/{samples}"
+    return lambda: _df_to_blob(df, url, session=session)
+
+
+def bench_csv(writer, kind, samples):
+    df = make_df(samples, kind)
+    if writer == "to_csv":
+        return lambda: _to_csv(df)
+    return lambda: b"".join(iter_csv(df))
+
+
+def bench_merge(server, session, overlap, samples):
+    offset = int(samples * (1.0 - overlap))
+    blobs = [
+        put_blob(
+            server,
+            session,
+            f"merge/{overlap}/{samples}/{i}",
+            make_df(samples, offset=i * offset, seed=i),
+        )
+        for i in range(2)
+    ]
+    storage = Storage(session, cache=False)
+    return lambda: storage.get(blobs)
+
+
+def bench_cache(operation, cache_root, samples):
+    df = make_df(samples)
+    cache_root = f"{cache_root}/{operation}-{samples}"
+
+    if operation == "evict":
+        # Cache fits about 2 entries, every put evicts the oldest entry
+        size_mb = len(df) * 16 / 1024**2
+        cache = StorageCache(max_size=max(2.5 * size_mb, 1.0), cache_root=cache_root)
+        paths = (f"evict/{i}" for i in range(10**9))
+        return lambda: cache.put(df, {"Path": next(paths), "ContentMd5": "md5"})
+
+    cache = StorageCache(max_size=1024, cache_root=cache_root)
+    chunk = {"Path": f"cache/{samples}", "ContentMd5": "md5"}
+    cache.put(df, chunk)
+    if operation == "put":
+        return lambda: cache.put(df, chunk)
+    return lambda: cache.get(chunk)
+
+
+def bench_client_get(server, session, days):
+    client = drio.Client(session, cache=False)
+    series_id = server.add_series(days=days, frequency=1.0)
+    end = START + days * 86_400 * 10**9
+    return lambda: client.get(series_id, start=START, end=end)
+
+
+def bench_aggregate(server, session, page_size):
+    client = drio.Client(session, cache=False)
+    series_id = server.add_series(days=1, frequency=1.0)
+    return lambda: client.get_samples_aggregate(
+        series_id,
+        start="2024-01-01",
+        end="2024-01-02",
+        aggregation_period="1s",
+        aggregation_function="Avg",
+        max_page_size=page_size,
+    )
+
+
+def benchmarks(server, session, cache_root):
+    """
+    Yield ``(name, setup)`` pairs, where ``setup()`` prepares the benchmark
+    and returns the function to be timed.
+    """
+    for kind in KINDS:
+        for samples in SIZES:
+            yield f"parse/{kind}/{samples}", partial(
+                bench_parse, server, session, kind, samples
+            )
+            yield f"serialize/{kind}/{samples}", partial(
+                bench_serialize, server, session, kind, samples
+            )
+            for writer in ("to_csv", "iter_csv"):
+                yield f"csv-{writer}/{kind}/{samples}", partial(
+                    bench_csv, writer, kind, samples
+                )
+    for overlap in OVERLAPS:
+        for samples in SIZES[1:]:
+            yield f"merge/overlap-{overlap:.1f}/{samples}", partial(
+                bench_merge, server, session, overlap, samples
+            )
+    for samples in SIZES[1:]:
+        for operation in ("put", "get", "evict"):
+            yield f"cache-{operation}/{samples}", partial(
+                bench_cache, operation, cache_root, samples
+            )
+    for days in CLIENT_DAYS:
+        yield f"client-get/{days}-days", partial(
+            bench_client_get, server, session, days
+        )
+    for page_size in AGGREGATE_PAGE_SIZES:
+        yield f"aggregate/page-{page_size}", partial(
+            bench_aggregate, server, session, page_size
+        )
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="", help="run benchmarks containing this")
+    parser.add_argument("--save", metavar="FILE", help="save results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="compare with saved results")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="slowdown (ratio) reported as regression in comparison mode",
+    )
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    print(
+        f"{'benchmark':<32} {'best [ms]':>10} {'median [ms]':>12}"
+        + (f" {'baseline [ms]':>14} {'ratio':>7}" if baseline else "")
+    )
+
+    results = {}
+    regressions = []
+    with StandInServer() as server, tempfile.TemporaryDirectory() as cache_root:
+        environment._set_base_url(server.api_base_url)
+        session = requests.Session()
+        for name, setup in benchmarks(server, session, cache_root):
+            if args.filter not in name:
+                continue
+            func = setup()
+            func()  # warm up
+            times = timed(func, args.repeat)
+            results[name] = {"best": min(times), "median": statistics.median(times)}
+
+            line = (
+                f"{name:<32} {min(times) * 1e3:>10.2f} "
+                f"{statistics.median(times) * 1e3:>12.2f}"
+            )
+            if name in baseline:
+                ratio = min(times) / baseline[name]["best"]
+                line += f" {baseline[name]['best'] * 1e3:>14.2f} {ratio:>7.2f}"
+                if ratio > args.threshold:
+                    regressions.append(name)
+                    line += "  REGRESSION"
+            print(line)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "commit": git_commit(),
+                    "python": platform.python_version(),
+                    "pandas": pd.__version__,
+                    "repeat": args.repeat,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.2f}x")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
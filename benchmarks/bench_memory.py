@@ -0,0 +1,316 @@
+"""
+Measure peak memory of ``Client.get`` for long retrievals.
+
+Each retrieval runs in a fresh process, against synthetic series served by
+the local stand-in server (``benchmarks/server.py``, in this process), so that
+peaks are not hidden by memory of earlier runs or of the server. Reported
+are:
+
+* the peak RSS of the process, and its increase over the RSS before the
+  retrieval (POSIX only),
+* the peak of memory allocated by Python (``tracemalloc``) during the
+  retrieval, in total and per stage: listing of files, download (request,
+  transfer and parsing of blobs), merge (of overlapping files per day) and
+  assembly (concatenation of days and index conversion),
+* bytes allocated (at peak) per returned sample, and the peak as multiple of
+  the size of the returned series.
+
+Stages run concurrently (downloads and merges of different days), so the
+peak of a stage is the highest allocated memory sampled while the stage was
+active. ``tracemalloc`` slows the retrieval down considerably; use
+``--no-tracemalloc`` for RSS only.
+
+Save the results of one commit and compare another commit against them::
+
+    python benchmarks/bench_memory.py --save main.json
+    python benchmarks/bench_memory.py --compare main.json
+
+In comparison mode, the exit code is 1 if the peak (allocated bytes per
+sample, or RSS increase) of any retrieval exceeds the baseline by more than
+``--threshold``.
+
+Usage::
+
+    python benchmarks/bench_memory.py [--days 1 30 180 365] [--frequency 1]
+        [--files 1] [--kind numeric] [--no-tracemalloc]
+        [--save FILE] [--compare FILE] [--threshold 1.1]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+
+import pandas as pd
+import requests
+from server import StandInServer
+
+import datareservoirio as drio
+from datareservoirio._utils import PhaseTimings
+from datareservoirio.globalsettings import environment
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Stage of the phases timed by the client (see ``datareservoirio._utils.phase``)
+STAGES = {
+    "listing": "listing",
+    "request": "download",
+    "transfer": "download",
+    "parse": "download",
+    "range-download": "download",
+    "cache-read": "download",
+    "merge": "merge",
+}
+
+SAMPLE_INTERVAL = 0.005  # seconds
+START = "2024-01-01"
+
+
+class StageMemory(PhaseTimings):
+    """
+    Phase collector that also samples memory allocated (``tracemalloc``)
+    while each stage is active. The merge of days in the calling thread is
+    the 'assembly' stage, which lasts until :py:meth:`stop`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._active = defaultdict(int)
+        self._peaks = defaultdict(int)
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_forever, daemon=True)
+        self._sampler.start()
+
+    @contextmanager
+    def phase(self, name):
+        stage = STAGES.get(name)
+        if name == "merge" and threading.current_thread() is threading.main_thread():
+            stage = "assembly"
+        if stage is None:
+            with super().phase(name):
+                yield
+            return
+
+        with self._lock:
+            self._active[stage] += 1
+        try:
+            with super().phase(name):
+                yield
+        finally:
+            self._sample()
+            if stage != "assembly":  # until stop()
+                with self._lock:
+                    self._active[stage] -= 1
+
+    def stop(self):
+        self._sample()
+        self._stopped.set()
+        self._sampler.join()
+
+    @property
+    def peaks(self):
+        """Peak allocated bytes (sampled) per stage."""
+        with self._lock:
+            return dict(self._peaks)
+
+    def _sample(self):
+        if not tracemalloc.is_tracing():
+            return
+        current, _ = tracemalloc.get_traced_memory()
+        with self._lock:
+            for stage, active in self._active.items():
+                if active:
+                    self._peaks[stage] = max(self._peaks[stage], current)
+
+    def _sample_forever(self):
+        while not self._stopped.wait(SAMPLE_INTERVAL):
+            self._sample()
+
+
+def rss_peak():
+    """Peak RSS of this process in bytes. None if not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def rss_current():
+    """Current RSS of this process in bytes. None if not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, AttributeError):
+        return rss_peak()  # best effort, e.g. macOS
+
+
+def retrieve(api_base_url, series_id, days, trace):
+    """Run one retrieval (in this process) and return its measurements."""
+    environment._set_base_url(api_base_url)
+    client = drio.Client(requests.Session(), cache=False)
+    start = pd.Timestamp(START, tz="UTC")
+    end = start + pd.Timedelta(days=days)
+
+    rss_before = rss_current()
+    if trace:
+        tracemalloc.start()
+    profile = StageMemory()
+    time_start = time.perf_counter()
+    with profile.activate():
+        series = client.get(series_id, start=start, end=end)
+    elapsed = time.perf_counter() - time_start
+    profile.stop()
+
+    traced_peak = tracemalloc.get_traced_memory()[1] if trace else None
+    tracemalloc.stop()
+
+    rss = rss_peak()
+    return {
+        "days": days,
+        "samples": len(series),
+        "series-bytes": int(series.memory_usage(index=True, deep=True)),
+        "seconds": elapsed,
+        "rss-peak": rss,
+        "rss-increase": rss - rss_before if rss is not None else None,
+        "traced-peak": traced_peak,
+        "stage-peaks": profile.peaks,
+    }
+
+
+def run_worker(args):
+    result = retrieve(
+        args.api_base_url, args.series_id, args.days[0], not args.no_tracemalloc
+    )
+    print(json.dumps(result))
+
+
+def run_in_subprocess(server, series_id, days, trace):
+    command = [
+        sys.executable,
+        __file__,
+        "--worker",
+        "--api-base-url",
+        server.api_base_url,
+        "--series-id",
+        series_id,
+        "--days",
+        str(days),
+    ]
+    if not trace:
+        command.append("--no-tracemalloc")
+    output = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def mb(value):
+    return f"{value / 1024**2:.1f}" if value is not None else "-"
+
+
+def ratio(value, reference):
+    return f"{value / reference:.1f}" if value is not None and reference else "-"
+
+
+def per_sample(value, samples):
+    return value / samples if value is not None and samples else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 30, 180, 365])
+    parser.add_argument("--frequency", type=float, default=1.0, help="in Hz")
+    parser.add_argument("--files", type=int, default=1, help="overlapping files")
+    parser.add_argument("--kind", choices=["numeric", "string"], default="numeric")
+    parser.add_argument("--no-tracemalloc", action="store_true")
+    parser.add_argument("--save", metavar="FILE", help="save results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="compare with saved results")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.1,
+        help="increase (ratio) reported as regression in comparison mode",
+    )
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--api-base-url", help=argparse.SUPPRESS)
+    parser.add_argument("--series-id", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {str(r["days"]): r for r in json.load(f)["results"]}
+
+    stages = ["listing", "download", "merge", "assembly"]
+    print(
+        f"{'days':>5} {'samples':>11} {'seconds':>8} {'RSS [MB]':>9} "
+        f"{'+RSS [MB]':>10} {'alloc [MB]':>11} {'B/sample':>9} {'x series':>9} "
+        + " ".join(f"{stage + ' [MB]':>14}" for stage in stages)
+    )
+
+    results = []
+    regressions = []
+    with StandInServer() as server:
+        for days in args.days:
+            series_id = server.add_series(
+                days=days,
+                frequency=args.frequency,
+                start=START,
+                kind=args.kind,
+                files=args.files,
+            )
+            result = run_in_subprocess(server, series_id, days, not args.no_tracemalloc)
+            results.append(result)
+
+            samples = result["samples"]
+            traced = result["traced-peak"]
+            line = (
+                f"{days:>5} {samples:>11} {result['seconds']:>8.1f} "
+                f"{mb(result['rss-peak']):>9} {mb(result['rss-increase']):>10} "
+                f"{mb(traced):>11} "
+                f"{ratio(traced, samples):>9} "
+                f"{ratio(traced, result['series-bytes']):>9} "
+                + " ".join(
+                    f"{mb(result['stage-peaks'].get(stage)):>14}" for stage in stages
+                )
+            )
+
+            reference = baseline.get(str(days))
+            if reference is not None:
+                for key in ("traced-peak", "rss-increase"):
+                    value = per_sample(result[key], samples)
+                    value_ref = per_sample(reference[key], reference["samples"])
+                    if value and value_ref and value / value_ref > args.threshold:
+                        regressions.append(f"{days} days: {key}")
+                        line += f"  REGRESSION {key} {value / value_ref:.2f}x"
+            print(line, flush=True)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "frequency": args.frequency,
+                    "files": args.files,
+                    "kind": args.kind,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.2f}x")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
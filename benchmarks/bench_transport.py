@@ -0,0 +1,129 @@
+"""
+Compare blob storage transports on many small blobs and on a few large blobs.
+
+By default, blobs are served by a local HTTP/1.1 server (so network latency
+is not included). Use ``--urls`` to benchmark against real blob URLs (e.g.
+SAS URLs of day files), one URL per line. Note that HTTP/2 is only used if the
+server supports it.
+
+Usage::
+
+    python benchmarks/bench_transport.py [--workers 32] [--repeat 3] [--urls FILE]
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+from datareservoirio.storage.storage import _blob_to_df
+from datareservoirio.transport import HTTP2Transport, HTTPTransport
+
+# (name, number of blobs, samples per blob)
+SCENARIOS = [
+    ("many-small", 2000, 100),
+    ("few-large", 8, 500_000),
+]
+
+
+def make_blob(samples):
+    index = np.arange(samples, dtype="int64") * 1_000_000_000
+    values = np.random.default_rng(0).random(samples)
+    lines = [f"{i},{v!r}" for i, v in zip(index, values)]
+    return ("\n".join(lines) + "\n").encode()
+
+
+class BlobHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    blobs = {}
+
+    def do_GET(self):
+        body = self.blobs[self.path.split("/")[1]]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(scenarios):
+    BlobHandler.blobs = {name: make_blob(samples) for name, _, samples in scenarios}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BlobHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def transports(workers):
+    yield "requests-default", lambda: requests.adapters.HTTPAdapter()
+    yield "http1", lambda: HTTPTransport(pool_maxsize=workers)
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        print("httpx not installed, skipping 'http2'")
+    else:
+        yield "http2", lambda: HTTP2Transport(max_connections=workers)
+
+
+def run(urls, make_transport, workers):
+    session = requests.Session()
+    transport = make_transport()
+    session.mount("http://", transport)
+    session.mount("https://", transport)
+
+    time_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        samples = sum(
+            len(df)
+            for df in executor.map(lambda url: _blob_to_df(url, session=session), urls)
+        )
+    elapsed = time.perf_counter() - time_start
+
+    stats = transport.stats() if hasattr(transport, "stats") else {}
+    session.close()
+    return elapsed, samples, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--urls", help="file with blob URLs, one per line")
+    args = parser.parse_args()
+
+    if args.urls:
+        with open(args.urls) as f:
+            scenarios = {"urls": [line.strip() for line in f if line.strip()]}
+    else:
+        server, base_url = serve(SCENARIOS)
+        scenarios = {
+            name: [f"{base_url}/{name}/{i}" for i in range(n)]
+            for name, n, _ in SCENARIOS
+        }
+
+    print(
+        f"{'scenario':<12} {'transport':<18} {'best [s]':>9} {'blobs/s':>9} "
+        f"{'Msamples/s':>11} {'connections':>12}"
+    )
+    for scenario, urls in scenarios.items():
+        for name, make_transport in transports(args.workers):
+            results = [
+                run(urls, make_transport, args.workers) for _ in range(args.repeat)
+            ]
+            elapsed, samples, stats = min(results, key=lambda result: result[0])
+            print(
+                f"{scenario:<12} {name:<18} {elapsed:>9.3f} "
+                f"{len(urls) / elapsed:>9.1f} {samples / elapsed / 1e6:>11.2f} "
+                f"{stats.get('connections', '-'):>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+"""
+Reproducible adverse network conditions for tests and benchmarks.
+
+``FaultInjector`` wraps a transport adapter (e.g. ``HTTPTransport``) and
+injects latency, bandwidth caps, error responses (429, 503, 504, ...),
+connection resets and truncated response bodies, at configurable rates and
+with a fixed seed. Mount it where the client mounts its transports::
+
+    from datareservoirio.storage.storage import _BLOBSTORAGE_RETRY
+    from datareservoirio.transport import HTTPTransport
+    from benchmarks.faults import FaultInjector, lognormal
+
+    blob_transport = FaultInjector(
+        HTTPTransport(max_retries=_BLOBSTORAGE_RETRY),
+        latency=lognormal(median=0.02, sigma=1.0),
+        bandwidth=10e6,
+        errors={503: 0.02},
+        truncate_rate=0.01,
+    )
+    client = drio.Client(auth, storage_opt={"transport": blob_transport})
+
+    auth.mount("https://", FaultInjector(auth.get_adapter("https://"), ...))
+
+Injected error responses and connection resets are subject to the retry
+policy (``max_retries``) of the wrapped adapter, as if they came from the
+server. Truncated bodies fail while the body is read, as
+``requests.exceptions.ChunkedEncodingError``.
+
+Run as a script to measure throughput and tail latency of ``Client.get`` (or
+``Client.get_samples_aggregate``) under each scenario in ``SCENARIOS``,
+against the local stand-in server (``benchmarks/server.py``)::
+
+    python benchmarks/faults.py [--calls 20] [--days 7] [--scenario reset]
+"""
+
+import argparse
+import io
+import math
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3 import HTTPResponse
+from urllib3.exceptions import MaxRetryError, ProtocolError
+from urllib3.util.retry import Retry
+
+import datareservoirio as drio
+from datareservoirio.globalsettings import environment
+from datareservoirio.storage.storage import _BLOBSTORAGE_RETRY
+from datareservoirio.transport import HTTPTransport
+
+
+def fixed(seconds):
+    """Constant latency."""
+    return lambda rng: seconds
+
+
+def uniform(low, high):
+    """Latency uniformly distributed between ``low`` and ``high`` seconds."""
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median, sigma=1.0):
+    """Log-normally distributed latency (long tail), with ``median`` seconds."""
+    return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+
+class FaultInjector(BaseAdapter):
+    """
+    Transport adapter injecting faults in front of another adapter.
+
+    Parameters
+    ----------
+    adapter : requests.adapters.BaseAdapter, optional
+        Adapter sending the requests. Default is ``HTTPAdapter()``.
+    latency : float or callable, optional
+        Delay (in seconds) before each request is sent, or a function of a
+        ``random.Random`` instance returning the delay, see ``fixed``,
+        ``uniform`` and ``lognormal``.
+    bandwidth : float, optional
+        Maximum rate (bytes per second) at which response bodies are read.
+    errors : dict, optional
+        Rate (0 to 1) of error responses by status code, e.g.
+        ``{429: 0.01, 503: 0.01, 504: 0.005}``. The request is not sent.
+    retry_after : int, optional
+        Value (in whole seconds) of the ``Retry-After`` header of injected 429
+        and 503 responses. Default (None) is no header.
+    reset_rate : float
+        Rate (0 to 1) of requests failing with a connection reset.
+    truncate_rate : float
+        Rate (0 to 1) of responses where the connection breaks after a
+        random part of the body.
+    match : callable, optional
+        Faults are only injected for requests where ``match(request)`` is
+        True. Default is all requests.
+    seed : int
+        Seed of the random number generator.
+    """
+
+    def __init__(
+        self,
+        adapter=None,
+        latency=None,
+        bandwidth=None,
+        errors=None,
+        retry_after=None,
+        reset_rate=0.0,
+        truncate_rate=0.0,
+        match=None,
+        seed=0,
+    ):
+        super().__init__()
+        self._adapter = adapter if adapter is not None else HTTPAdapter()
+        self._latency = fixed(latency) if isinstance(latency, (int, float)) else latency
+        self._bandwidth = bandwidth
+        self._errors = dict(errors or {})
+        self._retry_after = retry_after
+        self._reset_rate = reset_rate
+        self._truncate_rate = truncate_rate
+        self._match = match
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
+    def stats(self):
+        """Number of requests and of injected faults by kind."""
+        with self._lock:
+            return dict(self._stats)
+
+    def send(self, request, **kwargs):
+        retries = getattr(self._adapter, "max_retries", None)
+        if not isinstance(retries, Retry):
+            retries = Retry(0, read=False)
+
+        while True:
+            self._count("requests")
+            if self._match is not None and not self._match(request):
+                return self._adapter.send(request, **kwargs)
+
+            fault, delay, truncate_at = self._draw()
+            if delay:
+                time.sleep(delay)
+
+            if fault == "reset":
+                self._count("resets")
+                error = ProtocolError(
+                    "Connection aborted.",
+                    ConnectionResetError(104, "Connection reset by peer"),
+                )
+                try:
+                    retries = retries.increment(
+                        request.method, request.url, error=error
+                    )
+                except (MaxRetryError, ProtocolError):  # exhausted or not retryable
+                    raise requests.ConnectionError(error, request=request)
+                retries.sleep()
+                continue
+
+            if isinstance(fault, int):
+                self._count(f"status-{fault}")
+                raw = self._error_response(fault)
+                if not retries.is_retry(
+                    request.method, fault, "Retry-After" in raw.headers
+                ):
+                    return self._build_response(request, raw)
+                try:
+                    retries = retries.increment(
+                        request.method, request.url, response=raw
+                    )
+                except MaxRetryError:
+                    if retries.raise_on_status:
+                        raise requests.exceptions.RetryError(
+                            f"Max retries exceeded ({fault})", request=request
+                        )
+                    return self._build_response(request, raw)
+                retries.sleep(raw)
+                continue
+
+            response = self._adapter.send(request, **kwargs)
+            if fault == "truncate":
+                self._count("truncated")
+            if fault == "truncate" or self._bandwidth:
+                response.raw = _ShapedRaw(
+                    response.raw, self._bandwidth, truncate_at, response.headers
+                )
+            return response
+
+    def close(self):
+        self._adapter.close()
+
+    def _draw(self):
+        """Draw the fault (if any), delay and truncation point of a request."""
+        with self._lock:
+            delay = self._latency(self._rng) if self._latency else 0.0
+            draw = self._rng.random()
+            truncate_at = self._rng.random()
+
+        for fault, rate in [("reset", self._reset_rate), *self._errors.items()]:
+            if draw < rate:
+                return fault, delay, None
+            draw -= rate
+        if draw < self._truncate_rate:
+            return "truncate", delay, truncate_at
+        return None, delay, None
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _error_response(self, status):
+        headers = {"Content-Type": "application/json", "Content-Length": "2"}
+        if self._retry_after is not None and status in (429, 503):
+            headers["Retry-After"] = str(self._retry_after)
+        return HTTPResponse(
+            body=io.BytesIO(b"{}"),
+            headers=headers,
+            status=status,
+            preload_content=False,
+        )
+
+    def _build_response(self, request, raw):
+        return HTTPAdapter.build_response(self, request, raw)
+
+
+class _ShapedRaw:
+    """
+    Wrapper of a raw (urllib3) response limiting the rate at which the body
+    is read, and breaking the connection after a fraction ``truncate_at`` of
+    the body (if given).
+    """
+
+    def __init__(self, raw, bandwidth=None, truncate_at=None, headers=None):
+        self._raw = raw
+        self._bandwidth = bandwidth
+        self._truncate_at = None
+        if truncate_at is not None:
+            length = int((headers or {}).get("Content-Length", 0))
+            self._truncate_at = int(truncate_at * length)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def stream(self, amt=2**16, decode_content=True):
+        time_start = time.perf_counter()
+        delivered = 0
+        for chunk in self._raw.stream(amt, decode_content=decode_content):
+            if self._truncate_at is not None:
+                if delivered + len(chunk) > self._truncate_at:
+                    yield chunk[: self._truncate_at - delivered]
+                    self._raw.close()
+                    raise ProtocolError(
+                        "Connection broken: IncompleteRead",
+                        ConnectionResetError(104, "Connection reset by peer"),
+                    )
+            delivered += len(chunk)
+            if self._bandwidth:
+                ahead = delivered / self._bandwidth - (time.perf_counter() - time_start)
+                if ahead > 0.001:
+                    time.sleep(ahead)
+            yield chunk
+
+    def read(self, amt=None, decode_content=True):
+        if amt is None:
+            return b"".join(self.stream(decode_content=decode_content))
+        return b"".join(self.stream(amt, decode_content=decode_content))
+
+
+# name -> FaultInjector arguments, applied to API and blob requests
+SCENARIOS = {
+    "baseline": {},
+    "latency": {"latency": lognormal(median=0.01, sigma=1.0)},
+    "bandwidth": {"bandwidth": 20e6},
+    "throttled": {"errors": {429: 0.03, 503: 0.03}, "retry_after": 1},
+    "gateway-timeout": {"errors": {504: 0.05}},
+    "reset": {"reset_rate": 0.05},
+    "truncated": {"truncate_rate": 0.05},
+    "mixed": {
+        "latency": lognormal(median=0.005, sigma=1.0),
+        "errors": {429: 0.01, 503: 0.01, 504: 0.01},
+        "retry_after": 1,
+        "reset_rate": 0.01,
+        "truncate_rate": 0.01,
+    },
+}
+
+
+def run_scenario(server, series_id, days, calls, operation, options):
+    blob_transport = FaultInjector(
+        HTTPTransport(max_retries=_BLOBSTORAGE_RETRY), **options
+    )
+    api_transport = FaultInjector(HTTPTransport(), seed=1, **options)
+    auth = requests.Session()
+    auth.mount("http://", api_transport)
+    client = drio.Client(auth, cache=False, storage_opt={"transport": blob_transport})
+
+    start = "2024-01-01"
+    end = f"2024-01-{1 + days:02d}"
+    latencies, samples, failures = [], 0, Counter()
+    for _ in range(calls):
+        time_start = time.perf_counter()
+        try:
+            if operation == "get":
+                series = client.get(series_id, start=start, end=end)
+            else:
+                series = client.get_samples_aggregate(
+                    series_id,
+                    start=start,
+                    end=end,
+                    aggregation_period="1m",
+                    aggregation_function="Avg",
+                    max_page_size=100,
+                )
+        except Exception as error:
+            failures[type(error).__name__] += 1
+        else:
+            samples += len(series)
+        latencies.append(time.perf_counter() - time_start)
+
+    stats = Counter(blob_transport.stats()) + Counter(api_transport.stats())
+    return latencies, samples, failures, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--days", type=int, default=7, help="days per call (1 Hz)")
+    parser.add_argument("--operation", choices=["get", "aggregate"], default="get")
+    parser.add_argument(
+        "--scenario", action="append", choices=list(SCENARIOS), help="default all"
+    )
+    args = parser.parse_args()
+
+    from server import StandInServer
+
+    print(
+        f"{'scenario':<16} {'calls/s':>8} {'Msamples/s':>11} {'p50 [s]':>8} "
+        f"{'p95 [s]':>8} {'p99 [s]':>8} {'max [s]':>8} {'failed':>7}  injected"
+    )
+    with StandInServer() as server:
+        environment._set_base_url(server.api_base_url)
+        series_id = server.add_series(days=args.days, frequency=1.0)
+        for name in args.scenario or SCENARIOS:
+            latencies, samples, failures, stats = run_scenario(
+                server,
+                series_id,
+                args.days,
+                args.calls,
+                args.operation,
+                SCENARIOS[name],
+            )
+            elapsed = sum(latencies)
+            quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+            injected = ", ".join(
+                f"{key}={value}" for key, value in sorted(stats.items())
+            )
+            if failures:
+                injected += "; failed: " + ", ".join(
+                    f"{key}={value}" for key, value in sorted(failures.items())
+                )
+            print(
+                f"{name:<16} {len(latencies) / elapsed:>8.2f} "
+                f"{samples / elapsed / 1e6:>11.2f} {quantiles[49]:>8.3f} "
+                f"{quantiles[94]:>8.3f} {quantiles[98]:>8.3f} "
+                f"{max(latencies):>8.3f} {sum(failures.values()):>7}  {injected}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,887 @@
+"""
+Local stand-in for the DataReservoir.io API and blob storage.
+
+The server emulates the endpoints used by ``datareservoirio.Client`` (files,
+timeseries, data days, samples/aggregate, metadata and blob upload (including
+block uploads) and download), so that the client can be exercised end-to-end,
+and throughput and latency can be measured reproducibly without credentials
+or network. State is kept in memory. Synthetic series of any length are
+generated on demand, one day at a time, so realistic data volumes do not need
+to fit in memory.
+
+Authentication is not checked; use a plain ``requests.Session`` as ``auth``::
+
+    import requests
+    import datareservoirio as drio
+    from benchmarks.server import StandInServer
+
+    with StandInServer() as server:
+        series_id = server.add_series(days=30, frequency=10.0)
+        drio.globalsettings.environment._set_base_url(server.api_base_url)
+        client = drio.Client(requests.Session(), cache=False)
+        series = client.get(series_id, start="2024-01-01", end="2024-01-31")
+
+Or run it as a process on the port of the development environment (see
+``Environment.set_dev``)::
+
+    python benchmarks/server.py --port 5824 --series 30:10 --series 365:1
+"""
+
+import argparse
+import base64
+import fnmatch
+import gzip
+import hashlib
+import io
+import json
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
+from uuid import uuid4
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+
+NS_PER_DAY = 24 * 60 * 60 * 10**9
+DEFAULT_START = "2024-01-01"
+
+_AGGREGATION_FUNCTIONS = {"avg": "mean", "min": "min", "max": "max", "stdev": "std"}
+_PERIOD_UNITS = {"h": "h", "m": "min", "s": "s", "ms": "ms", "microsecond": "us"}
+
+
+class _NotFound(Exception):
+    pass
+
+
+class _Conflict(Exception):
+    pass
+
+
+class StandInServer:
+    """
+    In-memory stand-in for DataReservoir.io and its blob storage.
+
+    Parameters
+    ----------
+    host : str
+        Interface to listen on.
+    port : int
+        Port to listen on. Default (0) is any free port.
+    api_latency : float
+        Delay (in seconds) added to each API response.
+    blob_latency : float
+        Delay (in seconds) added to each blob storage response.
+    synthetic_cache_size : int
+        Maximum size (in bytes) of generated synthetic blobs kept in memory,
+        so that repeated downloads are not limited by data generation.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        api_latency=0.0,
+        blob_latency=0.0,
+        synthetic_cache_size=512 * 1024**2,
+    ):
+        self.api_latency = api_latency
+        self.blob_latency = blob_latency
+        self._synthetic_cache_size = synthetic_cache_size
+
+        self._lock = threading.RLock()
+        self._series = {}
+        self._files = {}
+        self._metadata = {}
+        self._blobs = {}
+        self._blocks = {}  # path -> staged (uncommitted) blocks by ID
+        self._synthetic = {}
+        self._generated = OrderedDict()
+        self._generated_size = 0
+        self._request_counts = {}
+        self._aggregates = {}
+        self._routes = self._route_table()
+
+        self._httpd = _HTTPServer((host, port), _handler_class(self))
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_base_url(self):
+        """Base URL of the API, see ``Environment.api_base_url``."""
+        return f"{self.url}/api/"
+
+    @property
+    def request_counts(self):
+        """Number of requests per method and path, blob requests are counted
+        together, e.g. ``{"GET /api/timeseries/<id>": 1, "GET blob": 30}``."""
+        with self._lock:
+            return dict(self._request_counts)
+
+    def start(self):
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def add_series(
+        self,
+        days=1,
+        frequency=1.0,
+        start=DEFAULT_START,
+        kind="numeric",
+        files=1,
+        seed=0,
+        series_id=None,
+    ):
+        """
+        Add a synthetic series. Data is generated when it is downloaded.
+
+        Parameters
+        ----------
+        days : int
+            Number of days with data.
+        frequency : float
+            Samples per second.
+        start : str
+            First day (midnight UTC).
+        kind : str
+            'numeric' (random floats) or 'string' values.
+        files : int
+            Number of files the series consists of. All files cover all days
+            (with different values), so that every day has ``files`` chunks
+            which are merged by the client; the last file wins.
+        seed : int
+            Random seed, data is reproducible.
+        series_id : str, optional
+            Identifier of the series. Default is a random UUID.
+
+        Returns
+        -------
+        str
+            Identifier of the series.
+        """
+        if kind not in ("numeric", "string"):
+            raise ValueError("kind must be 'numeric' or 'string'")
+
+        series_id = series_id or str(uuid4())
+        first_day = pd.Timestamp(start, tz="UTC").value // NS_PER_DAY
+        period = int(round(1e9 / frequency))
+
+        with self._lock:
+            file_ids = []
+            for file_index in range(files):
+                file_id = str(uuid4())
+                self._files[file_id] = {"State": "Ready", "Days": {}}
+                for day in range(first_day, first_day + days):
+                    path = f"data/{series_id}/{file_index}/{day}.csv"
+                    self._files[file_id]["Days"][day] = path
+                    self._synthetic[path] = (kind, day, period, seed + file_index)
+                file_ids.append(file_id)
+
+            series = self._new_series(series_id, file_ids)
+            series["TimeOfFirstSample"] = first_day * NS_PER_DAY
+            series["TimeOfLastSample"] = (first_day + days - 1) * NS_PER_DAY + (
+                (NS_PER_DAY - 1) // period * period
+            )
+            self._series[series_id] = series
+        return series_id
+
+    # ------------------------------------------------------------------ blobs
+
+    def blob(self, path):
+        """Content of the blob at ``path``."""
+        with self._lock:
+            content = self._blobs.get(path)
+            synthetic = self._synthetic.get(path)
+            if content is None and path in self._generated:
+                self._generated.move_to_end(path)
+                content = self._generated[path]
+        if content is not None:
+            return content
+        if synthetic is None:
+            raise _NotFound(path)
+
+        content = _synthetic_day(*synthetic)
+        with self._lock:
+            if path not in self._generated:
+                self._generated[path] = content
+                self._generated_size += len(content)
+            while self._generated_size > self._synthetic_cache_size:
+                _, evicted = self._generated.popitem(last=False)
+                self._generated_size -= len(evicted)
+        return content
+
+    def _blob_md5(self, path):
+        with self._lock:
+            content = self._blobs.get(path)
+            synthetic = self._synthetic.get(path)
+        if content is None:  # identifies the generated content
+            content = repr(synthetic).encode()
+        return _md5(content)
+
+    # ------------------------------------------------------------ API helpers
+
+    @staticmethod
+    def _new_series(series_id, file_ids=()):
+        return {
+            "TimeSeriesId": series_id,
+            "TimeOfFirstSample": 0,
+            "TimeOfLastSample": -1,
+            "Created": _now(),
+            "CreatedByEmail": "user@example.com",
+            "LastModified": None,
+            "LastModifiedByEmail": None,
+            "Files": list(file_ids),
+            "Metadata": [],
+            "Aliases": [],
+        }
+
+    def _series_info(self, series_id, metadata=True):
+        series = self._series.get(series_id)
+        if series is None:
+            raise _NotFound(series_id)
+        info = {k: v for k, v in series.items() if k not in ("Files", "Metadata")}
+        if metadata:
+            info["Metadata"] = [self._metadata[id_] for id_ in series["Metadata"]]
+        else:
+            info.pop("Aliases")
+        return info
+
+    def _commit_file(self, file_id):
+        """Split an uploaded file into day chunks."""
+        file_ = self._files.get(file_id)
+        if file_ is None:
+            raise _NotFound(file_id)
+
+        content = self._blobs.pop(f"files/{file_id}", b"")
+        df = pd.read_csv(
+            io.BytesIO(content),
+            header=None,
+            names=["index", "values"],
+            dtype={"index": "int64"},
+            keep_default_na=False,
+        )
+        days = df["index"] // NS_PER_DAY
+        for day, df_day in df.groupby(days, sort=True):
+            path = f"data/{file_id}/{day}.csv"
+            self._blobs[path] = _to_csv(df_day)
+            file_["Days"][int(day)] = path
+
+        file_["State"] = "Ready"
+        if len(df):
+            file_["TimeOfFirstSample"] = int(df["index"].min())
+            file_["TimeOfLastSample"] = int(df["index"].max())
+
+    def _add_file(self, series_id, file_id):
+        series = self._series[series_id]
+        file_ = self._files.get(file_id)
+        if file_ is None or file_["State"] != "Ready":
+            raise _NotFound(file_id)
+        series["Files"].append(file_id)
+        self._aggregates.clear()
+        if "TimeOfFirstSample" in file_:
+            if series["TimeOfLastSample"] < series["TimeOfFirstSample"]:
+                series["TimeOfFirstSample"] = file_["TimeOfFirstSample"]
+                series["TimeOfLastSample"] = file_["TimeOfLastSample"]
+            else:
+                series["TimeOfFirstSample"] = min(
+                    series["TimeOfFirstSample"], file_["TimeOfFirstSample"]
+                )
+                series["TimeOfLastSample"] = max(
+                    series["TimeOfLastSample"], file_["TimeOfLastSample"]
+                )
+        series["LastModified"] = _now()
+        return {
+            "FileId": file_id,
+            "TimeSeriesId": series_id,
+            "TimeOfFirstSample": file_.get("TimeOfFirstSample", 0),
+            "TimeOfLastSample": file_.get("TimeOfLastSample", -1),
+        }
+
+    def _data_days(self, series_id, start, end):
+        series = self._series.get(series_id)
+        if series is None:
+            raise _NotFound(series_id)
+
+        first_day, last_day = start // NS_PER_DAY, end // NS_PER_DAY
+        files = []
+        for index, file_id in enumerate(series["Files"]):
+            chunks = [
+                {
+                    "Container": "data",
+                    "Path": path,
+                    "Endpoint": f"{self.url}/blob/{path}",
+                    "ContentMd5": self._blob_md5(path),
+                    "DaysSinceEpoch": day,
+                }
+                for day, path in sorted(self._files[file_id]["Days"].items())
+                if first_day <= day <= last_day
+            ]
+            files.append({"Index": index, "FileId": file_id, "Chunks": chunks})
+        return {"Files": files}
+
+    def _series_data(self, series_id, start, end):
+        """Merged data of a series from ``start`` to ``end`` (exclusive)."""
+        response = self._data_days(series_id, start, end - 1)
+        frames = []
+        for file_ in response["Files"]:
+            for chunk in file_["Chunks"]:
+                frames.append(
+                    pd.read_csv(
+                        io.BytesIO(self.blob(chunk["Path"])),
+                        header=None,
+                        names=["index", "values"],
+                    )
+                )
+        if not frames:
+            return pd.Series(dtype="float64")
+        df = pd.concat(frames).drop_duplicates("index", keep="last")
+        series = df.set_index("index")["values"].sort_index()
+        return series.loc[start : end - 1]
+
+    def _samples_aggregate(self, series_id, query, page_url):
+        start = pd.Timestamp(query["start"]).value
+        end = pd.Timestamp(query["end"]).value
+        period = _aggregation_period(query["aggregationPeriod"])
+        function = _AGGREGATION_FUNCTIONS[query["aggregationFunction"].lower()]
+        page_size = int(query.get("maxPageSize", 30000))
+        offset = int(query.get("$skip", 0))
+        include_empty = query.get("includeEmptyAggregations", "False") == "True"
+
+        # Pages of the same query are sliced from one aggregation
+        key = (series_id, start, end, period, function, include_empty)
+        aggregated = self._aggregates.get(key)
+        if aggregated is None:
+            series = self._series_data(series_id, start, end)
+            series.index = pd.to_datetime(series.index, utc=True)
+            aggregated = series.resample(period, origin="epoch").agg(function)
+            if not include_empty:
+                aggregated = aggregated.dropna()
+            if len(self._aggregates) >= 8:
+                self._aggregates.clear()
+            self._aggregates[key] = aggregated
+
+        page = aggregated.iloc[offset : offset + page_size]
+        response = {
+            "@odata.context": f"{self.api_base_url}$metadata#Samples",
+            "value": [
+                {"Timestamp": timestamp.isoformat(), "Value": _json_value(value)}
+                for timestamp, value in page.items()
+            ],
+        }
+        if offset + page_size < len(aggregated):
+            query = dict(query, **{"$skip": offset + page_size})
+            response["@odata.nextLink"] = f"{page_url}?{urlencode(query)}"
+        return response
+
+    def _search(self, args):
+        namespace, key, name, value = (list(args) + [None] * 4)[:4]
+        results = {}
+        for series_id, series in self._series.items():
+            matches = []
+            for metadata_id in series["Metadata"]:
+                entry = self._metadata[metadata_id]
+                if entry["Namespace"] != namespace:
+                    continue
+                if key is not None and not entry["Key"].startswith(key):
+                    continue
+                if name is not None and name not in entry["Value"]:
+                    continue
+                if value is not None and not _value_matches(
+                    entry["Value"][name], value
+                ):
+                    continue
+                matches.append(
+                    json.dumps(
+                        {
+                            "Namespace": entry["Namespace"],
+                            "Key": entry["Key"],
+                            "Value": entry["Value"],
+                        }
+                    )
+                )
+            if matches:
+                results[series_id] = matches
+        if value is not None:
+            return sorted(results)
+        return results
+
+    def _find_metadata(self, namespace, key):
+        for entry in self._metadata.values():
+            if entry["Namespace"] == namespace and entry["Key"] == key:
+                return entry
+        return None
+
+    def _set_metadata(self, namespace, key, value, overwrite):
+        entry = self._find_metadata(namespace, key)
+        if entry is not None and not overwrite:
+            raise _Conflict(f"{namespace}/{key}")
+        if entry is None:
+            entry = {
+                "Id": str(uuid4()),
+                "Namespace": namespace,
+                "Key": key,
+                "Created": _now(),
+                "CreatedByEmail": "user@example.com",
+            }
+            self._metadata[entry["Id"]] = entry
+        entry.update(
+            {
+                "Value": value,
+                "LastModified": _now(),
+                "LastModifiedByEmail": "user@example.com",
+            }
+        )
+        return {"Id": entry["Id"]}
+
+    def _metadata_entry(self, metadata_id):
+        entry = self._metadata.get(metadata_id)
+        if entry is None:
+            raise _NotFound(metadata_id)
+        entry = dict(entry)
+        entry["TimeSeries"] = [
+            self._series_info(series_id, metadata=False)
+            for series_id, series in self._series.items()
+            if metadata_id in series["Metadata"]
+        ]
+        return entry
+
+    # ---------------------------------------------------------------- routing
+
+    def handle(self, method, path, query, headers, body):
+        """
+        Handle a request.
+
+        Returns
+        -------
+        tuple
+            ``(status, headers, body)``, where ``body`` is ``bytes``, or an
+            object to be serialized as JSON.
+        """
+        if path.startswith("/blob/"):
+            self._count(method, "blob")
+            time.sleep(self.blob_latency)
+            return self._handle_blob(
+                method, unquote(path[len("/blob/") :]), query, headers, body
+            )
+
+        self._count(method, path)
+        time.sleep(self.api_latency)
+        route = path[len("/api/") :]
+        for route_method, pattern, handler in self._routes:
+            match = re.fullmatch(pattern, route)
+            if route_method == method and match:
+                with self._lock:
+                    return handler(*match.groups(), query=query, body=body)
+        return 404, {}, {"Message": f"No route for {method} {path}"}
+
+    def _route_table(self):
+        return [
+            ("GET", r"ping", self._ping),
+            ("POST", r"files/upload", self._files_upload),
+            ("POST", r"files/commit", self._files_commit),
+            ("GET", r"files/([^/]+)/status", self._files_status),
+            ("POST", r"timeseries/create", self._timeseries_create),
+            ("POST", r"timeseries/add", self._timeseries_add),
+            ("GET", r"timeseries/search/(.+)", self._timeseries_search),
+            ("GET", r"timeseries/([^/]+)/data/days", self._timeseries_data_days),
+            ("PUT", r"timeseries/([^/]+)/metadata", self._timeseries_metadata_put),
+            ("DELETE", r"timeseries/([^/]+)/metadata", self._timeseries_metadata_del),
+            ("GET", r"timeseries/([^/]+)", self._timeseries_get),
+            ("PUT", r"timeseries/([^/]+)", self._timeseries_put),
+            ("DELETE", r"timeseries/([^/]+)", self._timeseries_delete),
+            (
+                "GET",
+                r"reservoir/timeseries/([^/]+)/samples/aggregate",
+                self._timeseries_aggregate,
+            ),
+            ("POST", r"metadata/search", self._metadata_search),
+            ("GET", r"metadata/?", self._metadata_namespaces),
+            ("GET", r"metadata/([^/]+)/([^/]+)", self._metadata_get_key),
+            ("GET", r"metadata/([^/]+)", self._metadata_get),
+            ("PUT", r"metadata/([^/]+)/([^/]+)", self._metadata_put),
+            ("DELETE", r"metadata/([^/]+)", self._metadata_delete),
+        ]
+
+    def _count(self, method, path):
+        key = f"{method} {path}"
+        with self._lock:
+            self._request_counts[key] = self._request_counts.get(key, 0) + 1
+
+    def _handle_blob(self, method, path, query, headers, body):
+        comp = query.get("comp")
+        if comp == "block" and method == "PUT":
+            content_md5 = headers.get("Content-MD5")
+            if content_md5 and content_md5 != _md5(body):
+                return 400, {}, {"Message": "Md5Mismatch"}
+            with self._lock:
+                self._blocks.setdefault(path, {})[query["blockid"]] = body
+            return 201, {}, b""
+        if comp == "blocklist" and method == "PUT":
+            block_ids = [element.text for element in ElementTree.fromstring(body)]
+            with self._lock:
+                staged = self._blocks.get(path, {})
+                if any(block_id not in staged for block_id in block_ids):
+                    return 400, {}, {"Message": "InvalidBlockList"}
+                content = b"".join(staged[block_id] for block_id in block_ids)
+                self._blocks.pop(path)
+            encoding = headers.get("x-ms-blob-content-encoding")
+            with self._lock:
+                self._blobs[path] = _decode(content, encoding)
+            return 201, {}, b""
+        if comp == "blocklist" and method == "GET":
+            with self._lock:
+                staged = dict(self._blocks.get(path, {}))
+                if not staged and path not in self._blobs:
+                    return 404, {}, {"Message": "BlobNotFound"}
+            blocks = "".join(
+                f"<Block><Name>{block_id}</Name><Size>{len(block)}</Size></Block>"
+                for block_id, block in staged.items()
+            )
+            return (
+                200,
+                {"Content-Type": "application/xml"},
+                (
+                    '<?xml version="1.0" encoding="utf-8"?><BlockList>'
+                    f"<CommittedBlocks /><UncommittedBlocks>{blocks}"
+                    "</UncommittedBlocks></BlockList>"
+                ).encode(),
+            )
+
+        if method == "PUT":
+            encoding = headers.get("x-ms-blob-content-encoding")
+            with self._lock:
+                self._blobs[path] = _decode(body, encoding)
+            return 201, {}, b""
+        if method != "GET":
+            return 405, {}, b""
+
+        content = self.blob(path)
+        range_ = re.fullmatch(r"bytes=(\d+)-(\d*)", headers.get("Range", ""))
+        if range_ is None:
+            return 200, {"Content-Type": "text/csv"}, content
+
+        first = int(range_.group(1))
+        last = min(int(range_.group(2) or len(content) - 1), len(content) - 1)
+        if first >= len(content):
+            return 416, {"Content-Range": f"bytes */{len(content)}"}, b""
+        return (
+            206,
+            {
+                "Content-Type": "text/csv",
+                "Content-Range": f"bytes {first}-{last}/{len(content)}",
+            },
+            content[first : last + 1],
+        )
+
+    def _ping(self, query, body):
+        return 200, {}, {"Time": _now(), "Status": "pong"}
+
+    def _files_upload(self, query, body):
+        file_id = str(uuid4())
+        self._files[file_id] = {"State": "Uploading", "Days": {}}
+        return (
+            200,
+            {},
+            {
+                "FileId": file_id,
+                "Container": "files",
+                "Path": file_id,
+                "Endpoint": f"{self.url}/blob/files/{file_id}",
+                "ContentMd5": None,
+            },
+        )
+
+    def _files_commit(self, query, body):
+        self._commit_file(json.loads(body)["FileId"])
+        return 204, {}, b""
+
+    def _files_status(self, file_id, query, body):
+        file_ = self._files.get(file_id)
+        if file_ is None:
+            raise _NotFound(file_id)
+        return 200, {}, {"FileId": file_id, "State": file_["State"]}
+
+    def _timeseries_create(self, query, body):
+        file_id = _form(body)["FileId"]
+        series_id = str(uuid4())
+        self._series[series_id] = self._new_series(series_id)
+        return 200, {}, self._add_file(series_id, file_id)
+
+    def _timeseries_add(self, query, body):
+        form = _form(body)
+        if form["TimeSeriesId"] not in self._series:
+            raise _NotFound(form["TimeSeriesId"])
+        return 200, {}, self._add_file(form["TimeSeriesId"], form["FileId"])
+
+    def _timeseries_search(self, args, query, body):
+        return 200, {}, self._search(unquote(args).split("/"))
+
+    def _timeseries_data_days(self, series_id, query, body):
+        start, end = int(query["start"]), int(query["end"])
+        return 200, {}, self._data_days(series_id, start, end)
+
+    def _timeseries_metadata_put(self, series_id, query, body):
+        series = self._series.get(series_id)
+        if series is None:
+            raise _NotFound(series_id)
+        for metadata_id in json.loads(body):
+            if metadata_id not in self._metadata:
+                raise _NotFound(metadata_id)
+            if metadata_id not in series["Metadata"]:
+                series["Metadata"].append(metadata_id)
+        return 200, {}, self._series_info(series_id)
+
+    def _timeseries_metadata_del(self, series_id, query, body):
+        series = self._series.get(series_id)
+        if series is None:
+            raise _NotFound(series_id)
+        remove = set(json.loads(body))
+        series["Metadata"] = [id_ for id_ in series["Metadata"] if id_ not in remove]
+        return 200, {}, self._series_info(series_id)
+
+    def _timeseries_get(self, series_id, query, body):
+        return 200, {}, self._series_info(series_id)
+
+    def _timeseries_put(self, series_id, query, body):
+        self._series.setdefault(series_id, self._new_series(series_id))
+        return 200, {}, {"TimeSeriesId": series_id}
+
+    def _timeseries_delete(self, series_id, query, body):
+        if self._series.pop(series_id, None) is None:
+            raise _NotFound(series_id)
+        return 200, {}, b""
+
+    def _timeseries_aggregate(self, series_id, query, body):
+        page_url = (
+            f"{self.api_base_url}reservoir/timeseries/{series_id}/samples/aggregate"
+        )
+        return 200, {}, self._samples_aggregate(series_id, query, page_url)
+
+    def _metadata_search(self, query, body):
+        request = json.loads(body)
+        entries = [
+            entry
+            for entry in self._metadata.values()
+            if entry["Namespace"] == request["Namespace"]
+            and entry["Key"].startswith(request.get("Key") or "")
+        ]
+        return 200, {}, entries
+
+    def _metadata_namespaces(self, query, body):
+        namespaces = {entry["Namespace"] for entry in self._metadata.values()}
+        return 200, {}, sorted(namespaces)
+
+    def _metadata_get_key(self, namespace, key, query, body):
+        entry = self._find_metadata(unquote(namespace), unquote(key))
+        if entry is None:
+            raise _NotFound(f"{namespace}/{key}")
+        return 200, {}, entry
+
+    def _metadata_get(self, id_or_namespace, query, body):
+        if id_or_namespace in self._metadata:
+            return 200, {}, self._metadata_entry(id_or_namespace)
+        namespace = unquote(id_or_namespace)
+        keys = {
+            entry["Key"]
+            for entry in self._metadata.values()
+            if entry["Namespace"] == namespace
+        }
+        return 200, {}, sorted(keys)
+
+    def _metadata_put(self, namespace, key, query, body):
+        overwrite = query.get("overwrite", "false").lower() == "true"
+        value = json.loads(body)["Value"]
+        return (
+            200,
+            {},
+            self._set_metadata(unquote(namespace), unquote(key), value, overwrite),
+        )
+
+    def _metadata_delete(self, metadata_id, query, body):
+        if self._metadata.pop(metadata_id, None) is None:
+            raise _NotFound(metadata_id)
+        for series in self._series.values():
+            if metadata_id in series["Metadata"]:
+                series["Metadata"].remove(metadata_id)
+        return 200, {}, b""
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return  # client went away, e.g. a cancelled download
+        super().handle_error(request, client_address)
+
+
+def _handler_class(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body are sent separately
+
+        def do_request(self):
+            split = urlsplit(self.path)
+            query = {key: values[-1] for key, values in parse_qs(split.query).items()}
+            try:
+                status, headers, body = server.handle(
+                    self.command, split.path, query, self.headers, self._read_body()
+                )
+            except _NotFound as error:
+                status, headers, body = 404, {}, {"Message": f"Not found: {error}"}
+            except _Conflict as error:
+                status, headers, body = 409, {}, {"Message": f"Conflict: {error}"}
+            except (KeyError, ValueError) as error:
+                status, headers, body = 400, {}, {"Message": f"Bad request: {error}"}
+
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode()
+                headers = dict(headers, **{"Content-Type": "application/json"})
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_PUT = do_POST = do_DELETE = do_request
+
+        def _read_body(self):
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                chunks = []
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0], 16)
+                    chunks.append(self.rfile.read(size))
+                    self.rfile.readline()
+                    if size == 0:
+                        return b"".join(chunks)
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def _synthetic_day(kind, day, period, seed):
+    """CSV content of one day of a synthetic series."""
+    index = day * NS_PER_DAY + np.arange(0, NS_PER_DAY, period, dtype="int64")
+    rng = np.random.default_rng([seed, day])
+    if kind == "numeric":
+        values = rng.random(len(index))
+    else:
+        values = np.char.add("value-", rng.integers(0, 1000, len(index)).astype(str))
+    return _to_csv(pd.DataFrame({"index": index, "values": values}))
+
+
+def _to_csv(df):
+    return df.to_csv(header=False, index=False, lineterminator="\n").encode()
+
+
+def _md5(content):
+    return base64.b64encode(hashlib.md5(content).digest()).decode()
+
+
+def _decode(body, encoding):
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        return zlib.decompress(body)
+    if encoding == "zstd":
+        try:
+            from compression import zstd
+        except ImportError:
+            from backports import zstd
+        return zstd.decompress(body)
+    return body
+
+
+def _form(body):
+    return {key: values[-1] for key, values in parse_qs(body.decode()).items()}
+
+
+def _aggregation_period(period):
+    match = re.fullmatch(r"(\d+)(h|m|s|ms|microsecond|tick)", period)
+    if match is None:
+        raise ValueError(f"invalid aggregation period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == "tick":  # 100 nanoseconds
+        return pd.Timedelta(count * 100, "ns")
+    return pd.Timedelta(count, _PERIOD_UNITS[unit])
+
+
+def _value_matches(value, pattern):
+    return str(value) == pattern or fnmatch.fnmatchcase(str(value), pattern)
+
+
+def _json_value(value):
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5824)
+    parser.add_argument("--api-latency", type=float, default=0.0)
+    parser.add_argument("--blob-latency", type=float, default=0.0)
+    parser.add_argument(
+        "--series",
+        action="append",
+        default=[],
+        metavar="DAYS:HZ[:KIND[:FILES]]",
+        help="add a synthetic series, e.g. 30:10 or 7:1:string:2",
+    )
+    args = parser.parse_args()
+
+    server = StandInServer(
+        args.host,
+        args.port,
+        api_latency=args.api_latency,
+        blob_latency=args.blob_latency,
+    )
+    for spec in args.series:
+        days, frequency, kind, files = (spec.split(":") + ["numeric", "1"])[:4]
+        series_id = server.add_series(
+            days=int(days), frequency=float(frequency), kind=kind, files=int(files)
+        )
+        print(f"series {series_id}: {spec}")
+
+    print(f"Serving on {server.api_base_url} (Ctrl+C to stop)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Stress ``StorageCache`` with many threads and processes sharing one cache.
+
+Each process has its own ``StorageCache`` (like a ``Client``) on the same
+``cache_root``, used by many threads. Threads look up days drawn from a
+skewed (Zipf) distribution and put missing days, like ``Storage`` does, and
+occasionally put days that are cached already. The cache is small compared
+to the data, so that entries are evicted all the time.
+
+Reported are throughput and latency percentiles per operation, errors raised
+by the cache (which would fail a download), and violations of these
+invariants:
+
+* data read from the cache is complete and equal to the data put (no torn or
+  mixed up files),
+* the size tracked by the cache index equals the sum of its entries,
+* entries of the index point at existing files (unless files are evicted by
+  other processes),
+* after the run, all files in the cache are readable, no uncommitted files
+  are left behind, and the cache does not exceed its maximum size.
+
+The exit code is 1 if the cache raised errors or any invariant is violated.
+
+Usage::
+
+    python benchmarks/stress_cache.py [--processes 4] [--threads 8]
+        [--duration 10] [--keys 200] [--max-size 8] [--cache-root DIR]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from datareservoirio.storage import StorageCache
+
+ROWS = (2_000, 10_000)  # rows per day, above StorageCache.CACHE_THRESHOLD
+
+
+def day_rows(key):
+    return ROWS[0] + (key * 7919) % (ROWS[1] - ROWS[0])
+
+
+def day_data(key):
+    """Data of day ``key``, reproducible."""
+    rows = day_rows(key)
+    index = key * 10**14 + np.arange(rows, dtype="int64") * 10**9
+    values = np.random.default_rng(key).random(rows)
+    return pd.DataFrame({"index": index, "values": values})
+
+
+def chunk(key):
+    return {"Path": f"stress/{key}.csv", "ContentMd5": f"md5-{key}"}
+
+
+def is_intact(key, data):
+    """Check that ``data`` read from the cache is the data of day ``key``."""
+    expected = day_data(key)
+    return (
+        len(data) == len(expected)
+        and np.array_equal(data["index"].to_numpy(), expected["index"].to_numpy())
+        and np.array_equal(data["values"].to_numpy(), expected["values"].to_numpy())
+    )
+
+
+def run_thread(cache, args, seed, deadline, latencies, counts, lock):
+    rng = np.random.default_rng(seed)
+    local_latencies = defaultdict(list)
+    local_counts = Counter()
+
+    while time.perf_counter() < deadline:
+        key = int(rng.zipf(args.zipf)) % args.keys
+        time_start = time.perf_counter()
+        try:
+            data = cache.get(chunk(key))
+        except Exception as error:
+            local_counts[f"error-get-{type(error).__name__}"] += 1
+            continue
+        elapsed = time.perf_counter() - time_start
+
+        if data is None:
+            local_latencies["miss"].append(elapsed)
+            operation = "put"
+        else:
+            local_latencies["hit"].append(elapsed)
+            if not is_intact(key, data):
+                local_counts["violation-torn-read"] += 1
+            operation = "put" if rng.random() < args.rewrite else None
+
+        if operation == "put":
+            data = day_data(key)
+            time_start = time.perf_counter()
+            try:
+                cache.put(data, chunk(key))
+            except Exception as error:
+                local_counts[f"error-put-{type(error).__name__}"] += 1
+                continue
+            local_latencies["put"].append(time.perf_counter() - time_start)
+
+    with lock:
+        for operation, values in local_latencies.items():
+            latencies[operation].extend(values)
+        counts.update(local_counts)
+
+
+def check_index(cache, dangling=True):
+    """
+    Invariant violations of the in-memory index of ``cache``. Entries of files
+    evicted by other processes are only dropped from the index on lookup, so
+    check for ``dangling`` entries only if no other process uses the cache.
+    """
+    index = cache._cache_index
+    counts = Counter()
+    entries = list(index.values())
+    if index.size != sum(item["size"] for item in entries):
+        counts["violation-index-size"] += 1
+    if dangling:
+        for item in entries:
+            if not index._file_exists(item["id"], item["md5"]):
+                counts["violation-dangling-entry"] += 1
+    return counts
+
+
+def run_process(args, process):
+    cache = StorageCache(max_size=args.max_size, cache_root=args.cache_root)
+    latencies = defaultdict(list)
+    counts = Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    threads = [
+        threading.Thread(
+            target=run_thread,
+            args=(cache, args, (process, i), deadline, latencies, counts, lock),
+        )
+        for i in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counts.update(check_index(cache, dangling=args.processes == 1))
+    return dict(latencies), counts
+
+
+def check_files(args):
+    """Invariant violations of the files left in the cache."""
+    counts = Counter()
+    cache = StorageCache(max_size=args.max_size, cache_root=args.cache_root)
+    cache_path = cache._cache_path
+
+    total_size = 0
+    for name in os.listdir(cache_path):
+        filepath = os.path.join(cache_path, name)
+        if name.endswith(".uncommitted"):
+            counts["violation-uncommitted-file"] += 1
+            continue
+        total_size += os.path.getsize(filepath)
+        try:
+            data = cache._read(filepath)
+        except Exception:
+            counts["violation-unreadable-file"] += 1
+            continue
+        key = int(re.search(r"stress(\d+)csv", name).group(1))
+        if not is_intact(key, data):
+            counts["violation-torn-file"] += 1
+
+    if total_size > args.max_size * 1024**2:
+        counts["violation-max-size"] += 1
+    counts.update(check_index(cache))
+    return counts
+
+
+def percentiles(values):
+    if len(values) < 2:
+        return [values[0] if values else float("nan")] * 3
+    quantiles = statistics.quantiles(values, n=100, method="inclusive")
+    return quantiles[49], quantiles[94], quantiles[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8, help="per process")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--keys", type=int, default=200, help="number of days")
+    parser.add_argument("--zipf", type=float, default=1.2, help="skew of lookups")
+    parser.add_argument(
+        "--rewrite", type=float, default=0.05, help="share of hits put again"
+    )
+    parser.add_argument("--max-size", type=float, default=8.0, help="cache size, MB")
+    parser.add_argument("--cache-root", help="default is a temporary directory")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.cache_root is None:
+            args.cache_root = tmp_dir
+
+        latencies = defaultdict(list)
+        counts = Counter()
+        with ProcessPoolExecutor(max_workers=args.processes) as executor:
+            futures = [
+                executor.submit(run_process, args, process)
+                for process in range(args.processes)
+            ]
+            for future in futures:
+                process_latencies, process_counts = future.result()
+                for operation, values in process_latencies.items():
+                    latencies[operation].extend(values)
+                counts.update(process_counts)
+        counts.update(check_files(args))
+
+    workers = args.processes * args.threads
+    print(f"{args.processes} processes x {args.threads} threads, {args.duration} s")
+    print(
+        f"{'operation':<10} {'count':>9} {'ops/s':>9} {'p50 [ms]':>9} "
+        f"{'p95 [ms]':>9} {'p99 [ms]':>9} {'max [ms]':>9}"
+    )
+    for operation in ("hit", "miss", "put"):
+        values = latencies.get(operation, [])
+        p50, p95, p99 = percentiles(values)
+        print(
+            f"{operation:<10} {len(values):>9} {len(values) / args.duration:>9.0f} "
+            f"{p50 * 1e3:>9.2f} {p95 * 1e3:>9.2f} {p99 * 1e3:>9.2f} "
+            f"{max(values, default=float('nan')) * 1e3:>9.2f}"
+        )
+    lookups = len(latencies["hit"]) + len(latencies["miss"])
+    print(f"hit rate {len(latencies['hit']) / max(lookups, 1):.2f} ({workers} workers)")
+
+    for name, count in sorted(counts.items()):
+        print(f"{name}: {count}")
+    if any(name.startswith(("error", "violation")) for name in counts):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
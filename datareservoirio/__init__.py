@@ -1,6 +1,7 @@
 import logging
 
 from . import globalsettings  # wierd bug. must be called last?
+from ._utils import CancellationToken
 from .authenticate import UserAuthenticator as Authenticator
 from .client import Client
 
@@ -77,4 +77,5 @@ SCOPE_PROD_CLIENT = ["https://4subseaid.onmicrosoft.com/reservoir-prod/.default"
 
 # APP INSIGHTS
 ENV_VAR_ENABLE_APP_INSIGHTS = "DRIO_PYTHON_APPINSIGHTS"
+ENV_VAR_ENABLE_PHASE_TIMINGS = "DRIO_PYTHON_PHASE_TIMINGS"
 ENV_VAR_ENGINE_ROOM_APP_ID = "ENGINE_ROOM_APP_ID"
@@ -3,8 +3,6 @@ import os
 import threading
 from functools import lru_cache, wraps
 
-from azure.monitor.opentelemetry import configure_azure_monitor
-
 import datareservoirio as drio
 
 from ._constants import ENV_VAR_ENABLE_APP_INSIGHTS, ENV_VAR_ENGINE_ROOM_APP_ID
@@ -18,6 +16,9 @@ def _ensure_azure_monitor_configured(connection_string, logger_name):
     cache_key = (connection_string, logger_name)
 
     if cache_key not in _configured_loggers:
+        # Slow to import, only needed when app insights is enabled
+        from azure.monitor.opentelemetry import configure_azure_monitor
+
         with _configure_lock:
             # Double-check locking
             if cache_key not in _configured_loggers:
@@ -1,5 +1,13 @@
-import io
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import CancelledError
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import lru_cache
 
+import numpy as np
 import pandas as pd
 
 
@@ -52,17 +60,520 @@ class DataHandler:
 
     def as_binary_csv(self):
         """Return data as a binary string (representing tha data in CSV format)."""
-        df = self.as_dataframe()
-        with io.BytesIO() as fp:
-            kwargs = {
-                "header": False,
-                "index": False,
-                "encoding": "utf-8",
-                "mode": "wb",
-            }
-            df.to_csv(fp, lineterminator="\n", **kwargs)
-            csv = fp.getvalue()
-        return csv
+        return b"".join(self.iter_binary_csv())
+
+    def iter_binary_csv(self, chunk_rows=None):
+        """
+        Iterate over the data in CSV format, as binary strings of
+        ``chunk_rows`` rows each. See :py:func:`iter_csv`.
+        """
+        return iter_csv(self._series.reset_index(), chunk_rows=chunk_rows)
+
+
+# Rows serialized at a time by ``iter_csv``.
+_CSV_CHUNK_ROWS = 2**16
+
+
+def iter_csv(df, chunk_rows=None):
+    """
+    Serialize a DataFrame with two columns (time as nano-seconds since epoch,
+    and values) as CSV, chunk by chunk.
+
+    The output is the same as ``df.to_csv`` without header and index, with
+    ``\n`` as line terminator and encoded as "utf-8", but only one chunk is
+    held in memory at a time. Uploads can start with the first chunk.
+
+    Time as ``int64`` and values as ``float64`` or ``str`` are formatted with
+    vectorized operations (see ``_format_csv``). Other data types fall back to
+    ``df.to_csv``.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Data with time in the first column and values in the second.
+    chunk_rows : int, optional
+        Number of rows per chunk. Default is 65536.
+
+    Yields
+    ------
+    bytes
+        CSV content of ``chunk_rows`` rows (fewer for the last chunk).
+    """
+    chunk_rows = chunk_rows or _CSV_CHUNK_ROWS
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start : start + chunk_rows]
+        csv = None
+        if _format_csv_is_exact():
+            csv = _format_csv(chunk.iloc[:, 0], chunk.iloc[:, 1])
+        if csv is None:
+            csv = _to_csv(chunk)
+        yield csv
+
+
+def _to_csv(df):
+    kwargs = {"header": False, "index": False}
+    try:  # breaking change since pandas 1.5.0
+        csv = df.to_csv(lineterminator="\n", **kwargs)
+    except TypeError:  # Compatibility with pandas older than 1.5.0.
+        csv = df.to_csv(line_terminator="\n", **kwargs)
+    return csv.encode("utf-8")
+
+
+def _format_csv(index, values):
+    """
+    Format ``index`` (``int64``) and ``values`` (``float64`` or ``str``) as CSV
+    lines with ``pyarrow`` compute functions, like ``_to_csv``. Returns None
+    if the data types are not supported.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if index.dtype != "int64":
+        return None
+    if values.dtype == "float64":
+        value_strings = _format_floats(values.to_numpy())
+    elif values.dtype == object:
+        value_strings = _format_strings(values.to_numpy())
+    else:
+        return None
+    if value_strings is None:
+        return None
+
+    index_strings = pc.cast(pa.array(index.to_numpy()), pa.string())
+    lines = pc.binary_join_element_wise(index_strings, ",", value_strings, "\n", "")
+    offsets = np.frombuffer(
+        lines.buffers()[1], dtype="int32", count=len(lines) + 1, offset=4 * lines.offset
+    )
+    return lines.buffers()[2].slice(offsets[0], offsets[-1] - offsets[0]).to_pybytes()
+
+
+def _format_floats(values):
+    """
+    Format ``float64`` values like ``repr`` (as ``to_csv`` does), and NaN as
+    empty string. Returns a ``pyarrow`` string array.
+
+    ``pyarrow`` yields the same (shortest round-trip) digits as ``repr``, but
+    omits '.0' of integral values, and uses exponent notation for other
+    magnitudes. Values formatted with exponent, values below 1e-4 (exponent
+    notation for ``repr``) and non-finite values are formatted with ``repr``.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    strings = pc.cast(pa.array(values), pa.string())
+    fallback = (
+        pc.match_substring(strings, "e").to_numpy(zero_copy_only=False)
+        | ((np.abs(values) < 1e-4) & (values != 0.0))
+        | ~np.isfinite(values)
+    )
+    integral = ~fallback & (values == np.trunc(values))
+
+    if integral.any():
+        strings = pc.if_else(
+            pa.array(integral),
+            pc.binary_join_element_wise(strings, ".0", ""),
+            strings,
+        )
+    if fallback.any():
+        formatted = ["" if x != x else repr(x) for x in values[fallback].tolist()]
+        strings = pc.replace_with_mask(
+            strings, pa.array(fallback), pa.array(formatted, type=pa.string())
+        )
+    return strings
+
+
+def _format_strings(values):
+    """
+    Format ``str`` values (quoted where needed, as ``to_csv`` does), and
+    missing values as empty string. Returns a ``pyarrow`` string array, or
+    None if some values are not strings.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if pd.api.types.infer_dtype(values, skipna=True) not in ("string", "empty"):
+        return None
+    strings = pa.array(values, type=pa.string(), from_pandas=True).fill_null("")
+
+    special = pc.match_substring_regex(strings, _csv_quoted_characters())
+    if pc.any(special).as_py():
+        quoted = pc.binary_join_element_wise(
+            '"', pc.replace_substring(strings, '"', '""'), '"', ""
+        )
+        strings = pc.if_else(special, quoted, strings)
+    return strings
+
+
+@lru_cache(maxsize=1)
+def _csv_quoted_characters():
+    """
+    Characters that make ``_to_csv`` quote a string value (depends on the
+    Python version), as regular expression character class.
+    """
+    characters = {",": ",", '"': '"', "\r": "\\r", "\n": "\\n"}
+    quoted = ""
+    for character, pattern in characters.items():
+        df = pd.DataFrame({0: [0], 1: [f"a{character}b"]})
+        if _to_csv(df).startswith(b'0,"'):
+            quoted += pattern
+    return f"[{quoted}]"
+
+
+@lru_cache(maxsize=1)
+def _format_csv_is_exact():
+    """
+    Check that ``_format_csv`` gives the same output as ``_to_csv`` with the
+    installed versions of ``pyarrow``, ``pandas`` and Python.
+    """
+    floats = [0.0, -0.0, 1.0, -2.5, 0.1, 1e-4, 9.9e-5, 123456.789, 1e15, 1e16]
+    floats += [2.0**53, 1e22, 5e-324, 1.7976931348623157e308, 1 / 3, -1e-7]
+    floats += [float("nan"), float("inf"), float("-inf")]
+    strings = ["a", "", " a ", 'a"b', "a,b", "a\nb", "a\rb", "æøå", None, "1.0"]
+    try:
+        for values in (floats, strings):
+            df = pd.DataFrame({0: np.arange(len(values), dtype="int64"), 1: values})
+            if _format_csv(df[0], df[1]) != _to_csv(df):
+                return False
+    except Exception:  # e.g. pyarrow without the compute functions
+        return False
+    return True
+
+
+class CancellationToken:
+    """
+    Token used to cancel long running operations, like :py:meth:`Client.get`.
+    The token is cancelled when :py:meth:`cancel` is called, when the
+    (optional) deadline has passed, or when the (optional) parent token is
+    cancelled.
+
+    Parameters
+    ----------
+    deadline : float, optional
+        Time in seconds (from now) until the token expires. Default (None) is
+        no deadline.
+    parent : CancellationToken, optional
+        Token which cancels this token as well.
+    """
+
+    def __init__(self, deadline=None, parent=None):
+        self._event = threading.Event()
+        self._expires_at = None if deadline is None else time.monotonic() + deadline
+        self._parent = parent
+
+    def cancel(self):
+        """Cancel the token."""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        """True if the token is cancelled (or has expired)."""
+        return self._is_cancelled() or self.expired
+
+    @property
+    def expired(self):
+        """True if the deadline (of this token or the parent) has passed."""
+        if self._expires_at is not None and time.monotonic() >= self._expires_at:
+            return True
+        return self._parent is not None and self._parent.expired
+
+    def remaining(self):
+        """
+        Time in seconds until the token expires. None if there is no deadline.
+        Zero if the token is cancelled.
+        """
+        if self._is_cancelled():
+            return 0.0
+
+        remaining = None
+        if self._expires_at is not None:
+            remaining = max(self._expires_at - time.monotonic(), 0.0)
+        if self._parent is not None:
+            parent_remaining = self._parent.remaining()
+            if remaining is None or (
+                parent_remaining is not None and parent_remaining < remaining
+            ):
+                remaining = parent_remaining
+        return remaining
+
+    def raise_if_cancelled(self):
+        """
+        Raise ``concurrent.futures.CancelledError`` if the token is cancelled,
+        or ``TimeoutError`` if the deadline has passed.
+        """
+        if self._is_cancelled():
+            raise CancelledError("Operation was cancelled")
+        if self.expired:
+            raise TimeoutError("Deadline exceeded")
+
+    def _is_cancelled(self):
+        return self._event.is_set() or (
+            self._parent is not None and self._parent._is_cancelled()
+        )
+
+
+def _wait_within_deadline(wait_func):
+    """
+    Limit a tenacity wait strategy so that it never waits past the deadline of
+    the ``cancel_token`` keyword argument of the retried function.
+    """
+
+    def wrapper(retry_state):
+        seconds = wait_func(retry_state)
+        cancel_token = retry_state.kwargs.get("cancel_token")
+        remaining = None if cancel_token is None else cancel_token.remaining()
+        return seconds if remaining is None else min(seconds, remaining)
+
+    return wrapper
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter that adapts to throttling.
+
+    Each request takes one token. Tokens are refilled at ``rate`` tokens per
+    second, up to ``burst`` tokens. When throttled, all requests are paused
+    (e.g. for the duration given by ``Retry-After``) and the rate is reduced.
+    The rate is then increased gradually with each successful request.
+
+    Without a ``rate``, requests are not limited until throttled. The rate is
+    then limited starting from the rate observed before throttling (over the
+    last ``burst`` requests), and the limit is lifted again when the rate
+    has recovered.
+
+    Parameters
+    ----------
+    rate : float, optional
+        Maximum (sustained) number of requests per second. Default (None) is
+        no limit unless throttled.
+    burst : int
+        Maximum number of requests that can be sent at once.
+    min_rate : float
+        Lower limit of the rate when throttled.
+    backoff : float
+        Factor the rate is multiplied with when throttled.
+    increase : float
+        Increase of the rate (requests per second) for each successful request.
+    """
+
+    def __init__(self, rate=None, burst=100, min_rate=1.0, backoff=0.5, increase=0.5):
+        self._max_rate = rate
+        self._burst = burst
+        self._min_rate = min_rate
+        self._backoff = backoff
+        self._increase = increase
+
+        self._rate = rate
+        self._recovered_rate = None
+        self._tokens = float(burst)
+        self._sent = deque(maxlen=burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self):
+        """Current rate (requests per second). None if not limited."""
+        return self._rate
+
+    def acquire(self):
+        """Wait until a request can be sent, and take a token."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0.0:
+                    if self._rate is None or self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        self._sent.append(now)
+                        return
+                    wait = (1.0 - self._tokens) / self._rate
+            time.sleep(wait)
+
+    def throttled(self, retry_after=0.0):
+        """
+        Report a throttled request. All requests are paused for
+        ``retry_after`` seconds, and the rate is reduced.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._rate is None:
+                self._rate = self._recovered_rate = self._observed_rate(now)
+                self._tokens = 0.0
+            self._rate = max(self._rate * self._backoff, self._min_rate)
+            self._tokens = min(self._tokens, 0.0)
+            self._paused_until = max(self._paused_until, now + retry_after)
+
+    def succeeded(self):
+        """Report a successful request, and increase the rate gradually."""
+        with self._lock:
+            if self._rate is None:
+                return
+            self._rate += self._increase
+            if self._max_rate is not None:
+                self._rate = min(self._rate, self._max_rate)
+            elif self._rate >= self._recovered_rate:
+                self._rate = None  # recovered, lift the limit
+
+    def _observed_rate(self, now):
+        """Rate of the last (up to ``burst``) requests, over at least a second."""
+        if not self._sent:
+            return self._min_rate
+        return max(len(self._sent) / max(now - self._sent[0], 1.0), self._min_rate)
+
+    def _refill(self, now):
+        since = max(self._updated, self._paused_until)
+        if self._rate is not None and now > since:
+            self._tokens = min(self._tokens + (now - since) * self._rate, self._burst)
+        self._updated = now
+
+
+class ResponseCache:
+    """
+    Thread-safe in-memory cache of JSON API responses.
+
+    Entries are fresh for ``ttl`` seconds. Stale entries are kept if the
+    response had an ``ETag``, so that they can be revalidated with a
+    conditional request (``If-None-Match``). The least recently used entries
+    are evicted when the cache is full.
+
+    Parameters
+    ----------
+    ttl : float
+        Time to live of entries in seconds.
+    max_entries : int
+        Maximum number of entries.
+    """
+
+    def __init__(self, ttl=60.0, max_entries=1024):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key):
+        """
+        Look up an entry.
+
+        Returns
+        -------
+        tuple or None
+            ``(value, etag, fresh)``, where ``value`` is the parsed JSON
+            response (a new object each time). None if there is no usable
+            entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            content, etag, expires = entry
+            fresh = time.monotonic() < expires
+            if not fresh and etag is None:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return json.loads(content), etag, fresh
+
+    def store(self, key, content, etag=None):
+        """Store the (raw) JSON response ``content`` of a request."""
+        with self._lock:
+            self._entries[key] = (content, etag, time.monotonic() + self._ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def renew(self, key):
+        """Make a (revalidated) entry fresh for another ``ttl`` seconds."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                content, etag, _ = entry
+                self._entries[key] = (content, etag, time.monotonic() + self._ttl)
+
+    def invalidate(self, *prefixes):
+        """
+        Remove entries of requests where the URL starts with any of
+        ``prefixes``. All entries are removed if no prefixes are given.
+        """
+        with self._lock:
+            if not prefixes:
+                self._entries.clear()
+                return
+            for key in list(self._entries):
+                if key[1].startswith(prefixes):
+                    del self._entries[key]
+
+
+_active_timings = ContextVar("active_timings", default=None)
+
+
+class PhaseTimings:
+    """
+    Collect the time spent in the phases (e.g. listing, request, transfer,
+    parsing) of an operation. Time spent in the same phase in concurrent
+    threads is summed, so the total may exceed the elapsed (wall) time.
+
+    Phases are timed with :py:func:`phase` while the collector is active, see
+    :py:meth:`activate`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seconds = defaultdict(float)
+        self._counts = defaultdict(int)
+
+    @contextmanager
+    def activate(self):
+        """
+        Make this the active collector (in the current context). Note that
+        threads do not inherit the context, see ``contextvars.copy_context``.
+        """
+        token = _active_timings.set(self)
+        try:
+            yield self
+        finally:
+            _active_timings.reset(token)
+
+    @contextmanager
+    def phase(self, name):
+        """Time the phase ``name``."""
+        time_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - time_start)
+
+    def add(self, name, seconds, count=1):
+        """Add ``seconds`` to the phase ``name``."""
+        with self._lock:
+            self._seconds[name] += seconds
+            self._counts[name] += count
+
+    def as_dict(self):
+        """
+        Seconds spent (``"phase-<name>"``) and number of times
+        (``"phase-<name>-count"``) for each phase.
+        """
+        with self._lock:
+            timings = {f"phase-{name}": value for name, value in self._seconds.items()}
+            timings.update(
+                {f"phase-{name}-count": value for name, value in self._counts.items()}
+            )
+        return timings
+
+
+def phase(name):
+    """
+    Time the phase ``name`` with the active :py:class:`PhaseTimings` (if any).
+    """
+    timings = _active_timings.get()
+    if timings is None:
+        return nullcontext()
+    return timings.phase(name)
 
 
 # Translation of user input parameters of the samples/aggregate method for more convenient use (matching pandas)
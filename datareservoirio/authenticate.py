@@ -1,7 +1,13 @@
 import json
 import logging
+import math
 import os
+import threading
+import time
+import weakref
 from abc import ABCMeta, abstractmethod
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
 
 from oauthlib.oauth2 import (
     BackendApplicationClient,
@@ -9,31 +15,61 @@ from oauthlib.oauth2 import (
     MissingTokenError,
     WebApplicationClient,
 )
-from requests.adapters import HTTPAdapter
 from requests_oauthlib import OAuth2Session
 from urllib3 import Retry
 
 import datareservoirio as drio
 
 from . import _constants  # noqa: F401
-from .appdirs import user_data_dir
+from ._utils import TokenBucket
+from .appdirs import WINDOWS, user_data_dir
 from .globalsettings import environment
+from .transport import HTTPTransport
+
+if WINDOWS:
+    import msvcrt
+else:
+    import fcntl
 
 log = logging.getLogger(__name__)
 
+# Throttled responses are retried by ``BaseAuthSession.request`` (not urllib3),
+# so that all threads sharing the session slow down together.
+_THROTTLE_STATUS = frozenset([429, 503])
+_THROTTLE_RETRIES = 3
+_THROTTLE_BACKOFF = 0.5
+_THROTTLE_MAX_PAUSE = 60.0  # upper limit of ``Retry-After``, in seconds
+
+# Connections kept open to the API, i.e. the number of threads that can make
+# API calls concurrently without re-establishing connections.
+_API_POOL_MAXSIZE = 32
+
+# Tokens are renewed in the background this long (in seconds, at most the
+# given share of the token lifetime) before they expire. Requests renew the
+# token themselves only if it is about to expire regardless.
+_TOKEN_REFRESH_MARGIN = 300.0
+_TOKEN_REFRESH_RATIO = 0.1
+_TOKEN_EXPIRY_MARGIN = 10.0
+_TOKEN_REFRESH_RETRY = 30.0
+
 
 class TokenCache:
     def __init__(self, session_key=None):
         self._session_key = f".{session_key}" if session_key else ""
 
         if not os.path.exists(self._token_root):
-            os.makedirs(self._token_root)
+            os.makedirs(self._token_root, mode=0o700)
 
+        self.reload()
+
+    def reload(self):
+        """(Re)load the token from file, e.g. as written by another process."""
         try:
             with open(self.token_path, "r") as f:
                 self._token = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
             self._token = {}
+        self._token_dumped = dict(self._token)
 
     def __call__(self, token):
         self.dump(token)
@@ -52,9 +88,33 @@ class TokenCache:
         )
 
     def dump(self, token):
+        """
+        Update the token and write it to file. The file is replaced atomically
+        (never left partially written), and only if the token has changed.
+        """
         self._token.update(token)
-        with open(self.token_path, "w") as f:
-            json.dump(self._token, f)
+        if self._token == self._token_dumped:
+            return
+
+        tmp_path = f"{self.token_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, "w") as f:
+                json.dump(self._token, f)
+            os.replace(tmp_path, self.token_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._token_dumped = dict(self._token)
+
+    @contextmanager
+    def lock(self):
+        """
+        Lock the token (file) for exclusive use, across threads and processes.
+        """
+        with _file_lock(f"{self.token_path}.lock"):
+            yield self
 
     @property
     def token(self):
@@ -65,6 +125,12 @@ class BaseAuthSession(OAuth2Session, metaclass=ABCMeta):
     """
     Abstract class for authorized sessions.
 
+    The token is renewed by a background thread shortly before it expires, so
+    that requests (from any number of threads) do not wait for it. Renewal is
+    serialized by a lock; if a request finds the token about to expire, it
+    renews the token under the same lock, and concurrent requests wait for the
+    new token instead of renewing it once more.
+
     Parameters
     ----------
     client : ``oauthlib.oauth2`` client.
@@ -92,7 +158,8 @@ class BaseAuthSession(OAuth2Session, metaclass=ABCMeta):
         )
 
         # Attention: Be careful when extending the list of retry_status!
-        retry_status = frozenset([413, 429, 502, 503, 504])
+        # Throttling (429 and 503) is handled by ``request``.
+        retry_status = frozenset([413, 502, 504])
         allowed_methods = frozenset(["GET", "POST", "PUT", "PATCH", "DELETE"])
 
         persist = Retry(
@@ -101,23 +168,124 @@ class BaseAuthSession(OAuth2Session, metaclass=ABCMeta):
             allowed_methods=allowed_methods,
             status_forcelist=retry_status,
             raise_on_status=False,
+            respect_retry_after_header=False,
+        )
+        self.mount(
+            environment.api_base_url,
+            HTTPTransport(pool_maxsize=_API_POOL_MAXSIZE, max_retries=persist),
         )
-        self.mount(environment.api_base_url, HTTPAdapter(max_retries=persist))
+        self._rate_limiter = TokenBucket()
+
+        self._token_lock = threading.Lock()
+        self._token_renewal = threading.local()
+        self._token_refresher = None
+        self._token_refresher_finalizer = None
+
+        with self._token_lock:
+            if auth_force or not self.token:
+                self._renew_token(fetch=True)
+            else:
+                try:
+                    self._renew_token()
+                except (KeyError, ValueError, InvalidGrantError, MissingTokenError):
+                    self._renew_token(fetch=True)
 
-        if auth_force or not self.token:
-            token = self.fetch_token()
-        else:
-            try:
-                token = self.refresh_token()
-            except (KeyError, ValueError, InvalidGrantError, MissingTokenError):
-                token = self.fetch_token()
+        self.headers.update(
+            {"user-agent": f"python-datareservoirio/{drio.__version__}"}
+        )
+
+    def request(self, method, url, *args, withhold_token=False, **kwargs):
+        """
+        Send a request, limited by the rate limiter shared by all threads
+        using this session. Throttled requests (HTTP 429 and 503) are retried
+        after the time given by ``Retry-After``, and slow down all requests
+        until the rate has recovered gradually.
+        """
+        if getattr(self._token_renewal, "active", False):
+            # Request to the token endpoint, while renewing the token
+            withhold_token = True
+        elif not withhold_token:
+            self._ensure_token()
+
+        for attempt in range(_THROTTLE_RETRIES + 1):
+            self._rate_limiter.acquire()
+            response = super().request(
+                method, url, *args, withhold_token=withhold_token, **kwargs
+            )
+            if response.status_code not in _THROTTLE_STATUS:
+                self._rate_limiter.succeeded()
+                return response
+
+            retry_after = _retry_after(response, default=_THROTTLE_BACKOFF * 2**attempt)
+            log.debug(
+                f"Throttled ({response.status_code}), retry after {retry_after} seconds"
+            )
+            self._rate_limiter.throttled(retry_after)
+        return response
+
+    def close(self):
+        self._cancel_token_refresh()
+        super().close()
+
+    def _token_expires_within(self, seconds):
+        """Check if the token expires within ``seconds``."""
+        return _expires_within(self.token or {}, seconds)
+
+    def _ensure_token(self):
+        """Renew the token if it is about to expire."""
+        if not self._token_expires_within(_TOKEN_EXPIRY_MARGIN):
+            return  # steady state, no locking
+        with self._token_lock:
+            if self._token_expires_within(_TOKEN_EXPIRY_MARGIN):
+                self._renew_token()
+
+    def _renew_token(self, fetch=False):
+        """
+        Fetch (or refresh) the token, pass it on to the token updater and
+        schedule the next background refresh. The caller must hold the token
+        lock.
+        """
+        self._token_renewal.active = True
+        try:
+            token = self.fetch_token() if fetch else self.refresh_token()
+        finally:
+            self._token_renewal.active = False
 
         if self.token_updater:
             self.token_updater(token)
+        self._schedule_token_refresh()
+        return token
 
-        self.headers.update(
-            {"user-agent": f"python-datareservoirio/{drio.__version__}"}
+    def _schedule_token_refresh(self, delay=None):
+        """
+        (Re)schedule the background refresh. By default, the token is refreshed
+        shortly before it expires.
+        """
+        self._cancel_token_refresh()
+
+        token = self.token or {}
+        if delay is None:
+            if token.get("expires_at") is None:
+                return
+            expires_in = float(token["expires_at"]) - time.time()
+            delay = max(expires_in - _token_refresh_lead(token), 0.0)
+
+        refresher = threading.Timer(
+            min(delay, threading.TIMEOUT_MAX),
+            _refresh_token_in_background,
+            args=(weakref.ref(self), token.get("access_token")),
         )
+        refresher.daemon = True
+        refresher.start()
+        self._token_refresher = refresher
+        self._token_refresher_finalizer = weakref.finalize(self, refresher.cancel)
+
+    def _cancel_token_refresh(self):
+        if self._token_refresher is not None:
+            self._token_refresher_finalizer.detach()
+            self._token_refresher.cancel()
+            self._token_refresher = None
+            self._token_refresher_finalizer = None
 
     def fetch_token(self):
         """Fetch new access and refresh token."""
@@ -236,12 +404,21 @@ class ClientAuthenticator(BaseAuthSession):
         Unique identifier for the client (i.e. app/service etc.).
     client_secret : str
         Secret/password for the client.
+    token_cache : bool, optional
+        Reuse the access token across sessions and processes (default is
+        False). The token is cached on disk per client id and environment, and
+        a new token is fetched only when the cached token is (about to be)
+        expired. Processes on the same host share the token, and fetch it from
+        the identity provider once.
 
     """
 
-    def __init__(self, client_id, client_secret):
+    def __init__(self, client_id, client_secret, token_cache=False):
         self._env = environment.current_environment
         self._client_secret = client_secret
+        self._token_cache = (
+            TokenCache(session_key=f"client.{client_id}") if token_cache else None
+        )
 
         client = BackendApplicationClient(client_id)
         super().__init__(
@@ -252,6 +429,26 @@ class ClientAuthenticator(BaseAuthSession):
             token_updater=lambda token: None,
         )
 
+    def fetch_token(self):
+        """
+        Fetch new access token, or reuse the cached token if ``token_cache``
+        is enabled and the token is still valid.
+        """
+        if self._token_cache is None:
+            return super().fetch_token()
+
+        with self._token_cache.lock():
+            self._token_cache.reload()
+            token = self._token_cache.token
+            if token and not _expires_within(token, _token_refresh_lead(token)):
+                log.debug("Reuse cached access token")
+                self.token = dict(token)
+                return self.token
+
+            token = super().fetch_token()
+            self._token_cache.dump(token)
+        return token
+
     def _prepare_fetch_token_args(self):
         args = (eval(f"_constants.TOKEN_URL_{self._env}_CLIENT"),)
         kwargs = {
@@ -268,3 +465,81 @@ class ClientAuthenticator(BaseAuthSession):
         """Refresh (expired) access token"""
         token = self.fetch_token()
         return token
+
+
+def _expires_within(token, seconds):
+    """Check if ``token`` expires within ``seconds``."""
+    expires_at = token.get("expires_at")
+    if expires_at is None:
+        return False
+    return float(expires_at) - time.time() < seconds
+
+
+def _token_refresh_lead(token):
+    """Seconds before expiry ``token`` is refreshed in the background."""
+    lead = _TOKEN_REFRESH_MARGIN
+    if token.get("expires_in") is not None:
+        lead = min(lead, _TOKEN_REFRESH_RATIO * float(token["expires_in"]))
+    return lead
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive (blocking) lock on the file ``path``, created if needed."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if WINDOWS:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if WINDOWS:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def _refresh_token_in_background(session_ref, access_token):
+    """
+    Refresh the token of a session (held by weak reference), unless it has been
+    renewed since the refresh was scheduled.
+    """
+    session = session_ref()
+    if session is None:
+        return
+
+    with session._token_lock:
+        if session.access_token != access_token:
+            return
+        try:
+            session._renew_token()
+        except Exception as error:
+            log.warning(f"Background token refresh failed: {error}")
+            if not session._token_expires_within(_TOKEN_REFRESH_RETRY):
+                session._schedule_token_refresh(delay=_TOKEN_REFRESH_RETRY)
+
+
+def _retry_after(response, default=0.0):
+    """
+    Seconds to wait according to the ``Retry-After`` header (delay in seconds
+    or HTTP date) of a response, at most ``_THROTTLE_MAX_PAUSE``. ``default``
+    if not given or not valid.
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return default
+    if math.isnan(seconds):
+        return default
+    return min(max(seconds, 0.0), _THROTTLE_MAX_PAUSE)
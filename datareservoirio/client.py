@@ -1,9 +1,12 @@
+import json
 import logging
 import os
 import time
 import warnings
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_EXCEPTION, CancelledError, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from contextvars import copy_context
 from datetime import datetime
 from functools import lru_cache, wraps
 from operator import itemgetter
@@ -13,7 +16,6 @@ from uuid import uuid4
 import numpy as np
 import pandas as pd
 import requests
-from azure.monitor.opentelemetry import configure_azure_monitor
 from tenacity import (
     retry,
     retry_if_exception_type,
@@ -21,14 +23,25 @@ from tenacity import (
     wait_chain,
     wait_fixed,
 )
-from tqdm.auto import tqdm
 
-from datareservoirio._constants import ENV_VAR_ENABLE_APP_INSIGHTS
+from datareservoirio._constants import (
+    ENV_VAR_ENABLE_APP_INSIGHTS,
+    ENV_VAR_ENABLE_PHASE_TIMINGS,
+)
 
 from ._logging import _ensure_azure_monitor_configured, log_decorator
-from ._utils import function_translation, period_translation
+from ._utils import (
+    CancellationToken,
+    PhaseTimings,
+    ResponseCache,
+    _wait_within_deadline,
+    function_translation,
+    period_translation,
+    phase,
+)
 from .globalsettings import environment
 from .storage import Storage
+from .transport import RecordingTransport
 
 log = logging.getLogger(__name__)
 
@@ -53,6 +66,11 @@ _START_DEFAULT = -9214560000000000000  # 1678-01-01
 
 _TIMEOUT_DEAULT = (120, 120)
 
+_NANOSECONDS_PER_DAY = 24 * 60 * 60 * 10**9
+
+# How often (in seconds) to check for cancellation while waiting on downloads
+_CANCEL_POLL_INTERVAL = 0.1
+
 _DEFAULT_MAX_PAGE_SIZE = 30000
 
 
@@ -72,11 +90,47 @@ class Client:
         'max_size': max size of cache in megabytes. Default is 1024 MB.
         'cache_root': cache storage location. See documentation for platform
         specific defaults.
+    storage_opt : dict, optional
+        Configuration object for controlling data download and upload.
+        'partial_fetch': download only the part of a day that covers the
+        requested interval (if not cached). Default is False.
+        'hedge': start a duplicate request for slow day downloads and use the
+        first response. Default is False.
+        'adaptive_concurrency': adapt the number of concurrent day downloads
+        to maximize throughput. Default is False.
+        'transport': transport used for blob storage, 'http1' (default),
+        'http2' or a ``requests`` transport adapter instance.
+        'pool_connections', 'pool_maxsize', 'keep_alive': connection pooling
+        of blob storage connections. By default, the pool size follows the
+        number of concurrent day downloads.
+        'warm_up': establish a connection to the API when the client is
+        created. Default is False.
+        'content_encoding': compress uploaded data with 'gzip' or 'zstd'.
+        Default is no compression.
+    response_cache : bool
+        Cache responses of ``info``, ``search`` and ``metadata_*`` lookups in
+        memory. Default is False.
+    response_cache_opt : dict, optional
+        Configuration object for controlling the response cache.
+        'ttl': seconds a response is used without asking the API. Default is
+        60 seconds. Thereafter, responses with an ETag are revalidated.
+        'max_entries': max number of cached responses. Default is 1024.
 
     """
 
-    def __init__(self, auth, cache=True, cache_opt=None):
+    def __init__(
+        self,
+        auth,
+        cache=True,
+        cache_opt=None,
+        storage_opt=None,
+        response_cache=False,
+        response_cache_opt=None,
+    ):
         self._auth_session = auth
+        self._response_cache = (
+            ResponseCache(**(response_cache_opt or {})) if response_cache else None
+        )
 
         # TODO: Remove after 2023-08-15
         if cache:
@@ -90,7 +144,10 @@ class Client:
                     FutureWarning,
                 )
 
-        self._storage = Storage(self._auth_session, cache=cache, cache_opt=cache_opt)
+        storage_opt = {} if storage_opt is None else storage_opt
+        self._storage = Storage(
+            self._auth_session, cache=cache, cache_opt=cache_opt, **storage_opt
+        )
 
     def ping(self):
         """
@@ -229,6 +286,7 @@ class Client:
             data={"TimeSeriesId": series_id, "FileId": file_id},
             timeout=_TIMEOUT_DEAULT,
         )
+        self._invalidate_cached(f"timeseries/{series_id}")
         response.raise_for_status()
         return response.json()
 
@@ -241,12 +299,9 @@ class Client:
         dict
             Available information about the series. None if series not found.
         """
-        response = self._auth_session.get(
-            environment.api_base_url + f"timeseries/{series_id}",
-            timeout=_TIMEOUT_DEAULT,
+        return self._cached_json(
+            "GET", environment.api_base_url + f"timeseries/{series_id}"
         )
-        response.raise_for_status()
-        return response.json()
 
     def search(self, namespace, key=None, name=None, value=None):
         """
@@ -289,12 +344,9 @@ class Client:
                 )
             args = args[: args.index(None)]
 
-        response = self._auth_session.get(
-            environment.api_base_url + f"timeseries/search/{'/'.join(args)}",
-            timeout=_TIMEOUT_DEAULT,
+        return self._cached_json(
+            "GET", environment.api_base_url + f"timeseries/search/{'/'.join(args)}"
         )
-        response.raise_for_status()
-        return response.json()
 
     @log_decorator("exception")
     def delete(self, series_id):
@@ -307,18 +359,22 @@ class Client:
             The id of the series to delete.
 
         """
-        return self._auth_session.delete(
+        response = self._auth_session.delete(
             environment.api_base_url + f"timeseries/{series_id}",
             timeout=_TIMEOUT_DEAULT,
         )
+        self._invalidate_cached(f"timeseries/{series_id}", "timeseries/search/")
+        return response
 
     def _timer(func):
         """Decorator used to log latency of the ``get`` and ``get_samples_aggregate`` method"""
 
         @wraps(func)
         def wrapper(self, series_id, start=None, end=None, **kwargs):
+            timings = PhaseTimings() if _phase_timings_enabled() else None
             start_time = time.perf_counter()
-            result = func(self, series_id, start=start, end=end, **kwargs)
+            with timings.activate() if timings else nullcontext():
+                result = func(self, series_id, start=start, end=end, **kwargs)
             end_time = time.perf_counter()
             elapsed_time = end_time - start_time
             start_date_as_str = None
@@ -339,6 +395,11 @@ class Client:
                 "elapsed": elapsed_time,
                 "number-of-samples": number_of_samples,
             }
+            properties.update(self._storage.metrics())
+            if timings is not None:
+                phase_timings = timings.as_dict()
+                log.debug(f"Phase timings of {func.__name__}: {phase_timings}")
+                properties.update(phase_timings)
             metric().info("Timer", extra=properties)
             return result
 
@@ -346,21 +407,6 @@ class Client:
 
     @log_decorator("exception")
     @_timer
-    @retry(
-        stop=stop_after_attempt(
-            4
-        ),  # Attempt!, not retry attempt. Attempt 2, is 1 retry
-        retry=retry_if_exception_type(
-            (
-                ConnectionError,
-                requests.exceptions.ChunkedEncodingError,
-                requests.ReadTimeout,
-                ConnectionRefusedError,
-                requests.ConnectionError,
-            )
-        ),
-        wait=wait_chain(*[wait_fixed(0.1), wait_fixed(0.5), wait_fixed(30)]),
-    )
     @log_decorator("warning")
     def get(
         self,
@@ -369,6 +415,9 @@ class Client:
         end=None,
         convert_date=True,
         raise_empty=False,
+        deadline=None,
+        cancel_token=None,
+        allow_partial=False,
     ):
         """
         Retrieve a series from DataReservoir.io.
@@ -389,12 +438,26 @@ class Client:
         raise_empty : bool
             If True, raise ValueError if no data exist in the provided
             interval. Otherwise, return an empty pandas.Series (default).
+        deadline : float, optional
+            Maximum time in seconds to spend on the call. When the deadline
+            has passed, no more data is downloaded and pending downloads are
+            cancelled. Default (None) is no deadline.
+        cancel_token : CancellationToken, optional
+            Token that can be used to cancel the call from another thread.
+        allow_partial : bool
+            If True, the data downloaded so far is returned when the call is
+            cancelled or the deadline has passed (whole days only). Otherwise,
+            ``TimeoutError`` (deadline) or
+            ``concurrent.futures.CancelledError`` (cancelled) is raised
+            (default).
 
         Returns
         -------
         pandas.Series
             Series data
         """
+        token = CancellationToken(deadline=deadline, parent=cancel_token)
+
         if not start:
             start = _START_DEFAULT
         if not end:
@@ -406,47 +469,77 @@ class Client:
         if start >= end:
             raise ValueError("start must be before end")
 
-        response = self._auth_session.get(
-            environment.api_base_url
-            + f"timeseries/{series_id}/data/days?start={start}&end={end}",
-            timeout=_TIMEOUT_DEAULT,
-        )
-        if response.status_code == 504:
-            raise TimeoutError(
-                "Gateway Timeout. Try downloading data in smaller batches, preferably with a daily interval. See documentation for guidance: https://docs.4insight.io/dataanalytics/reservoir/python/latest/user_guide/dos_donts.html."
+        with phase("listing"):
+            response_json = self._get_data_days(
+                series_id, start, end, cancel_token=token
             )
-        response.raise_for_status()
-        response_json = response.json()
-
-        if response_json["Files"]:
-            with ThreadPoolExecutor(max_workers=None) as e:
-                futures = [
-                    e.submit(self._storage.get, blob_sequence_i)
-                    for _, blob_sequence_i in sorted(
-                        _blob_sequence_days(response_json).items()
-                    )
-                ]
-            df = pd.concat([future_i.result() for future_i in futures])
-        else:
-            df = pd.DataFrame(columns=("index", "values")).astype({"index": "int64"})
 
+        e = ThreadPoolExecutor(max_workers=self._storage.max_concurrency)
         try:
-            # When we move to pandas 3, the .loc here breaks with None start and end, haven't dug into why yet
-            series = (
-                df.set_index("index").squeeze("columns").loc[start:end].copy(deep=True)
-            )
-        except KeyError as e:
-            logging.warning(
-                "The time series you requested is not properly ordered. The data will be sorted to attempt to resolve the issue. Please note that this operation may take some time."
+            futures = [
+                e.submit(
+                    copy_context().run,  # e.g. for phase timings
+                    self._storage.get,
+                    blob_sequence_i,
+                    cancel_token=token,
+                    **_day_bounds(day_i, start, end),
+                )
+                for day_i, blob_sequence_i in sorted(
+                    _blob_sequence_days(response_json).items()
+                )
+            ]
+            not_done = _wait_for_futures(futures, token, poll=cancel_token is not None)
+        finally:
+            e.shutdown(wait=False, cancel_futures=True)
+
+        interrupted = {
+            future_i
+            for future_i in futures
+            if future_i in not_done
+            or (
+                token.cancelled
+                and isinstance(future_i.exception(), (CancelledError, TimeoutError))
             )
-            series = (
-                df.set_index("index")
-                .sort_index()
-                .squeeze("columns")
-                .loc[start:end]
-                .copy(deep=True)
+        }
+        frames = [
+            future_i.result() for future_i in futures if future_i not in interrupted
+        ]
+
+        if interrupted:
+            if not allow_partial:
+                token.raise_if_cancelled()
+            log.warning(
+                f"Download interrupted. Returning {len(frames)} of {len(futures)} days."
             )
-        series.index.name = None
+
+        with phase("merge"):
+            if frames:
+                df = pd.concat(frames)
+            else:
+                df = pd.DataFrame(columns=("index", "values")).astype(
+                    {"index": "int64"}
+                )
+
+            try:
+                # When we move to pandas 3, the .loc here breaks with None start and end, haven't dug into why yet
+                series = (
+                    df.set_index("index")
+                    .squeeze("columns")
+                    .loc[start:end]
+                    .copy(deep=True)
+                )
+            except KeyError as e:
+                logging.warning(
+                    "The time series you requested is not properly ordered. The data will be sorted to attempt to resolve the issue. Please note that this operation may take some time."
+                )
+                series = (
+                    df.set_index("index")
+                    .sort_index()
+                    .squeeze("columns")
+                    .loc[start:end]
+                    .copy(deep=True)
+                )
+            series.index.name = None
 
         if series.empty and raise_empty:  # may become empty after slicing
             raise ValueError("can't find data in the given interval")
@@ -456,6 +549,41 @@ class Client:
 
         return series
 
+    @retry(
+        stop=stop_after_attempt(
+            4
+        ),  # Attempt!, not retry attempt. Attempt 2, is 1 retry
+        retry=retry_if_exception_type(
+            (
+                ConnectionError,
+                requests.exceptions.ChunkedEncodingError,
+                requests.ReadTimeout,
+                ConnectionRefusedError,
+                requests.ConnectionError,
+            )
+        ),
+        wait=_wait_within_deadline(
+            wait_chain(*[wait_fixed(0.1), wait_fixed(0.5), wait_fixed(30)])
+        ),
+    )
+    def _get_data_days(self, series_id, start, end, cancel_token=None):
+        """
+        List the files (and chunks) of a series that contain data between
+        ``start`` and ``end``. Failed chunk downloads are retried separately
+        by ``Storage``, so only the listing is retried here.
+        """
+        response = self._auth_session.get(
+            environment.api_base_url
+            + f"timeseries/{series_id}/data/days?start={start}&end={end}",
+            timeout=_request_timeout(cancel_token),
+        )
+        if response.status_code == 504:
+            raise TimeoutError(
+                "Gateway Timeout. Try downloading data in smaller batches, preferably with a daily interval. See documentation for guidance: https://docs.4insight.io/dataanalytics/reservoir/python/latest/user_guide/dos_donts.html."
+            )
+        response.raise_for_status()
+        return response.json()
+
     @log_decorator("exception")
     @_timer
     @log_decorator("warning")
@@ -468,6 +596,9 @@ class Client:
         aggregation_function=None,
         max_page_size=_DEFAULT_MAX_PAGE_SIZE,
         include_empty_aggregations=False,
+        deadline=None,
+        cancel_token=None,
+        allow_partial=False,
     ):
         """
         Retrieve a series from DataReservoir.io using the samples/aggregate endpoint.
@@ -493,11 +624,23 @@ class Client:
             to next pages and returns the entire series. For advanced usage.
         include_empty_aggregations : optional
             Whether to include empty aggregations with no data in the returned series. Default is False.
+        deadline : float, optional
+            Maximum time in seconds to spend on the call. Default (None) is no
+            deadline.
+        cancel_token : CancellationToken, optional
+            Token that can be used to cancel the call from another thread.
+        allow_partial : bool
+            If True, the pages downloaded so far are returned when the call is
+            cancelled or the deadline has passed. Otherwise, ``TimeoutError``
+            (deadline) or ``concurrent.futures.CancelledError`` (cancelled) is
+            raised (default).
         Returns
         -------
         pandas.Series
             Series data
         """
+        token = CancellationToken(deadline=deadline, parent=cancel_token)
+
         if not start:
             # Required parameter
             raise ValueError(
@@ -577,19 +720,32 @@ class Client:
                     requests.ConnectionError,
                 )
             ),
-            wait=wait_chain(*[wait_fixed(0.1), wait_fixed(0.5), wait_fixed(30)]),
+            wait=_wait_within_deadline(
+                wait_chain(*[wait_fixed(0.1), wait_fixed(0.5), wait_fixed(30)])
+            ),
         )
-        def get_samples_aggregate_page(url):
+        def get_samples_aggregate_page(url, cancel_token=None):
             return self._auth_session.get(
                 url,
-                timeout=_TIMEOUT_DEAULT,
+                timeout=_request_timeout(cancel_token),
             )
 
         if log.getEffectiveLevel() < logging.WARNING:
+            from tqdm.auto import tqdm  # slow to import, only needed here
+
             progress_bar = tqdm(unit=" pages", desc="Downloading aggregate data")
 
         while next_page_link:
-            response = get_samples_aggregate_page(next_page_link)
+            try:
+                with phase("request"):
+                    response = get_samples_aggregate_page(
+                        next_page_link, cancel_token=token
+                    )
+            except (CancelledError, TimeoutError):
+                if not (allow_partial and token.cancelled):
+                    raise
+                log.warning("Download interrupted. Returning pages downloaded so far.")
+                break
             if response.status_code == 504:
                 raise TimeoutError(
                     "Gateway Timeout. Try downloading data in smaller batches, preferably with a daily interval. See documentation for guidance: https://docs.4insight.io/dataanalytics/reservoir/python/latest/user_guide/dos_donts.html."
@@ -687,6 +843,9 @@ class Client:
             json=[metadata_id],
             timeout=_TIMEOUT_DEAULT,
         )
+        self._invalidate_cached(
+            f"timeseries/{series_id}", "timeseries/search/", "metadata/"
+        )
         response.raise_for_status()
         return response.json()
 
@@ -713,6 +872,9 @@ class Client:
             json=[metadata_id],
             timeout=_TIMEOUT_DEAULT,
         )
+        self._invalidate_cached(
+            f"timeseries/{series_id}", "timeseries/search/", "metadata/"
+        )
         response.raise_for_status()
         return response.json()
 
@@ -742,6 +904,7 @@ class Client:
             json={"Value": namevalues},
             timeout=_TIMEOUT_DEAULT,
         )
+        self._invalidate_cached()  # metadata of any series may change
         response.raise_for_status()
         return response.json()
 
@@ -773,11 +936,7 @@ class Client:
                 "Missing required input: either (metadata_id) or (namespace, key)"
             )
 
-        response = self._auth_session.get(
-            environment.api_base_url + uri_postfix, timeout=_TIMEOUT_DEAULT
-        )
-        response.raise_for_status()
-        return response.json()
+        return self._cached_json("GET", environment.api_base_url + uri_postfix)
 
     def metadata_browse(self, namespace=None):
         """
@@ -801,11 +960,7 @@ class Client:
         else:
             uri_postfix = f"metadata/{namespace}"
 
-        response = self._auth_session.get(
-            environment.api_base_url + uri_postfix, timeout=_TIMEOUT_DEAULT
-        )
-        response.raise_for_status()
-        return sorted(response.json())
+        return sorted(self._cached_json("GET", environment.api_base_url + uri_postfix))
 
     def metadata_search(self, namespace, key):
         """
@@ -823,13 +978,11 @@ class Client:
             Metadata entries that matches the search.
 
         """
-        response = self._auth_session.post(
+        return self._cached_json(
+            "POST",
             environment.api_base_url + "metadata/search",
             json={"Namespace": namespace, "Key": key, "Value": {}},
-            timeout=_TIMEOUT_DEAULT,
         )
-        response.raise_for_status()
-        return response.json()
 
     def metadata_delete(self, metadata_id):
         """
@@ -844,9 +997,89 @@ class Client:
             environment.api_base_url + f"metadata/{metadata_id}",
             timeout=_TIMEOUT_DEAULT,
         )
+        self._invalidate_cached()  # metadata of any series may change
         response.raise_for_status()
         return
 
+    @contextmanager
+    def recording(self, bundle):
+        """
+        Record the API requests and blob transfers of this client, and their
+        responses, into a bundle (directory) while the context is active.
+        Credentials are redacted. The bundle can be served offline with
+        :py:class:`transport.ReplayTransport`, e.g. to benchmark settings on
+        real access patterns.
+
+        Note that data served from the cache is not recorded. Use a client
+        without cache to record complete bundles.
+
+        Parameters
+        ----------
+        bundle : str or path-like
+            Directory of the bundle. Recordings are appended if it exists.
+        """
+        prefix = environment.api_base_url
+        api_adapters = self._auth_session.adapters
+        api_previous = api_adapters.get(prefix)
+
+        self._auth_session.mount(
+            prefix, RecordingTransport(self._auth_session.get_adapter(prefix), bundle)
+        )
+        try:
+            with self._storage.recording(bundle):
+                yield
+        finally:
+            if api_previous is None:
+                del api_adapters[prefix]
+            else:
+                self._auth_session.mount(prefix, api_previous)
+
+    def _cached_json(self, method, url, json=None):
+        """
+        Send a (read-only) API request and return the JSON response, using the
+        response cache if enabled. Stale cached responses are revalidated with
+        ``If-None-Match`` if the API provided an ETag.
+        """
+        cache = self._response_cache
+        kwargs = {"timeout": _TIMEOUT_DEAULT}
+        if json is not None:
+            kwargs["json"] = json
+
+        if cache is None:
+            response = self._auth_session.request(method, url, **kwargs)
+            response.raise_for_status()
+            return response.json()
+
+        key = (method, url, _json_key(json))
+        cached = cache.lookup(key)
+        if cached is not None:
+            value, etag, fresh = cached
+            if fresh:
+                return value
+            kwargs["headers"] = {"If-None-Match": etag}
+
+        response = self._auth_session.request(method, url, **kwargs)
+        if cached is not None and response.status_code == 304:
+            cache.renew(key)
+            return value
+        response.raise_for_status()
+
+        if "no-store" not in response.headers.get("Cache-Control", ""):
+            cache.store(key, response.content, etag=response.headers.get("ETag"))
+        return response.json()
+
+    def _invalidate_cached(self, *uri_postfixes):
+        """
+        Remove cached responses of requests to URLs starting with any of
+        ``uri_postfixes`` (relative to the API base URL), or all cached
+        responses if none are given.
+        """
+        if self._response_cache is None:
+            return
+        self._response_cache.invalidate(
+            *(environment.api_base_url + postfix for postfix in uri_postfixes)
+        )
+
     def _verify_and_prepare_series(self, series):
         if not isinstance(series, pd.Series):
             raise ValueError("series must be a pandas Series")
@@ -909,3 +1142,75 @@ def _blob_sequence_days(response_json):
             )
 
     return dict(blob_sequences)
+
+
+def _day_bounds(day, start, end):
+    """
+    Returns the ``start`` and ``end`` (inclusive) bounds needed to limit the
+    data of a given day to the requested interval. Bounds that are not
+    needed, i.e. when the whole day is within the interval, are ``None``.
+
+    Parameters
+    ----------
+    day : int
+        Days since epoch.
+    start : int
+        Start time (inclusive) as nano-seconds since epoch.
+    end : int
+        End time (inclusive) as nano-seconds since epoch.
+    """
+    day_start = day * _NANOSECONDS_PER_DAY
+    day_end = day_start + _NANOSECONDS_PER_DAY - 1
+    return {
+        "start": start if start > day_start else None,
+        "end": end if end < day_end else None,
+    }
+
+
+def _wait_for_futures(futures, cancel_token, poll=False):
+    """
+    Wait for futures to complete, or for the first one to raise an exception,
+    until the ``cancel_token`` is cancelled. Returns the futures that are not
+    done. If ``poll`` is True, the token is checked regularly (i.e. when it may
+    be cancelled from another thread). Otherwise, only the deadline is
+    respected.
+    """
+    not_done = set(futures)
+    while not_done and not cancel_token.cancelled:
+        timeout = cancel_token.remaining()
+        if poll:
+            timeout = min(timeout or _CANCEL_POLL_INTERVAL, _CANCEL_POLL_INTERVAL)
+        done, not_done = wait(not_done, timeout=timeout, return_when=FIRST_EXCEPTION)
+        if any(future_i.exception() is not None for future_i in done):
+            break
+    return not_done
+
+
+def _request_timeout(cancel_token):
+    """
+    Timeout for API requests, limited by the time remaining until the
+    deadline of the (optional) ``cancel_token``. Raises if cancelled.
+    """
+    if cancel_token is None:
+        return _TIMEOUT_DEAULT
+
+    cancel_token.raise_if_cancelled()
+    remaining = cancel_token.remaining()
+    if remaining is None:
+        return _TIMEOUT_DEAULT
+    return tuple(min(timeout_i, remaining) for timeout_i in _TIMEOUT_DEAULT)
+
+
+def _json_key(value):
+    """Hashable (canonical) representation of a JSON request body."""
+    if value is None:
+        return None
+    return json.dumps(value, sort_keys=True)
+
+
+def _phase_timings_enabled():
+    """
+    Phase timings are attached to the "Timer" record if enabled with the
+    ``DRIO_PYTHON_PHASE_TIMINGS`` environment variable.
+    """
+    return os.getenv(ENV_VAR_ENABLE_PHASE_TIMINGS, "").lower() in ("true", "1")
@@ -1,7 +1,9 @@
 import io
 import logging
 import os
-from collections import OrderedDict
+import threading
+from collections import deque
+from collections.abc import MutableMapping
 
 import pandas as pd
 
@@ -12,6 +14,10 @@ log = logging.getLogger(__name__)
 
 _BYTES_PER_ROW = 128 // 8
 
+# Rows per parquet row group. Row group statistics (min/max of ``index``) are
+# used to skip row groups entirely when only part of a day is requested.
+_ROW_GROUP_SIZE = 2**14
+
 
 class CacheIO:
     """
@@ -21,21 +27,37 @@ class CacheIO:
 
     @staticmethod
     def _write(data, filepath):
-        pre_filepath = filepath + ".uncommitted"
+        if not data["index"].is_monotonic_increasing:
+            data = data.sort_values("index", kind="stable", ignore_index=True)
+
+        # Unique per writer, as threads and processes sharing the cache may
+        # write the same file at the same time
+        pre_filepath = f"{filepath}.{os.getpid()}-{threading.get_ident()}.uncommitted"
         with io.open(pre_filepath, "wb") as file_:
             try:
                 log.debug(f"Write {pre_filepath}")
-                data.to_parquet(file_)
+                data.to_parquet(file_, row_group_size=_ROW_GROUP_SIZE)
             except Exception as error:
                 log.exception(f"Serialize to {pre_filepath} failed: {error}")
                 raise
         log.debug(f"Commit {pre_filepath} as {filepath}")
-        os.rename(pre_filepath, filepath)
+        os.replace(pre_filepath, filepath)
 
     @staticmethod
-    def _read(filepath):
+    def _read(filepath, start=None, end=None):
+        """
+        Read cached data. If ``start`` and/or ``end`` (inclusive, nano-seconds
+        since epoch) are given, only row groups overlapping the interval are
+        decoded and the returned data is limited to the interval.
+        """
+        filters = []
+        if start is not None:
+            filters.append(("index", ">=", start))
+        if end is not None:
+            filters.append(("index", "<=", end))
+
         with io.open(filepath, "rb") as file_:
-            data = pd.read_parquet(file_)
+            data = pd.read_parquet(file_, filters=filters or None)
         os.utime(filepath)
         return data
 
@@ -48,14 +70,37 @@ class CacheIO:
             log.exception(f"Could not delete {filepath}: {error}")
 
 
-class _CacheIndex(OrderedDict):
+class _Shard:
+    """Part of the cache index, with its own lock."""
+
+    __slots__ = ("lock", "items", "referenced", "size")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = {}
+        self.referenced = set()
+        self.size = 0
+
+
+class _CacheIndex(MutableMapping):
     """
     Keep track of cache index in-memory.
+
+    The index is safe to use from many threads. Entries are spread over
+    ``shards`` parts by key, each with its own lock, so that lookups from
+    different threads rarely wait for each other. Recency is approximated
+    with the CLOCK algorithm: a lookup only marks the entry as referenced,
+    and eviction (:py:meth:`popitem`) goes through the entries in insertion
+    order, giving referenced entries a second chance. Iteration follows the
+    eviction order, i.e. the least recently used entries come first.
     """
 
-    def __init__(self, cache_path, max_size):
+    def __init__(self, cache_path, max_size, shards=16):
         self._cache_path = cache_path
         self._max_size = max_size
+        self._shards = tuple(_Shard() for _ in range(shards))
+        self._clock = deque()  # (key, item) in insertion order
+        self._clock_lock = threading.Lock()
 
         cache_index_list = []
         for file_ in os.scandir(self._cache_path):
@@ -68,22 +113,83 @@ class _CacheIndex(OrderedDict):
                 )
             )
         cache_index_list.sort(key=lambda item: item[1]["time"])
-        super(_CacheIndex, self).__init__(cache_index_list)
-        self._update_size()
+        for key, item in cache_index_list:
+            self[key] = item
+
+    def _shard(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def __getitem__(self, key):
+        return self._shard(key).items[key]
+
+    def __setitem__(self, key, item):
+        shard = self._shard(key)
+        with self._clock_lock:
+            with shard.lock:
+                item_old = shard.items.get(key)
+                if item_old is not None:
+                    shard.size -= item_old["size"]
+                shard.items[key] = item
+                shard.referenced.discard(key)
+                shard.size += item["size"]
+            self._clock.append((key, item))
+            if len(self._clock) > 2 * len(self) + 1024:
+                self._compact_clock()
+
+    def __delitem__(self, key):
+        shard = self._shard(key)
+        with shard.lock:
+            item = shard.items.pop(key)
+            shard.referenced.discard(key)
+            shard.size -= item["size"]
+
+    def __iter__(self):
+        with self._clock_lock:
+            clock = list(self._clock)
+        keys, keys_referenced = [], []
+        for key, item in clock:
+            shard = self._shard(key)
+            with shard.lock:
+                if shard.items.get(key) is not item:
+                    continue  # removed or replaced since
+                referenced = key in shard.referenced
+            (keys_referenced if referenced else keys).append(key)
+        return iter(keys + keys_referenced)
+
+    def __len__(self):
+        return sum(len(shard.items) for shard in self._shards)
+
+    def _discard(self, key, item):
+        """Remove the entry, unless it was replaced by another item since."""
+        shard = self._shard(key)
+        with shard.lock:
+            if shard.items.get(key) is not item:
+                return False
+            del shard.items[key]
+            shard.referenced.discard(key)
+            shard.size -= item["size"]
+            return True
+
+    def _compact_clock(self):
+        """Drop removed and replaced entries from the clock."""
+        live = []
+        for key, item in self._clock:
+            if self._shard(key).items.get(key) is item:
+                live.append((key, item))
+        self._clock = deque(live)
 
     def exists(self, id_, md5):
         """Check if the entry exist in the cache."""
         key = self._key(id_, md5)
-        entry_exist = key in self
+        item = self._shard(key).items.get(key)
         file_exist = self._file_exists(id_, md5)
 
-        if not entry_exist and not file_exist:
+        if item is None and not file_exist:
             return False
-        elif not entry_exist and file_exist:
-            self._register_file(id_, md5)
-            return True
-        elif entry_exist and not file_exist:
-            del self[key]
+        elif item is None and file_exist:
+            return self._register_file(id_, md5)
+        elif item is not None and not file_exist:
+            self._discard(key, item)
             return False
 
         return True
@@ -91,8 +197,10 @@ class _CacheIndex(OrderedDict):
     def touch(self, id_, md5):
         """Mark the entry as recently used."""
         key = self._key(id_, md5)
-        if key in self:
-            self.move_to_end(key)
+        shard = self._shard(key)
+        with shard.lock:
+            if key in shard.items:
+                shard.referenced.add(key)
 
     @property
     def size_less_than_max(self):
@@ -106,15 +214,35 @@ class _CacheIndex(OrderedDict):
         """Current cache size."""
         return self._current_size
 
+    @property
+    def _current_size(self):
+        return sum(shard.size for shard in self._shards)
+
     def _update_size(self):
-        self._current_size = 0
-        for item in self.values():
-            self._current_size += item["size"]
+        for shard in self._shards:
+            with shard.lock:
+                shard.size = sum(item["size"] for item in shard.items.values())
 
     def popitem(self):
-        key, item = super(_CacheIndex, self).popitem(last=False)
-        self._current_size -= item["size"]
-        return item["id"], item
+        """
+        Remove and return ``(id, item)`` of the next entry to evict. Raises
+        ``KeyError`` if the index is empty.
+        """
+        with self._clock_lock:
+            while self._clock:
+                key, item = self._clock.popleft()
+                shard = self._shard(key)
+                with shard.lock:
+                    if shard.items.get(key) is not item:
+                        continue  # removed or replaced since
+                    if key in shard.referenced:
+                        shard.referenced.discard(key)  # second chance
+                        self._clock.append((key, item))
+                        continue
+                    del shard.items[key]
+                    shard.size -= item["size"]
+                return item["id"], item
+        raise KeyError("popitem(): cache index is empty")
 
     @staticmethod
     def _key(id_, md5):
@@ -137,8 +265,15 @@ class _CacheIndex(OrderedDict):
         return os.path.exists(self._get_filepath(id_, md5))
 
     def _register_file(self, id_, md5):
+        """
+        Add (or update) the entry of a cached file. Returns False if the file
+        does not exist (anymore), e.g. evicted by another process.
+        """
         filepath = self._get_filepath(id_, md5)
-        stat = os.stat(filepath)
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            return False
         item = self._index_item(id_, md5, stat.st_size, stat.st_mtime)
         self[self._key(id_, md5)] = item
-        self._current_size += item["size"]
+        return True
@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class AdaptiveConcurrency:
+    """
+    Limit the number of concurrent downloads, and adapt the limit to the
+    observed throughput (AIMD; additive increase, multiplicative decrease).
+
+    Completed downloads are evaluated in windows of (at least) ``limit``
+    downloads. The limit is:
+
+    * increased by one if the limit was reached during the window, and the
+      throughput (bytes per second) improved compared to the previous window
+      or the latency is not inflated (probing for more throughput).
+    * multiplied by ``backoff`` if storage is throttling (HTTP 429 or 503), or
+      if the throughput did not improve while the latency is inflated (more
+      than ``latency_factor`` times the lowest observed latency).
+    * otherwise kept as is.
+
+    Parameters
+    ----------
+    initial : int
+        Initial concurrency limit.
+    min_limit : int
+        Lower bound of the concurrency limit.
+    max_limit : int
+        Upper bound of the concurrency limit.
+    backoff : float
+        Multiplicative decrease factor.
+    tolerance : float
+        Relative throughput change regarded as an improvement.
+    latency_factor : float
+        Latency (relative to the lowest observed) regarded as inflated.
+    """
+
+    def __init__(
+        self,
+        initial=4,
+        min_limit=1,
+        max_limit=64,
+        backoff=0.5,
+        tolerance=0.05,
+        latency_factor=2.0,
+    ):
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._backoff = backoff
+        self._tolerance = tolerance
+        self._latency_factor = latency_factor
+
+        self._limit = min(max(initial, min_limit), max_limit)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+        self._min_latency = None
+        self._last_throughput = None
+        self._reset_window()
+
+    @property
+    def limit(self):
+        """Current concurrency limit."""
+        return self._limit
+
+    @property
+    def max_limit(self):
+        """Upper bound of the concurrency limit."""
+        return self._max_limit
+
+    def acquire(self):
+        """Wait for a free slot, and take it."""
+        with self._condition:
+            while self._in_flight >= self._limit:
+                self._condition.wait()
+            self._in_flight += 1
+            if self._in_flight >= self._limit:
+                self._window_saturated = True
+
+    def release(self, nbytes=0, latency=None, throttled=False):
+        """
+        Give back a slot, and report the outcome of the download.
+
+        Parameters
+        ----------
+        nbytes : int
+            Number of bytes downloaded.
+        latency : float, optional
+            Duration of the download in seconds.
+        throttled : bool
+            True if storage responded with HTTP 429 or 503.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._window_count += 1
+            self._window_bytes += nbytes
+            self._window_throttled |= throttled
+            if latency is not None:
+                self._window_latency += latency
+                if self._min_latency is None or latency < self._min_latency:
+                    self._min_latency = latency
+
+            if throttled or self._window_count >= self._limit:
+                self._update_limit()
+            self._condition.notify_all()
+
+    def _update_limit(self):
+        elapsed = max(time.perf_counter() - self._window_start, 1e-9)
+        throughput = self._window_bytes / elapsed
+        latency = self._window_latency / self._window_count
+        previous = self._last_throughput
+        limit = self._limit
+
+        improved = previous is None or throughput > previous * (1 + self._tolerance)
+        inflated = (
+            self._min_latency is not None
+            and latency > self._latency_factor * self._min_latency
+        )
+
+        if self._window_throttled or (inflated and not improved):
+            limit = max(int(limit * self._backoff), self._min_limit)
+        elif self._window_saturated and (improved or not inflated):
+            limit = min(limit + 1, self._max_limit)
+
+        if limit != self._limit:
+            log.debug(
+                f"Concurrency limit {self._limit} -> {limit} "
+                f"({throughput / 1e6:.2f} MB/s, {latency:.3f} s)"
+            )
+            self._limit = limit
+
+        self._last_throughput = throughput
+        self._reset_window()
+
+    def _reset_window(self):
+        self._window_start = time.perf_counter()
+        self._window_count = 0
+        self._window_bytes = 0
+        self._window_latency = 0.0
+        self._window_throttled = False
+        self._window_saturated = self._in_flight >= self._limit
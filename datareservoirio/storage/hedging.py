@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import copy_context
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+class Hedger:
+    """
+    Cut tail latency of downloads with hedged (duplicate) requests.
+
+    If a download has not completed within an adaptive delay, a duplicate
+    request is started and whichever completes first is used. The delay is a
+    percentile of recently observed download latencies. The number of hedged
+    requests is capped to a fraction of all requests.
+
+    Parameters
+    ----------
+    percentile : float
+        Percentile (0-100) of recent latencies used as hedging delay.
+    max_ratio : float
+        Maximum ratio of hedged requests to all requests.
+    min_delay : float
+        Lower limit for the hedging delay (in seconds).
+    window : int
+        Number of recent latencies used to estimate the percentile.
+    min_samples : int
+        Number of latencies required before hedging is started.
+    max_workers : int
+        Maximum number of threads used to run (hedged) requests. Should be at
+        least twice the number of concurrent calls, so that neither requests
+        nor hedges wait for a thread.
+    """
+
+    def __init__(
+        self,
+        percentile=95.0,
+        max_ratio=0.1,
+        min_delay=0.05,
+        window=200,
+        min_samples=20,
+        max_workers=32,
+    ):
+        self._percentile = percentile
+        self._max_ratio = max_ratio
+        self._min_delay = min_delay
+        self._min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="drio-hedge"
+        )
+
+        self._requests = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+
+    @property
+    def stats(self):
+        """Counters of requests, hedged requests and hedged requests that won."""
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "hedged": self._hedged,
+                "hedge-wins": self._hedge_wins,
+            }
+
+    def delay(self):
+        """
+        Current hedging delay in seconds. None if not enough latencies are
+        observed yet.
+        """
+        with self._lock:
+            if len(self._latencies) < self._min_samples:
+                return None
+            latencies = list(self._latencies)
+        return max(float(np.percentile(latencies, self._percentile)), self._min_delay)
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call ``func(*args, **kwargs)``, and call it once more if the first
+        call is slow. The result of the first successful call is returned.
+        """
+        with self._lock:
+            self._requests += 1
+
+        delay = self.delay()
+        if delay is None:
+            return self._timed(func, *args, **kwargs)
+
+        started = threading.Event()
+        primary = self._submit(self._started, started, func, *args, **kwargs)
+        started.wait()  # the delay does not include waiting for a thread
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._acquire():
+            return primary.result()
+
+        log.debug(f"Hedging request after {delay:.3f} seconds")
+        hedge = self._submit(func, *args, **kwargs)
+
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future_i in done:
+                if future_i.exception() is None:
+                    if future_i is hedge:
+                        with self._lock:
+                            self._hedge_wins += 1
+                    for future_j in pending:
+                        future_j.cancel()
+                    return future_i.result()
+        return primary.result()  # both failed
+
+    def _submit(self, func, *args, **kwargs):
+        # Run in (a copy of) the caller's context, e.g. for phase timings
+        return self._executor.submit(
+            copy_context().run, self._timed, func, *args, **kwargs
+        )
+
+    @staticmethod
+    def _started(started, func, *args, **kwargs):
+        started.set()
+        return func(*args, **kwargs)
+
+    def _acquire(self):
+        """Take a hedging token, if the budget allows."""
+        with self._lock:
+            if self._hedged + 1 > self._max_ratio * self._requests:
+                return False
+            self._hedged += 1
+            return True
+
+    def _timed(self, func, *args, **kwargs):
+        time_start = time.perf_counter()
+        result = func(*args, **kwargs)
+        with self._lock:
+            self._latencies.append(time.perf_counter() - time_start)
+        return result
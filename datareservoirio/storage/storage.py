@@ -1,28 +1,68 @@
 import base64
+import gzip
+import hashlib
 import io
+import itertools
 import logging
 import os
 import re
 import shutil
 import timeit
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from threading import RLock as Lock
+from threading import Thread
+from urllib.parse import urlencode, urlsplit
+from xml.etree import ElementTree
 
 import pandas as pd
 import requests
+import urllib3
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 
+from .._utils import _wait_within_deadline, iter_csv, phase
 from ..appdirs import user_cache_dir
+from ..globalsettings import environment
+from ..transport import HTTP2Transport, HTTPTransport, RecordingTransport
 from .cache_engine import CacheIO, _CacheIndex
+from .concurrency import AdaptiveConcurrency
+from .hedging import Hedger
 
 log = logging.getLogger(__name__)
 
+_BLOBSTORAGE_RETRY = requests.adapters.Retry(
+    total=5, backoff_factor=0.4, backoff_max=10
+)
 _BLOBSTORAGE_SESSION = requests.Session()
-_BLOBSTORAGE_SESSION.mount(
-    "https://",
-    requests.adapters.HTTPAdapter(
-        max_retries=requests.adapters.Retry(total=5, backoff_factor=0.4, backoff_max=10)
-    ),
+_BLOBSTORAGE_SESSION.mount("https://", HTTPTransport(max_retries=_BLOBSTORAGE_RETRY))
+_BLOBSTORAGE_SESSION.mount("http://", _BLOBSTORAGE_SESSION.get_adapter("https://"))
+
+# Content encodings (compression) that can be decoded when downloading.
+_CONTENT_DECODERS = frozenset(
+    ["identity"] + urllib3.response.HTTPResponse.CONTENT_DECODERS
 )
 
+# Number of threads used for downloads if not limited otherwise (same as the
+# default of ``concurrent.futures.ThreadPoolExecutor``).
+_DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+
+# Block upload (Put Block / Put Block List) of large blobs. See ``_df_to_blob``.
+_BLOCK_SIZE = 8 * 1024 * 1024  # bytes per block, smaller blobs are put at once
+_BLOCK_UPLOAD_WORKERS = 4  # blocks uploaded concurrently per blob
+
+
+# Partial (range request) download of blobs. See ``_blob_range_to_df``.
+_RANGE_HEAD_SIZE = 256 * 1024  # bytes fetched before deciding on partial download
+_RANGE_PROBE_SIZE = 4 * 1024  # bytes fetched per bisection probe
+_RANGE_MIN_SPAN = 64 * 1024  # stop bisecting when the byte range is this small
+
 
 def _encode_for_path_safety(value):
     return str(base64.urlsafe_b64encode(str(value).encode()).decode())
@@ -33,7 +73,21 @@ class Storage:
     Handle download and upload of timeseries data in DataReservoir.io.
     """
 
-    def __init__(self, session, cache=True, cache_opt=None):
+    def __init__(
+        self,
+        session,
+        cache=True,
+        cache_opt=None,
+        partial_fetch=False,
+        hedge=False,
+        adaptive_concurrency=False,
+        transport="http1",
+        pool_connections=16,
+        pool_maxsize=None,
+        keep_alive=True,
+        warm_up=False,
+        content_encoding=None,
+    ):
         """
         Handler for time series data from remote storage with caching.
 
@@ -49,6 +103,43 @@ class Storage:
             'max_size': max size of cache in megabytes. Default is 1024 MB.
             'cache_root': cache storage location. See documentation for platform
             specific defaults.
+        partial_fetch : bool
+            If True, only the part of a day file that covers the requested
+            interval is downloaded (using HTTP range requests) when the day
+            is not fully covered by the interval and is not found in the
+            cache. Partially downloaded days are not cached. Default is False.
+        hedge : bool
+            If True, a duplicate request is started for blob downloads that
+            are slow compared to recent downloads (request hedging), and the
+            first response is used. Default is False.
+        adaptive_concurrency : bool
+            If True, the number of concurrent blob downloads is limited, and
+            the limit is adapted to maximize the download throughput (and
+            reduced when storage is throttling). Default is False.
+        transport : str or requests.adapters.BaseAdapter
+            Transport used for blob storage. 'http1' (default) uses pooled
+            HTTP/1.1 connections. 'http2' multiplexes downloads over a few
+            HTTP/2 connections (requires the optional dependency
+            ``httpx[http2]``). A ``requests`` transport adapter instance can
+            also be given.
+        pool_connections : int
+            Number of blob storage hosts to keep connection pools for.
+            Default is 16.
+        pool_maxsize : int, optional
+            Maximum number of connections kept open per blob storage host.
+            Default (None) is the maximum number of concurrent downloads.
+        keep_alive : bool
+            If True (default), connections to blob storage are reused, and
+            kept alive when idle. If False, connections are closed after each
+            download.
+        warm_up : bool
+            If True, a connection to the API is established in the background
+            (ahead of the first request). Default is False.
+        content_encoding : str, optional
+            Compress uploaded data with 'gzip' or 'zstd' (requires the
+            optional dependency ``backports.zstd`` on Python < 3.14).
+            Default (None) is no compression. Compressed downloads are always
+            decompressed.
 
         """
         if cache:
@@ -57,8 +148,28 @@ class Storage:
         else:
             self._storage_cache = None
 
+        self._partial_fetch = partial_fetch
+
+        if content_encoding not in (None, "gzip", "zstd"):
+            raise ValueError("content_encoding must be None, 'gzip' or 'zstd'")
+        self._content_encoding = content_encoding
+        self._blob_offset_index = _BlobOffsetIndex()
+        self._concurrency = AdaptiveConcurrency() if adaptive_concurrency else None
+        max_workers = self.max_concurrency or _DEFAULT_MAX_WORKERS
+        # Room for a request and a hedge per concurrent download
+        self._hedger = Hedger(max_workers=2 * max_workers) if hedge else None
+
+        if pool_maxsize is None:
+            pool_maxsize = max_workers
+        self._blob_session = _blob_session(
+            transport, pool_connections, pool_maxsize, keep_alive
+        )
+
         self._session = session
 
+        if warm_up:
+            Thread(target=self._warm_up, daemon=True).start()
+
     def put(self, df, target_url, commit_request):
         """
         Put a Pandas DataFrame into storage.
@@ -74,14 +185,33 @@ class Storage:
             The tuple is passed forward to `session.request(method=METHOD, url=URL, **kwargs)`
 
         """
-        _df_to_blob(df, target_url)
+        self._upload(df, target_url)
 
         method, url, kwargs = commit_request
         response = self._session.request(method=method, url=url, **kwargs)
         response.raise_for_status()
         return
 
-    def get(self, blob_sequence):
+    @retry(
+        stop=stop_after_attempt(3),
+        retry=retry_if_exception(lambda error: _is_transient_error(error)),  # below
+        wait=wait_random_exponential(multiplier=0.5, max=10),
+        reraise=True,
+    )
+    def _upload(self, df, target_url):
+        """
+        Wrapper around ``_df_to_blob``, where uploads that fail on transient
+        errors are resumed (blocks that are uploaded already are not sent
+        again).
+        """
+        _df_to_blob(
+            df,
+            target_url,
+            session=self._blob_session,
+            content_encoding=self._content_encoding,
+        )
+
+    def get(self, blob_sequence, start=None, end=None, cancel_token=None):
         """
         Get a Pandas Dataframe from storage.
 
@@ -92,6 +222,15 @@ class Storage:
             should be a ``dict`` which contains 'Endpoint', 'Path', and 'ContentMd5' keys.
             If the sequence contains overlapping data, the last element is kept
             when merging.
+        start : int, optional
+            Start time (inclusive) as nano-seconds since epoch. If given, only
+            data from this time onward is returned.
+        end : int, optional
+            End time (inclusive) as nano-seconds since epoch. If given, only
+            data up to this time is returned.
+        cancel_token : CancellationToken, optional
+            If given, the token is checked before each blob is downloaded,
+            and the download is aborted if the token is cancelled.
 
         Returns
         -------
@@ -107,26 +246,196 @@ class Storage:
         except StopIteration:
             return pd.DataFrame(columns=("index", "values")).astype({"index": "int64"})
         else:
-            df = self._blob_to_df(chunk_i).set_index("index")
+            df = self._blob_to_df(
+                chunk_i, start=start, end=end, cancel_token=cancel_token
+            ).set_index("index")
 
         for chunk_i in blob_sequence:
-            df = df.combine_first(self._blob_to_df(chunk_i).set_index("index"))
+            df_i = self._blob_to_df(
+                chunk_i, start=start, end=end, cancel_token=cancel_token
+            ).set_index("index")
+            with phase("merge"):
+                df = df.combine_first(df_i)
 
         return df.reset_index()
 
-    def _blob_to_df(self, chunk):
+    @retry(
+        stop=stop_after_attempt(4),
+        retry=retry_if_exception(lambda error: _is_transient_error(error)),  # below
+        wait=_wait_within_deadline(wait_random_exponential(multiplier=0.5, max=10)),
+        reraise=True,
+    )
+    def _blob_to_df(self, chunk, start=None, end=None, cancel_token=None):
         """
-        Wrapper around ``_blob_to_df`` with cache (if enabled).
+        Wrapper around ``_blob_to_df`` with cache (if enabled). Data is limited
+        to ``start`` and ``end`` (inclusive) if given.
+
+        Transient network errors, throttling (429, 503) and server errors are
+        retried (with jittered exponential backoff) for each chunk separately,
+        so that a failure does not affect chunks that are already downloaded.
+        Retrying stops if ``cancel_token`` is cancelled, and never waits past
+        its deadline.
         """
-        if self._storage_cache is not None:
-            df = self._storage_cache.get(chunk)
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
 
-            if df is None:
-                df = _blob_to_df(chunk["Endpoint"])
+        if self._storage_cache is not None:
+            with phase("cache-read"):
+                df = self._storage_cache.get(chunk, start=start, end=end)
+            if df is not None:
+                return df
+
+        if self._partial_fetch and (start is not None or end is not None):
+            offsets = self._blob_offset_index.get(chunk)
+            with phase("range-download"):
+                return _blob_range_to_df(
+                    chunk["Endpoint"],
+                    start,
+                    end,
+                    offsets=offsets,
+                    session=self._blob_session,
+                )
+
+        df = self._download(chunk["Endpoint"])
+        if self._storage_cache is not None:
+            with phase("cache-write"):
                 self._storage_cache.put(df, chunk)
-        else:
-            df = _blob_to_df(chunk["Endpoint"])
-        return df
+        return _slice_df(df, start, end)
+
+    @property
+    def max_concurrency(self):
+        """
+        Maximum number of concurrent downloads. None if not limited.
+        """
+        if self._concurrency is None:
+            return None
+        return self._concurrency.max_limit
+
+    def _download(self, blob_url):
+        """
+        Wrapper around ``_blob_to_df`` with adaptive concurrency control
+        and request hedging (if enabled).
+        """
+        if self._concurrency is None:
+            return self._fetch(blob_url)
+
+        stats = {}
+        throttled = False
+        self._concurrency.acquire()
+        time_start = timeit.default_timer()
+        try:
+            return self._fetch(blob_url, stats=stats)
+        except requests.HTTPError as error:
+            throttled = getattr(error.response, "status_code", None) in (429, 503)
+            raise
+        finally:
+            self._concurrency.release(
+                nbytes=stats.get("bytes", 0),
+                latency=timeit.default_timer() - time_start,
+                throttled=throttled,
+            )
+
+    def _fetch(self, blob_url, **kwargs):
+        kwargs["session"] = self._blob_session
+        if self._hedger is None:
+            return _blob_to_df(blob_url, **kwargs)
+        return self._hedger.call(_blob_to_df, blob_url, **kwargs)
+
+    @contextmanager
+    def recording(self, bundle):
+        """
+        Record the blob transfers of this instance, and their responses, into
+        a bundle (directory) while the context is active. See
+        ``transport.RecordingTransport``.
+
+        Parameters
+        ----------
+        bundle : str or path-like
+            Directory of the bundle. Recordings are appended if it exists.
+        """
+        previous = self._blob_session.get_adapter("https://")
+        _mount_blob_transport(self._blob_session, RecordingTransport(previous, bundle))
+        try:
+            yield
+        finally:
+            _mount_blob_transport(self._blob_session, previous)
+
+    def _warm_up(self):
+        url = environment.api_base_url
+        try:
+            transport = self._session.get_adapter(url)
+            if isinstance(transport, HTTPTransport):
+                transport.warm_up(url)
+        except Exception as error:  # only an optimization, never fail
+            log.debug(f"Warm up of connection to {url} failed: {error}")
+
+    def metrics(self):
+        """
+        Download metrics (counters are accumulated over the lifetime of the
+        instance).
+
+        Returns
+        -------
+        dict
+            Metric names and values.
+        """
+        metrics = {}
+        for name, session, url in (
+            ("api", self._session, environment.api_base_url),
+            ("blob", self._blob_session, "https://"),
+        ):
+            transport = session.get_adapter(url)
+            if isinstance(transport, HTTPTransport):
+                stats = transport.stats()
+                metrics[f"{name}-connections"] = stats["connections"]
+                metrics[f"{name}-connection-reuse-rate"] = stats[
+                    "connection-reuse-rate"
+                ]
+        if self._concurrency is not None:
+            metrics["concurrency-limit"] = self._concurrency.limit
+        if self._hedger is not None:
+            stats = self._hedger.stats
+            metrics["hedged-requests"] = stats["hedged"]
+            metrics["hedged-requests-won"] = stats["hedge-wins"]
+        return metrics
+
+
+class _BlobOffsetIndex:
+    """
+    Keep track of known byte offsets of samples in blobs, in-memory.
+
+    For each blob, a sparse mapping of byte offset (start of a line) to the
+    timestamp of the sample on that line is kept. Blobs are identified by
+    path and MD5, so entries stay valid as long as the content is unchanged.
+
+    Parameters
+    ----------
+    max_blobs : int
+        Maximum number of blobs to keep track of. The least recently used
+        blobs are forgotten first.
+    """
+
+    def __init__(self, max_blobs=1024):
+        self._max_blobs = max_blobs
+        self._index = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, chunk):
+        """
+        Get the offsets entry of a blob, ``{"size": int, "points": dict,
+        "lock": Lock}``. A new (empty) entry is created if the blob is not
+        known. The entry is shared, and must only be updated while holding
+        its lock.
+        """
+        key = f"{chunk['Path']}_{chunk['ContentMd5']}"
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+            else:
+                self._index[key] = {"size": None, "points": {}, "lock": Lock()}
+                if len(self._index) > self._max_blobs:
+                    self._index.popitem(last=False)
+            return self._index[key]
 
 
 class StorageCache(CacheIO):
@@ -196,7 +505,7 @@ class StorageCache(CacheIO):
         """Reset the cache, deleting any stored data."""
         self._evict_entry_root(self.cache_root)
 
-    def get(self, chunk):
+    def get(self, chunk, start=None, end=None):
         """
         Retrieve data from backend. Uses cached data if it is available.
 
@@ -205,12 +514,18 @@ class StorageCache(CacheIO):
         chunk : dict
             Dictionary containing parameters required by the backend to get
             data.
+        start : int, optional
+            Start time (inclusive) as nano-seconds since epoch. Row groups
+            entirely before ``start`` are not read from disk.
+        end : int, optional
+            End time (inclusive) as nano-seconds since epoch. Row groups
+            entirely after ``end`` are not read from disk.
 
         """
         id_, md5 = self._get_cache_id_md5(chunk)
         log.debug(f"Cache lookup {id_}")
 
-        data = self._get_cached_data(id_, md5)
+        data = self._get_cached_data(id_, md5, start=start, end=end)
         if data is None:
             log.debug(f"Cache miss on {id_}")
         else:
@@ -232,7 +547,7 @@ class StorageCache(CacheIO):
         self._cache_index._register_file(id_, md5)
         self._evict_from_cache()
 
-    def _get_cached_data(self, id_, md5):
+    def _get_cached_data(self, id_, md5, start=None, end=None):
         if not self._cache_index.exists(id_, md5):
             return
 
@@ -240,7 +555,12 @@ class StorageCache(CacheIO):
 
         log.debug(f"Loading cached data from {filepath}")
 
-        data = self._read(filepath)
+        try:
+            data = self._read(filepath, start=start, end=end)
+        except FileNotFoundError:  # evicted meanwhile, e.g. by another process
+            log.debug(f"Cached data vanished from {filepath}")
+            self._cache_index.exists(id_, md5)  # drops the entry
+            return
         self._cache_index.touch(id_, md5)
 
         return data
@@ -284,7 +604,55 @@ class StorageCache(CacheIO):
             )
 
 
-def _blob_to_df(blob_url, session=_BLOBSTORAGE_SESSION):
+def _blob_session(
+    transport="http1", pool_connections=16, pool_maxsize=10, keep_alive=True
+):
+    """
+    Create a session for blob storage, with its own transport (and thereby
+    its own connection pool).
+
+    Parameters
+    ----------
+    transport : str or requests.adapters.BaseAdapter
+        'http1' (``HTTPTransport``), 'http2' (``HTTP2Transport``), or a
+        transport adapter instance which is mounted as is.
+    pool_connections, pool_maxsize, keep_alive
+        Pool configuration, see ``HTTPTransport``. For 'http2',
+        ``pool_maxsize`` is the maximum number of connections.
+    """
+    if isinstance(transport, requests.adapters.BaseAdapter):
+        pass
+    elif transport == "http1":
+        transport = HTTPTransport(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            keep_alive=keep_alive,
+            max_retries=_BLOBSTORAGE_RETRY,
+        )
+    elif transport == "http2":
+        transport = HTTP2Transport(
+            max_connections=pool_maxsize,
+            max_keepalive_connections=pool_maxsize,
+            retries=_BLOBSTORAGE_RETRY.total,
+        )
+    else:
+        raise ValueError(
+            "transport must be 'http1', 'http2' or a transport adapter instance"
+        )
+
+    session = requests.Session()
+    _mount_blob_transport(session, transport)
+    return session
+
+
+def _mount_blob_transport(session, transport):
+    """Mount a transport on a blob storage session (for all URLs)."""
+    log.debug(f"Blob storage transport configured as {transport!r}")
+    for prefix in ("https://", "http://"):
+        session.mount(prefix, transport)
+
+
+def _blob_to_df(blob_url, session=_BLOBSTORAGE_SESSION, stats=None):
     """
     Download blob from remote storage and present as a Pandas Series.
 
@@ -295,6 +663,8 @@ def _blob_to_df(blob_url, session=_BLOBSTORAGE_SESSION):
         in the URL.
     session : requests.Session, default _BLOBSTORAGE_SESSION
         Session object to make HTTP calls.
+    stats : dict, optional
+        If given, the number of bytes transferred is stored as ``"bytes"``.
 
     Return
     ------
@@ -303,32 +673,257 @@ def _blob_to_df(blob_url, session=_BLOBSTORAGE_SESSION):
         (``Int64``) and column ``values`` are ``str`` or ``float64``.
     """
 
-    response = session.request(method="get", url=blob_url, timeout=30, stream=True)
+    with phase("request"):
+        response = session.request(method="get", url=blob_url, timeout=30, stream=True)
     response.raise_for_status()
-    response.encoding = "utf-8"  # enforce encoding
+    df = _response_to_df(response)
+    if stats is not None:
+        stats["bytes"] = response.raw.tell()
+    return df
 
-    content = [
-        line.split(",", maxsplit=1)
-        for line in response.iter_lines(decode_unicode=True)
-        if line
-    ]
 
-    df = (
-        pd.DataFrame(content, columns=("index", "values"), copy=False)
-        .astype({"index": "int64"})
-        .astype({"values": "float64"}, errors="ignore")
-    )
+def _blob_range_to_df(
+    blob_url, start=None, end=None, offsets=None, session=_BLOBSTORAGE_SESSION
+):
+    """
+    Download the part of a blob that covers ``start`` and ``end`` (inclusive)
+    from remote storage using HTTP range requests, and present as a Pandas
+    DataFrame.
+
+    The blob content is assumed to be sorted on time. The byte range to
+    download is found by bisecting the blob with small probing range
+    requests. Byte offsets found along the way are recorded in ``offsets``,
+    so that later calls for the same blob require fewer (or no) probes.
+    Small blobs, encoded (compressed) blobs and servers that do not honor
+    range requests fall back to downloading the whole blob. So do blobs that
+    turn out not to be sorted on time (known offsets, or the downloaded
+    range, out of order).
+
+    Parameters
+    ----------
+    blob_url : str
+        Fully formated URL to the blob. Must contain all the required parameters
+        in the URL.
+    start : int, optional
+        Start time (inclusive) as nano-seconds since epoch.
+    end : int, optional
+        End time (inclusive) as nano-seconds since epoch.
+    offsets : dict, optional
+        Known byte offsets of the blob as ``{"size": int, "points": dict}``,
+        where ``points`` maps byte offsets (start of a line) to timestamps.
+        Updated in-place, while holding ``offsets["lock"]`` (added if
+        missing), so that the entry can be shared by threads.
+    session : requests.Session, default _BLOBSTORAGE_SESSION
+        Session object to make HTTP calls.
+
+    Return
+    ------
+    df : pandas.DataFrame
+        Pandas DataFrame where column ``index`` is nano-seconds since epoch
+        (``Int64``) and column ``values`` are ``str`` or ``float64``.
+    """
+    if offsets is None:
+        offsets = {"size": None, "points": {}}
+    lock = offsets.setdefault("lock", Lock())
+
+    def request_range(first, last, stream=False):
+        response = session.request(
+            method="get",
+            url=blob_url,
+            headers={"Range": f"bytes={first}-{last}"},
+            timeout=30,
+            stream=stream,
+        )
+        response.raise_for_status()
+        return response
+
+    if offsets["size"] is None:
+        response = request_range(0, _RANGE_HEAD_SIZE - 1, stream=True)
+        size = _content_range_size(response)
+        if size is None or size <= _RANGE_HEAD_SIZE:
+            # The whole blob is in the response
+            return _slice_df(_response_to_df(response), start, end)
+        if response.headers.get("Content-Encoding", "identity") != "identity":
+            response.close()
+            return _slice_df(_blob_to_df(blob_url, session=session), start, end)
+
+        head = response.content
+        with lock:
+            for point in (_first_line(head, 0), _last_line(head, 0)):
+                if point is not None:
+                    offsets["points"][point[0]] = point[1]
+            offsets["size"] = size
+
+    def probe(position):
+        response = request_range(position, position + _RANGE_PROBE_SIZE - 1)
+        point = _first_line(response.content, position)
+        if point is not None:
+            with lock:
+                offsets["points"][point[0]] = point[1]
+        return point
+
+    def known_points():
+        with lock:
+            return sorted(offsets["points"].items())
+
+    lo, hi = 0, offsets["size"]
+    if start is not None:
+        lo, _ = _bisect_blob(probe, known_points(), lo, hi, lambda t: t < start)
+    if end is not None:
+        _, hi = _bisect_blob(probe, known_points(), lo, hi, lambda t: t <= end)
+
+    df = None
+    timestamps = [timestamp for _, timestamp in known_points()]
+    if timestamps == sorted(timestamps):
+        log.debug(f"Partial download of bytes {lo}-{hi - 1} of {offsets['size']}")
+        df = _response_to_df(request_range(lo, hi - 1, stream=True))
+    if df is None or not df["index"].is_monotonic_increasing:
+        log.debug(f"Blob {blob_url} is not sorted on time, downloading all of it")
+        df = _blob_to_df(blob_url, session=session)
+    return _slice_df(df, start, end)
+
+
+def _bisect_blob(probe, points, lo, hi, before):
+    """
+    Narrow down the byte range ``[lo, hi)`` of a blob, such that all lines
+    before ``lo`` have timestamps for which ``before(timestamp)`` is True, and
+    all lines from ``hi`` have timestamps for which it is False. Both ``lo``
+    and ``hi`` are kept at the start of a line (or the end of the blob).
+
+    Known ``points`` (iterable of ``(offset, timestamp)``) are used first,
+    then the blob is probed with ``probe(position)`` until the range is small
+    enough.
+    """
+    for offset, timestamp in points:
+        if lo < offset < hi:
+            if before(timestamp):
+                lo = offset
+            else:
+                hi = offset
+
+    while hi - lo > _RANGE_MIN_SPAN:
+        point = probe((lo + hi) // 2)
+        if point is None or point[0] >= hi:
+            break
+        offset, timestamp = point
+        if before(timestamp):
+            lo = offset
+        else:
+            hi = offset
+    return lo, hi
+
+
+def _first_line(buffer, offset):
+    """
+    Find the first line that starts within ``buffer`` (holding blob bytes from
+    ``offset``). Returns ``(offset, timestamp)`` of the line, or None.
+    """
+    i = 0
+    if offset > 0:
+        i = buffer.find(b"\n") + 1
+        if i == 0:
+            return None
+    j = buffer.find(b",", i)
+    if j < 0:
+        return None
+    return offset + i, int(buffer[i:j])
+
+
+def _last_line(buffer, offset):
+    """
+    Find the last complete line within ``buffer`` (holding blob bytes from
+    ``offset``). Returns ``(offset, timestamp)`` of the line, or None.
+    """
+    end = buffer.rfind(b"\n")
+    if end < 0:
+        return None
+    i = buffer.rfind(b"\n", 0, end) + 1
+    if i == 0 and offset > 0:
+        return None
+    j = buffer.find(b",", i, end)
+    if j < 0:
+        return None
+    return offset + i, int(buffer[i:j])
+
+
+def _content_range_size(response):
+    """
+    Total size of a blob from the ``Content-Range`` header of a partial
+    response. None if the response is not partial.
+    """
+    if response.status_code != 206:
+        return None
+    try:
+        return int(response.headers["Content-Range"].rsplit("/", maxsplit=1)[1])
+    except (KeyError, IndexError, ValueError):
+        return None
+
+
+def _response_to_df(response):
+    """
+    Parse (streamed) CSV response content as a Pandas DataFrame. Compressed
+    content is decompressed while it is streamed.
+    """
+    content_encoding = response.headers.get("Content-Encoding", "identity").lower()
+    if content_encoding not in _CONTENT_DECODERS:
+        raise ValueError(
+            f"Content encoding '{content_encoding}' is not supported "
+            "('zstd' requires the optional dependency 'backports.zstd')"
+        )
+    response.encoding = "utf-8"  # enforce encoding
+
+    with phase("transfer"):
+        content = [
+            line.split(",", maxsplit=1)
+            for line in response.iter_lines(decode_unicode=True)
+            if line
+        ]
+
+    with phase("parse"):
+        df = (
+            pd.DataFrame(content, columns=("index", "values"), copy=False)
+            .astype({"index": "int64"})
+            .astype({"values": "float64"}, errors="ignore")
+        )
 
     return df
 
 
-def _df_to_blob(df, blob_url, session=_BLOBSTORAGE_SESSION):
+def _slice_df(df, start=None, end=None):
+    """
+    Limit a DataFrame (with ``index`` column as nano-seconds since epoch) to
+    ``start`` and ``end`` (both inclusive). ``None`` means unbounded.
+    """
+    if start is None and end is None:
+        return df
+
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= df["index"] >= start
+    if end is not None:
+        mask &= df["index"] <= end
+    return df.loc[mask].reset_index(drop=True)
+
+
+def _df_to_blob(
+    df,
+    blob_url,
+    session=_BLOBSTORAGE_SESSION,
+    content_encoding=None,
+    block_size=_BLOCK_SIZE,
+    max_workers=_BLOCK_UPLOAD_WORKERS,
+):
     """
     Upload a Pandas Dataframe as blob to a remote storage.
 
     The series object converted to CSV encoded in "utf-8". Headers are ignored
     and line terminator is set as ``\n``.
 
+    The CSV is serialized in blocks of ``block_size`` bytes. If it fits in
+    one block, it is uploaded with a single request. Otherwise, the blocks are
+    uploaded in parallel (Put Block) while the rest is serialized, and then
+    committed as the blob (Put Block List), see ``_put_blocks``.
+
     Parameters
     ----------
     df : pandas.DataFrame
@@ -336,24 +931,251 @@ def _df_to_blob(df, blob_url, session=_BLOBSTORAGE_SESSION):
         (``Int64``) and column ``values`` are ``str`` or ``float64``.
     session : requests.Session, default _BLOBSTORAGE_SESSION
         Session object to make HTTP calls.
+    content_encoding : str, optional
+        Compress the CSV with 'gzip' or 'zstd' (see ``_import_zstd``). The
+        CSV is compressed while it is serialized, and the blob is stored with
+        the corresponding content encoding. Default (None) is no compression.
+    block_size : int
+        Size (in bytes) of uploaded blocks.
+    max_workers : int
+        Maximum number of blocks uploaded concurrently.
 
     """
     if not isinstance(df, pd.DataFrame):
         raise ValueError
 
+    headers = {"x-ms-blob-type": "BlockBlob"}
+    if content_encoding is not None:
+        headers["x-ms-blob-content-encoding"] = content_encoding
+
+    blocks = _csv_blocks(df, content_encoding, block_size)
+    first = next(blocks, b"")
+    second = next(blocks, None)
+    if second is None:
+        with io.BytesIO(first) as fp:
+            session.request(
+                method="put",
+                url=blob_url,
+                headers=headers,
+                data=fp,
+                timeout=(30, 60),
+            ).raise_for_status()
+        return
+
+    del headers["x-ms-blob-type"]
+    _put_blocks(
+        itertools.chain([first, second], blocks),
+        blob_url,
+        session=session,
+        headers=headers,
+        max_workers=max_workers,
+    )
+
+
+def _csv_blocks(df, content_encoding=None, block_size=_BLOCK_SIZE):
+    """
+    Serialize a DataFrame as CSV (compressed according to
+    ``content_encoding``), and yield the result in blocks of ``block_size``
+    bytes (the last block may be smaller). Rows are serialized a chunk at a
+    time (see ``iter_csv``), so that only about one block is held in memory.
+    """
     with io.BytesIO() as fp:
-        kwargs = {"header": False, "index": False, "encoding": "utf-8", "mode": "wb"}
-        try:  # breaking change since pandas 1.5.0
-            df.to_csv(fp, lineterminator="\n", **kwargs)
-        except TypeError:  # Compatibility with pandas older than 1.5.0.
-            df.to_csv(fp, line_terminator="\n", **kwargs)
-        fp.seek(0)
-
-        session.request(
-            method="put",
-            url=blob_url,
-            headers={"x-ms-blob-type": "BlockBlob"},
-            data=fp,
-            timeout=(30, 60),
-        ).raise_for_status()
-    return
+        with _compressed_writer(fp, content_encoding) as writer:
+            for chunk in iter_csv(df):
+                writer.write(chunk)
+                if fp.tell() >= block_size:
+                    content = fp.getvalue()
+                    end = len(content) - len(content) % block_size
+                    for i in range(0, end, block_size):
+                        yield content[i : i + block_size]
+                    fp.seek(0)
+                    fp.truncate()
+                    fp.write(content[end:])
+        content = fp.getvalue()
+
+    for i in range(0, len(content), block_size):
+        yield content[i : i + block_size]
+
+
+def _put_blocks(
+    blocks,
+    blob_url,
+    session=_BLOBSTORAGE_SESSION,
+    headers=None,
+    max_workers=_BLOCK_UPLOAD_WORKERS,
+):
+    """
+    Upload a blob as blocks (Put Block) and commit them (Put Block List).
+
+    Blocks are uploaded concurrently by ``max_workers`` threads, and at most
+    ``max_workers`` blocks are held in memory while waiting to be uploaded.
+    Transient errors are retried for each block separately.
+
+    Block IDs are derived from the position and MD5 of the block content.
+    Blocks that are already staged (uploaded, but not committed) with the
+    same ID, e.g. by an earlier upload to the same URL that was interrupted,
+    are not uploaded again.
+
+    Parameters
+    ----------
+    blocks : iterable of bytes
+        Content of the blob, block by block.
+    blob_url : str
+        Fully formated URL to the blob.
+    session : requests.Session, default _BLOBSTORAGE_SESSION
+        Session object to make HTTP calls.
+    headers : dict, optional
+        Headers of the Put Block List request, e.g. blob properties like
+        ``x-ms-blob-content-encoding``.
+    max_workers : int
+        Maximum number of blocks uploaded concurrently.
+    """
+    staged = _staged_blocks(blob_url, session=session)
+
+    block_ids = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for index, block in enumerate(blocks):
+            block_id, content_md5 = _block_id(index, block)
+            block_ids.append(block_id)
+            if staged.get(block_id) == len(block):
+                log.debug(f"Block {index} of {blob_url} is already staged")
+                continue
+            if len(pending) >= max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            pending.add(
+                executor.submit(
+                    _put_block, blob_url, block_id, content_md5, block, session
+                )
+            )
+        for future in pending:
+            future.result()
+
+    block_list = "".join(f"<Latest>{block_id}</Latest>" for block_id in block_ids)
+    _request_with_retry(
+        session,
+        method="put",
+        url=_blob_url_with(blob_url, comp="blocklist"),
+        headers={"Content-Type": "application/xml", **(headers or {})},
+        data=(
+            '<?xml version="1.0" encoding="utf-8"?>'
+            f"<BlockList>{block_list}</BlockList>"
+        ).encode(),
+        timeout=(30, 60),
+    )
+
+
+def _block_id(index, block):
+    """Block ID (base64) and MD5 (base64) of the ``index``-th block."""
+    md5 = hashlib.md5(block)
+    block_id = f"{index:06d}-{md5.hexdigest()}"  # IDs of a blob have equal length
+    return (
+        base64.b64encode(block_id.encode()).decode(),
+        base64.b64encode(md5.digest()).decode(),
+    )
+
+
+def _put_block(blob_url, block_id, content_md5, block, session=_BLOBSTORAGE_SESSION):
+    _request_with_retry(
+        session,
+        method="put",
+        url=_blob_url_with(blob_url, comp="block", blockid=block_id),
+        headers={"Content-MD5": content_md5},
+        data=block,
+        timeout=(30, 60),
+    )
+
+
+def _staged_blocks(blob_url, session=_BLOBSTORAGE_SESSION):
+    """
+    Staged (uncommitted) blocks of a blob as ``{block_id: size}``. Empty if
+    the blocks can not be listed.
+    """
+    try:
+        response = session.request(
+            method="get",
+            url=_blob_url_with(blob_url, comp="blocklist", blocklisttype="uncommitted"),
+            timeout=30,
+        )
+        if response.status_code == 404:  # no blob, and no blocks
+            return {}
+        response.raise_for_status()
+        root = ElementTree.fromstring(response.content)
+        return {
+            block.findtext("Name"): int(block.findtext("Size"))
+            for block in root.iterfind("UncommittedBlocks/Block")
+        }
+    except Exception as error:  # only an optimization, never fail
+        log.debug(f"Listing staged blocks of {blob_url} failed: {error}")
+        return {}
+
+
+def _is_transient_error(error):
+    if isinstance(error, requests.HTTPError):
+        status_code = getattr(error.response, "status_code", None)
+        return status_code in (408, 429, 500, 502, 503, 504)
+    return isinstance(
+        error,
+        (
+            ConnectionError,
+            requests.exceptions.ChunkedEncodingError,
+            requests.ConnectionError,
+            requests.Timeout,
+        ),
+    )
+
+
+@retry(
+    stop=stop_after_attempt(4),
+    retry=retry_if_exception(_is_transient_error),
+    wait=wait_random_exponential(multiplier=0.5, max=10),
+    reraise=True,
+)
+def _request_with_retry(session, **kwargs):
+    """Blob storage request, where transient errors are retried."""
+    session.request(**kwargs).raise_for_status()
+
+
+def _blob_url_with(blob_url, **params):
+    """Add query parameters to a (SAS) blob URL."""
+    separator = "&" if urlsplit(blob_url).query else "?"
+    return f"{blob_url}{separator}{urlencode(params)}"
+
+
+def _import_zstd():
+    """
+    Zstandard module of the standard library (Python 3.14+) or its backport,
+    which is also what ``urllib3`` uses to decode 'zstd' content.
+    """
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            from backports import zstd
+        except ImportError as error:
+            raise ImportError(
+                "'zstd' content encoding requires the optional dependency "
+                "'backports.zstd' (Python < 3.14)"
+            ) from error
+    return zstd
+
+
+@contextmanager
+def _compressed_writer(fp, content_encoding=None):
+    """
+    Writable binary stream that compresses data (according to
+    ``content_encoding``) into ``fp``. ``fp`` is left open.
+    """
+    if content_encoding is None:
+        yield fp
+    elif content_encoding == "gzip":
+        with gzip.GzipFile(fileobj=fp, mode="wb", compresslevel=6, mtime=0) as writer:
+            yield writer
+    elif content_encoding == "zstd":
+        zstd = _import_zstd()
+        with zstd.ZstdFile(fp, mode="wb", level=3) as writer:
+            yield writer
+    else:
+        raise ValueError("content_encoding must be None, 'gzip' or 'zstd'")
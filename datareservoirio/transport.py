@@ -0,0 +1,504 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import socket
+import threading
+from collections import defaultdict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3 import HTTPResponse
+from urllib3.connection import HTTPConnection
+
+from ._utils import phase
+
+log = logging.getLogger(__name__)
+
+# Query parameters (e.g. SAS signatures) and JSON fields with credentials,
+# which are redacted in recordings.
+_SECRET_PARAMS = frozenset(["sig", "code", "token", "access_token", "client_secret"])
+_SECRET_FIELDS = re.compile(
+    rb'("(?:access_token|refresh_token|id_token|client_secret)"\s*:\s*)"[^"]*"'
+)
+_SECRET_URL_PARAMS = re.compile(rb"([?&](?:sig|code|token)=)[^&\"\s]+")
+_REDACTED = "REDACTED"
+
+# Response headers kept in recordings.
+_RECORDED_HEADERS = frozenset(
+    ["content-type", "content-range", "etag", "retry-after", "last-modified"]
+)
+
+
+def _keep_alive_socket_options(idle=60, interval=10, count=6):
+    """
+    Socket options enabling TCP keep-alive probes, so that idle pooled
+    connections are not silently dropped by NAT gateways and load balancers.
+    """
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    if hasattr(socket, "TCP_KEEPIDLE"):  # Linux
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle))
+    elif hasattr(socket, "TCP_KEEPALIVE"):  # macOS
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval))
+    if hasattr(socket, "TCP_KEEPCNT"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPCNT, count))
+    return options
+
+
+class HTTPTransport(HTTPAdapter):
+    """
+    Transport adapter with configurable connection pooling and keep-alive,
+    which keeps track of connection reuse.
+
+    Parameters
+    ----------
+    pool_connections : int
+        Number of hosts to keep connection pools for. Blobs are spread over
+        several storage hosts, so this should not be too small.
+    pool_maxsize : int
+        Maximum number of connections kept open per host. Should be at least
+        the number of threads making requests concurrently, otherwise
+        connections are discarded (and re-established) after use.
+    pool_block : bool
+        If True, requests wait for a free connection instead of opening more
+        than ``pool_maxsize`` connections per host.
+    keep_alive : bool
+        If True (default), connections are reused and TCP keep-alive probes
+        are enabled on idle connections. If False, connections are closed
+        after each response.
+    max_retries : int or urllib3.Retry
+        Retry configuration passed on to ``requests.adapters.HTTPAdapter``.
+    """
+
+    __attrs__ = HTTPAdapter.__attrs__ + ["_keep_alive"]
+
+    def __init__(
+        self,
+        pool_connections=16,
+        pool_maxsize=10,
+        pool_block=False,
+        keep_alive=True,
+        max_retries=0,
+    ):
+        self._keep_alive = keep_alive
+        super().__init__(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+            pool_block=pool_block,
+        )
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._lock = threading.Lock()
+        self._connections = 0
+        self._requests = 0
+
+        if self._keep_alive:
+            pool_kwargs.setdefault("socket_options", _keep_alive_socket_options())
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: _counting_pool_class(pool_cls, self._count_connection)
+            for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    @property
+    def pool_config(self):
+        """Pool configuration as ``(pool_connections, pool_maxsize, keep_alive)``."""
+        return (self._pool_connections, self._pool_maxsize, self._keep_alive)
+
+    def send(self, request, **kwargs):
+        if not self._keep_alive:
+            request.headers["Connection"] = "close"
+        with self._lock:
+            self._requests += 1
+        return super().send(request, **kwargs)
+
+    def stats(self):
+        """
+        Connection reuse statistics, accumulated over the lifetime of the
+        transport.
+
+        Returns
+        -------
+        dict
+            'connections': number of connections established.
+            'requests': number of requests sent.
+            'connection-reuse-rate': share of requests sent on a reused
+            connection.
+        """
+        with self._lock:
+            connections, requests_sent = self._connections, self._requests
+
+        if requests_sent:
+            reuse_rate = 1.0 - min(connections / requests_sent, 1.0)
+        else:
+            reuse_rate = 0.0
+        return {
+            "connections": connections,
+            "requests": requests_sent,
+            "connection-reuse-rate": reuse_rate,
+        }
+
+    def warm_up(self, url, connections=1):
+        """
+        Establish (up to ``pool_maxsize``) connections to the host of ``url``
+        ahead of the first request, so that the first requests do not pay for
+        the TCP and TLS handshakes.
+        """
+        request = requests.Request("GET", url).prepare()
+        pool = self.get_connection_with_tls_context(request, verify=True)
+
+        opened = []
+        try:
+            for _ in range(min(connections, self._pool_maxsize)):
+                conn = pool._get_conn()
+                opened.append(conn)
+                if conn.sock is None:
+                    conn.connect()
+        finally:
+            for conn in opened:
+                pool._put_conn(conn)
+
+    def _count_connection(self):
+        with self._lock:
+            self._connections += 1
+
+
+def _counting_pool_class(pool_cls, on_connect):
+    """
+    Subclass of the connection pool class ``pool_cls`` where ``on_connect`` is
+    called each time a connection is established.
+    """
+    connection_cls = pool_cls.ConnectionCls
+
+    def connect(self):
+        with phase("connect"):
+            connection_cls.connect(self)
+        on_connect()
+
+    counting_connection_cls = type(
+        connection_cls.__name__, (connection_cls,), {"connect": connect}
+    )
+    return type(
+        pool_cls.__name__, (pool_cls,), {"ConnectionCls": counting_connection_cls}
+    )
+
+
+class HTTP2Transport(BaseAdapter):
+    """
+    Transport adapter using HTTP/2 (if supported by the server), where many
+    requests to the same host are multiplexed over a few connections.
+
+    Requires the optional dependency ``httpx[http2]``. Connections fall back
+    to HTTP/1.1 if the server does not support HTTP/2.
+
+    Parameters
+    ----------
+    max_connections : int
+        Maximum number of connections (over all hosts).
+    max_keepalive_connections : int
+        Maximum number of idle connections kept open.
+    retries : int
+        Number of retries on connection errors.
+    verify : bool or str
+        TLS certificate verification. Either a bool, or a path to a CA bundle.
+        Note that per-request ``verify`` and ``cert`` settings are not
+        supported.
+    """
+
+    def __init__(
+        self, max_connections=100, max_keepalive_connections=20, retries=0, verify=True
+    ):
+        try:
+            import httpx
+        except ImportError as error:
+            raise ImportError(
+                "HTTP/2 transport requires the optional dependency 'httpx[http2]'"
+            ) from error
+
+        super().__init__()
+        self._httpx = httpx
+        self._max_connections = max_connections
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._client = httpx.Client(
+            http2=True,
+            verify=verify,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            transport=httpx.HTTPTransport(http2=True, verify=verify, retries=retries),
+        )
+
+    @property
+    def pool_config(self):
+        """Pool configuration as ``(max_connections,)``."""
+        return (self._max_connections,)
+
+    def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        httpx = self._httpx
+        httpx_request = self._client.build_request(
+            request.method,
+            request.url,
+            headers=dict(request.headers),
+            content=request.body,
+            timeout=_httpx_timeout(httpx, timeout),
+        )
+        with self._lock:
+            self._requests += 1
+
+        try:
+            httpx_response = self._client.send(httpx_request, stream=True)
+        except httpx.TimeoutException as error:
+            if isinstance(error, httpx.ConnectTimeout):
+                raise requests.ConnectTimeout(error, request=request) from error
+            raise requests.ReadTimeout(error, request=request) from error
+        except httpx.TransportError as error:
+            raise requests.ConnectionError(error, request=request) from error
+
+        response = requests.Response()
+        response.status_code = httpx_response.status_code
+        response.headers = CaseInsensitiveDict(httpx_response.headers.items())
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.reason = httpx_response.reason_phrase
+        response.raw = _HTTPXRaw(httpx_response, httpx)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+
+        if not stream:
+            response.content  # read content, releases the connection
+        return response
+
+    def close(self):
+        self._client.close()
+
+    def stats(self):
+        """
+        Request statistics, accumulated over the lifetime of the transport.
+
+        Returns
+        -------
+        dict
+            'requests': number of requests sent.
+        """
+        with self._lock:
+            return {"requests": self._requests}
+
+
+class _HTTPXRaw:
+    """
+    File-like wrapper of a (streamed) ``httpx.Response``, used as
+    ``requests.Response.raw``. Content is decoded (e.g. gzip) by httpx.
+    Transport errors while reading the content are raised as the
+    corresponding ``requests`` exceptions.
+    """
+
+    def __init__(self, response, httpx):
+        self._response = response
+        self._httpx = httpx
+        self._chunks = None
+        self._buffer = b""
+
+    def stream(self, amt=2**16, decode_content=True):
+        try:
+            if self._buffer:
+                yield self._buffer
+                self._buffer = b""
+            if self._chunks is None:
+                self._chunks = self._iter_bytes(chunk_size=amt)
+            for chunk in self._chunks:
+                yield chunk
+        finally:
+            self.close()
+
+    def read(self, amt=None, decode_content=True):
+        if self._chunks is None:
+            self._chunks = self._iter_bytes()
+        while amt is None or len(self._buffer) < amt:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if amt is None:
+            amt = len(self._buffer)
+        data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def _iter_bytes(self, chunk_size=None):
+        httpx = self._httpx
+        try:
+            yield from self._response.iter_bytes(chunk_size=chunk_size)
+        except httpx.TimeoutException as error:
+            raise requests.ConnectionError(error) from error
+        except httpx.TransportError as error:
+            raise requests.exceptions.ChunkedEncodingError(error) from error
+
+    def tell(self):
+        """Number of bytes transferred (before decoding)."""
+        return self._response.num_bytes_downloaded
+
+    def close(self):
+        self._response.close()
+
+    def release_conn(self):
+        self._response.close()
+
+
+def _httpx_timeout(httpx, timeout):
+    """Translate a ``requests`` timeout to an ``httpx.Timeout``."""
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+class RecordingTransport(BaseAdapter):
+    """
+    Transport adapter recording the requests sent by another adapter, and
+    their responses, into a bundle (directory) that ``ReplayTransport`` can
+    serve offline.
+
+    Credentials are redacted: request headers (e.g. ``Authorization``) and
+    bodies are not recorded, SAS signatures in URLs are replaced, and tokens
+    in JSON responses are removed. Response bodies are stored (decoded) once
+    per unique content.
+
+    Parameters
+    ----------
+    adapter : requests.adapters.BaseAdapter
+        Adapter sending the requests.
+    bundle : str or path-like
+        Directory of the bundle. Recordings are appended if it exists.
+    """
+
+    def __init__(self, adapter, bundle):
+        super().__init__()
+        self._adapter = adapter
+        self._bundle = os.fspath(bundle)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self._bundle, "bodies"), exist_ok=True)
+
+    @property
+    def adapter(self):
+        """The wrapped adapter."""
+        return self._adapter
+
+    def send(self, request, **kwargs):
+        response = self._adapter.send(request, **kwargs)
+        content = _redact_content(response.content)
+        digest = hashlib.sha256(content).hexdigest()
+
+        exchange = {
+            "method": request.method,
+            "url": _redact_url(request.url),
+            "range": request.headers.get("Range"),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() in _RECORDED_HEADERS
+            },
+            "body": digest,
+        }
+        body_path = os.path.join(self._bundle, "bodies", digest)
+        with self._lock:
+            if not os.path.exists(body_path):
+                with open(body_path, "wb") as f:
+                    f.write(content)
+            with open(os.path.join(self._bundle, "exchanges.jsonl"), "a") as f:
+                f.write(json.dumps(exchange) + "\n")
+        return response
+
+    def close(self):
+        self._adapter.close()
+
+
+class ReplayTransport(BaseAdapter):
+    """
+    Transport adapter serving the responses of a bundle recorded by
+    ``RecordingTransport``, without network access.
+
+    Requests are matched on method, URL (redacted like when recorded) and
+    ``Range`` header. If the same request was recorded several times (e.g.
+    polling of a status), the responses are served in the recorded order,
+    and the last one is repeated. Requests that are not in the bundle get a
+    404 (Not Recorded) response.
+
+    Parameters
+    ----------
+    bundle : str or path-like
+        Directory of the bundle.
+    """
+
+    def __init__(self, bundle):
+        super().__init__()
+        self._bundle = os.fspath(bundle)
+        self._lock = threading.Lock()
+        self._exchanges = defaultdict(list)
+        self._served = defaultdict(int)
+
+        with open(os.path.join(self._bundle, "exchanges.jsonl")) as f:
+            for line in f:
+                exchange = json.loads(line)
+                key = (exchange["method"], exchange["url"], exchange["range"])
+                self._exchanges[key].append(exchange)
+
+    def send(self, request, **kwargs):
+        key = (request.method, _redact_url(request.url), request.headers.get("Range"))
+        with self._lock:
+            exchanges = self._exchanges.get(key)
+            if exchanges:
+                exchange = exchanges[min(self._served[key], len(exchanges) - 1)]
+                self._served[key] += 1
+
+        if not exchanges:
+            log.debug(f"Not recorded: {request.method} {request.url}")
+            exchange = {"status": 404, "reason": "Not Recorded", "headers": {}}
+            content = b""
+        else:
+            with open(
+                os.path.join(self._bundle, "bodies", exchange["body"]), "rb"
+            ) as f:
+                content = f.read()
+
+        headers = dict(exchange["headers"], **{"Content-Length": str(len(content))})
+        raw = HTTPResponse(
+            body=io.BytesIO(content),
+            headers=headers,
+            status=exchange["status"],
+            reason=exchange["reason"],
+            preload_content=False,
+        )
+        return HTTPAdapter.build_response(self, request, raw)
+
+    def close(self):
+        pass
+
+
+def _redact_url(url):
+    """URL with the values of credential query parameters redacted."""
+    parts = urlsplit(url)
+    query = [
+        (name, _REDACTED if name.lower() in _SECRET_PARAMS else value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _redact_content(content):
+    """Content with tokens and SAS signatures (e.g. in JSON) redacted."""
+    content = _SECRET_FIELDS.sub(rb'\1"' + _REDACTED.encode() + rb'"', content)
+    return _SECRET_URL_PARAMS.sub(rb"\1" + _REDACTED.encode(), content)
@@ -1,9 +1,24 @@
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from contextvars import copy_context
 from pathlib import Path
+from unittest.mock import ANY, Mock
 
+import numpy as np
 import pandas as pd
 import pytest
 
-from datareservoirio._utils import DataHandler
+from datareservoirio._utils import (
+    CancellationToken,
+    DataHandler,
+    PhaseTimings,
+    ResponseCache,
+    TokenBucket,
+    _format_csv,
+    _format_csv_is_exact,
+    iter_csv,
+    phase,
+)
 
 TEST_PATH = Path(__file__).parent
 
@@ -100,3 +115,338 @@ class Test_DataHandler:
         csv_path = TEST_PATH / "testdata" / csv_path
         data_handler = DataHandler.from_csv(csv_path)
         pd.testing.assert_series_equal(data_handler.as_series(), series)
+
+
+class Test_iter_csv:
+    @pytest.fixture
+    def df(self):
+        return pd.DataFrame(
+            {
+                0: np.arange(1_000, dtype="int64") * 10**9,
+                1: np.random.default_rng(0).normal(size=1_000),
+            }
+        )
+
+    @staticmethod
+    def to_csv(df):
+        return df.to_csv(header=False, index=False, lineterminator="\n").encode()
+
+    def test_chunks(self, df):
+        chunks = list(iter_csv(df, chunk_rows=300))
+
+        assert [chunk.count(b"\n") for chunk in chunks] == [300, 300, 300, 100]
+        assert b"".join(chunks) == self.to_csv(df)
+
+    def test_string(self, data_string):
+        df = data_string.as_dataframe()
+        assert b"".join(iter_csv(df, chunk_rows=2)) == self.to_csv(df)
+
+    def test_empty(self):
+        assert list(iter_csv(pd.DataFrame({0: [], 1: []}))) == []
+
+    @pytest.mark.parametrize(
+        "values",
+        [
+            [0.0, -0.0, 1.0, -2.5, 0.1, 1e-4, 9.9e-5, 1e-7, 123456.789, 1e15, 1e16],
+            [2.0**53, 1e22, 5e-324, 1.7976931348623157e308, 1 / 3, -1e10 - 0.5],
+            [np.nan, np.inf, -np.inf, 7.0, np.nan],
+            ["a", "", " a ", 'a"b', "a,b", "a\nb", "a\rb", "æøå", None, np.nan],
+        ],
+    )
+    def test_same_as_to_csv(self, values):
+        df = pd.DataFrame({0: np.arange(len(values), dtype="int64"), 1: values})
+        assert _format_csv(df[0], df[1]) == self.to_csv(df)
+        assert b"".join(iter_csv(df, chunk_rows=3)) == self.to_csv(df)
+
+    def test_same_as_to_csv_random(self):
+        rng = np.random.default_rng(0)
+        scale = 10.0 ** rng.integers(-12, 25, 10_000)
+        decimals = 10.0 ** rng.integers(0, 17, 10_000)
+        values = np.round(rng.random(10_000) * decimals) / decimals * scale
+        df = pd.DataFrame({0: rng.integers(-(2**62), 2**62, 10_000), 1: values})
+
+        assert _format_csv(df[0], df[1]) == self.to_csv(df)
+
+    @pytest.mark.parametrize(
+        "df",
+        [
+            pd.DataFrame({0: [1, 2], 1: ["a", 3]}),  # mixed values
+            pd.DataFrame({0: [1, 2], 1: ["a", b"b"]}),
+            pd.DataFrame({0: [1, 2], 1: pd.array([1, None], dtype="Int64")}),
+            pd.DataFrame({0: [1.0, 2.0], 1: [0.5, 1.5]}),  # float index
+        ],
+    )
+    def test_unsupported_dtype(self, df):
+        assert _format_csv(df[0], df[1]) is None
+        assert b"".join(iter_csv(df)) == self.to_csv(df)
+
+    def test_not_exact(self, df, monkeypatch):
+        format_csv = Mock()
+        monkeypatch.setattr("datareservoirio._utils._format_csv", format_csv)
+        monkeypatch.setattr(
+            "datareservoirio._utils._format_csv_is_exact", Mock(return_value=False)
+        )
+
+        assert b"".join(iter_csv(df)) == self.to_csv(df)
+        format_csv.assert_not_called()
+
+    def test_is_exact(self):
+        assert _format_csv_is_exact() is True
+
+    def test_data_handler(self, data_float):
+        chunks = list(data_float.iter_binary_csv(chunk_rows=2))
+        assert len(chunks) == 3
+        assert b"".join(chunks) == data_float.as_binary_csv()
+
+
+class Test_CancellationToken:
+    def test__init__(self):
+        token = CancellationToken()
+        assert token.cancelled is False
+        assert token.expired is False
+        assert token.remaining() is None
+        token.raise_if_cancelled()
+
+    def test_cancel(self):
+        token = CancellationToken(deadline=10.0)
+        token.cancel()
+        assert token.cancelled is True
+        assert token.expired is False
+        assert token.remaining() == 0.0
+        with pytest.raises(CancelledError):
+            token.raise_if_cancelled()
+
+    def test_deadline(self):
+        token = CancellationToken(deadline=10.0)
+        assert token.cancelled is False
+        assert 9.0 < token.remaining() <= 10.0
+
+    def test_deadline_expired(self):
+        token = CancellationToken(deadline=0.01)
+        time.sleep(0.02)
+        assert token.cancelled is True
+        assert token.expired is True
+        assert token.remaining() == 0.0
+        with pytest.raises(TimeoutError):
+            token.raise_if_cancelled()
+
+    def test_parent_cancel(self):
+        parent = CancellationToken()
+        token = CancellationToken(deadline=10.0, parent=parent)
+        parent.cancel()
+        assert token.cancelled is True
+        with pytest.raises(CancelledError):
+            token.raise_if_cancelled()
+
+    def test_parent_deadline(self):
+        parent = CancellationToken(deadline=1.0)
+        token = CancellationToken(deadline=10.0, parent=parent)
+        assert token.remaining() <= 1.0
+
+        token = CancellationToken(parent=parent)
+        assert token.remaining() <= 1.0
+
+    def test_parent_expired(self):
+        parent = CancellationToken(deadline=0.01)
+        token = CancellationToken(parent=parent)
+        time.sleep(0.02)
+        assert token.expired is True
+        with pytest.raises(TimeoutError):
+            token.raise_if_cancelled()
+
+
+class Test_TokenBucket:
+    @pytest.fixture
+    def sleeps(self, monkeypatch):
+        """Record sleeps, and advance a fake monotonic clock instead."""
+        clock = [1000.0]
+        sleeps = []
+
+        def mock_sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        monkeypatch.setattr("datareservoirio._utils.time.sleep", mock_sleep)
+        monkeypatch.setattr("datareservoirio._utils.time.monotonic", lambda: clock[0])
+        return sleeps
+
+    def test_burst(self, sleeps):
+        bucket = TokenBucket(rate=10.0, burst=5)
+        for _ in range(5):
+            bucket.acquire()
+        assert sleeps == []
+
+        bucket.acquire()
+        assert sleeps == [pytest.approx(0.1)]
+
+    def test_throttled_pauses_and_reduces_rate(self, sleeps):
+        bucket = TokenBucket(rate=10.0, burst=5, backoff=0.5)
+        bucket.throttled(retry_after=2.0)
+        assert bucket.rate == 5.0
+
+        bucket.acquire()
+        assert sum(sleeps) == pytest.approx(2.0 + 1.0 / 5.0)
+
+    def test_throttled_min_rate(self, sleeps):
+        bucket = TokenBucket(rate=10.0, min_rate=4.0, backoff=0.5)
+        bucket.throttled()
+        bucket.throttled()
+        assert bucket.rate == 4.0
+
+    def test_succeeded_ramps_up(self, sleeps):
+        bucket = TokenBucket(rate=10.0, backoff=0.5, increase=2.0)
+        bucket.throttled()
+        assert bucket.rate == 5.0
+
+        bucket.succeeded()
+        assert bucket.rate == 7.0
+        bucket.succeeded()
+        bucket.succeeded()
+        assert bucket.rate == 10.0
+
+    def test_unlimited_until_throttled(self, sleeps):
+        bucket = TokenBucket(burst=5)
+        assert bucket.rate is None
+        for _ in range(20):
+            bucket.acquire()
+        assert sleeps == []
+
+    def test_throttled_limits_observed_rate(self, sleeps):
+        bucket = TokenBucket(burst=10, backoff=0.5, increase=2.0)
+        for _ in range(10):
+            bucket.acquire()
+            time.sleep(0.1)  # 10 requests per second
+        assert sleeps == [0.1] * 10  # not limited
+
+        bucket.throttled()
+        assert bucket.rate == pytest.approx(5.0)
+
+        bucket.succeeded()
+        bucket.succeeded()
+        assert bucket.rate == pytest.approx(9.0)
+        bucket.succeeded()
+        assert bucket.rate is None  # recovered, limit lifted
+
+
+class Test_ResponseCache:
+    @pytest.fixture
+    def key(self):
+        return ("GET", "https://foo/api/timeseries/bar", None)
+
+    def test_lookup_missing(self, key):
+        cache = ResponseCache()
+        assert cache.lookup(key) is None
+
+    def test_store_lookup(self, key):
+        cache = ResponseCache()
+        cache.store(key, b'{"foo": [1, 2]}', etag='"abc"')
+
+        value, etag, fresh = cache.lookup(key)
+        assert value == {"foo": [1, 2]}
+        assert etag == '"abc"'
+        assert fresh
+
+        # new object each time
+        value["foo"].append(3)
+        assert cache.lookup(key)[0] == {"foo": [1, 2]}
+
+    def test_lookup_stale(self, key, monkeypatch):
+        cache = ResponseCache(ttl=10.0)
+        cache.store(key, b"{}", etag='"abc"')
+        cache.store(("GET", "https://foo/api/no-etag", None), b"{}")
+
+        now = time.monotonic()
+        monkeypatch.setattr("datareservoirio._utils.time.monotonic", lambda: now + 11.0)
+        assert cache.lookup(key) == ({}, '"abc"', False)
+        assert cache.lookup(("GET", "https://foo/api/no-etag", None)) is None
+        assert len(cache) == 1
+
+        cache.renew(key)
+        assert cache.lookup(key) == ({}, '"abc"', True)
+
+    def test_max_entries(self):
+        cache = ResponseCache(max_entries=2)
+        keys = [("GET", f"https://foo/api/{i}", None) for i in range(3)]
+        cache.store(keys[0], b"0")
+        cache.store(keys[1], b"1")
+        cache.lookup(keys[0])  # recently used
+        cache.store(keys[2], b"2")
+
+        assert len(cache) == 2
+        assert cache.lookup(keys[1]) is None
+        assert cache.lookup(keys[0])[0] == 0
+
+    def test_invalidate(self):
+        cache = ResponseCache()
+        urls = [
+            "https://foo/api/timeseries/a",
+            "https://foo/api/timeseries/search/x",
+            "https://foo/api/metadata/y",
+        ]
+        for url in urls:
+            cache.store(("GET", url, None), b"{}")
+
+        cache.invalidate("https://foo/api/timeseries/")
+        assert len(cache) == 1
+        assert cache.lookup(("GET", urls[2], None)) is not None
+
+        cache.invalidate()
+        assert len(cache) == 0
+
+
+class Test_PhaseTimings:
+    def test_phase(self):
+        timings = PhaseTimings()
+        with timings.phase("foo"):
+            time.sleep(0.01)
+        with timings.phase("foo"):
+            pass
+
+        timings_out = timings.as_dict()
+        assert timings_out["phase-foo"] >= 0.01
+        assert timings_out["phase-foo-count"] == 2
+
+    def test_add(self):
+        timings = PhaseTimings()
+        timings.add("foo", 1.0)
+        timings.add("bar", 2.0, count=3)
+        assert timings.as_dict() == {
+            "phase-foo": 1.0,
+            "phase-bar": 2.0,
+            "phase-foo-count": 1,
+            "phase-bar-count": 3,
+        }
+
+    def test_phase_raises(self):
+        timings = PhaseTimings()
+        with pytest.raises(ValueError):
+            with timings.phase("foo"):
+                raise ValueError()
+        assert timings.as_dict()["phase-foo-count"] == 1
+
+    def test_activate(self):
+        timings = PhaseTimings()
+        with phase("foo"):  # not active, ignored
+            pass
+
+        with timings.activate():
+            with phase("bar"):
+                pass
+        with phase("baz"):  # not active anymore
+            pass
+
+        assert timings.as_dict() == {"phase-bar": ANY, "phase-bar-count": 1}
+
+    def test_activate_threads(self):
+        timings = PhaseTimings()
+
+        def work():
+            with phase("foo"):
+                pass
+
+        with timings.activate():
+            with ThreadPoolExecutor() as executor:
+                executor.submit(work).result()  # context not inherited
+                executor.submit(copy_context().run, work).result()
+
+        assert timings.as_dict()["phase-foo-count"] == 1
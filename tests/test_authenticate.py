@@ -1,10 +1,15 @@
 import json
 import os
 import shutil
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from unittest.mock import Mock
 
 import pytest
+import requests
 from requests_oauthlib import OAuth2Session
 
 import datareservoirio as drio
@@ -13,7 +18,11 @@ from datareservoirio.authenticate import (
     ClientAuthenticator,
     TokenCache,
     UserAuthenticator,
+    _file_lock,
+    _refresh_token_in_background,
+    _retry_after,
 )
+from datareservoirio.transport import HTTPTransport
 
 TEST_PATH = Path(__file__).parent
 
@@ -143,6 +152,22 @@ class Test_TokenCache:
         assert os.path.exists(token_root / "token.PROD")
         assert token_cache.token == token
 
+    def test_dump_unchanged(self, token_cache2, token_root, monkeypatch):
+        token = token_cache2.token.copy()
+        mock_replace = Mock()
+        monkeypatch.setattr("datareservoirio.authenticate.os.replace", mock_replace)
+
+        token_cache2.dump(token)
+
+        mock_replace.assert_not_called()
+
+    def test_dump_atomic(self, token_cache2, token_root, token):
+        token_cache2.dump(token)
+
+        assert not any(name.endswith(".tmp") for name in os.listdir(token_root))
+        with open(token_root / "token.PROD", "r") as f:
+            assert json.load(f) == token_cache2.token
+
     def test_append(self, token_cache):
         token_cache.append("foo", "bar")
         assert token_cache.token["foo"] == "bar"
@@ -344,6 +369,61 @@ class Test_ClientAuthenticator:
             mock_requests.call_args.kwargs["data"]["grant_type"] == "client_credentials"
         )
 
+    @pytest.fixture
+    def mock_user_data_dir(self, monkeypatch, tmp_path):
+        def mock_user_data_dir(appname, *args, **kwargs):
+            return str(tmp_path / appname)
+
+        monkeypatch.setattr(
+            "datareservoirio.authenticate.user_data_dir", mock_user_data_dir
+        )
+
+    def test__init__token_cache(self, mock_user_data_dir, mock_requests, tmp_path):
+        auth_0 = ClientAuthenticator("foo", "bar", token_cache=True)
+        assert mock_requests.call_count == 1
+
+        token_path = tmp_path / "datareservoirio" / "token.PROD.client.foo"
+        assert auth_0._token_cache.token_path == str(token_path)
+        with open(token_path, "r") as f:
+            assert json.load(f)["access_token"] == auth_0.access_token
+        if os.name == "posix":
+            assert token_path.stat().st_mode & 0o777 == 0o600
+
+        auth_1 = ClientAuthenticator("foo", "bar", token_cache=True)
+        assert mock_requests.call_count == 1  # reused, no token request
+        assert auth_1.access_token == auth_0.access_token
+        assert auth_1._token_refresher.is_alive()
+
+    def test__init__token_cache_other_client(self, mock_user_data_dir, mock_requests):
+        ClientAuthenticator("foo", "bar", token_cache=True)
+        ClientAuthenticator("baz", "bar", token_cache=True)
+        assert mock_requests.call_count == 2
+
+    def test__init__token_cache_expired(
+        self, mock_user_data_dir, mock_requests, tmp_path
+    ):
+        token_root = tmp_path / "datareservoirio"
+        token_root.mkdir()
+        with open(token_root / "token.PROD.client.foo", "w") as f:
+            json.dump(
+                {"access_token": "expired", "expires_in": 3599, "expires_at": 0.0}, f
+            )
+
+        auth = ClientAuthenticator("foo", "bar", token_cache=True)
+
+        assert mock_requests.call_count == 1
+        assert auth.access_token != "expired"
+        with open(token_root / "token.PROD.client.foo", "r") as f:
+            assert json.load(f)["access_token"] == auth.access_token
+
+    def test__init__token_cache_disabled(
+        self, mock_user_data_dir, mock_requests, tmp_path
+    ):
+        ClientAuthenticator("foo", "bar")
+        ClientAuthenticator("foo", "bar")
+        assert mock_requests.call_count == 2
+        assert not (tmp_path / "datareservoirio").exists()
+
     def test__prepare_fetch_token_args(self, client_authenticator):
         args_out, kwargs_out = client_authenticator._prepare_fetch_token_args()
 
@@ -384,3 +464,208 @@ class Test_ClientAuthenticator:
     def test_get(self, client_authenticator, response_cases):
         response_cases.set("general")
         client_authenticator.get("https://foo/bar/baz")
+
+    def test__init__api_transport(self, client_authenticator):
+        transport = client_authenticator.get_adapter(
+            drio.globalsettings.environment.api_base_url
+        )
+        assert isinstance(transport, HTTPTransport)
+        assert transport.pool_config[1] == drio.authenticate._API_POOL_MAXSIZE
+
+    def test__init__schedules_refresh(self, client_authenticator):
+        refresher = client_authenticator._token_refresher
+        assert refresher.is_alive()
+        assert refresher.daemon
+
+        # refreshed 5 minutes (less than 10% of the lifetime) before expiry
+        expires_in = client_authenticator.token["expires_at"] - time.time()
+        assert refresher.interval == pytest.approx(expires_in - 300.0, abs=5.0)
+
+    def test_close_cancels_refresh(self, client_authenticator):
+        refresher = client_authenticator._token_refresher
+        client_authenticator.close()
+        refresher.join(timeout=1.0)
+        assert not refresher.is_alive()
+        assert client_authenticator._token_refresher is None
+
+    def test__schedule_token_refresh_replaces_finalizer(self, client_authenticator):
+        finalizer = client_authenticator._token_refresher_finalizer
+        assert finalizer.alive
+
+        for _ in range(3):
+            client_authenticator._schedule_token_refresh()
+
+        assert not finalizer.alive  # detached, not accumulated
+        assert client_authenticator._token_refresher_finalizer.alive
+
+    def test_request_renews_expired_token_once(
+        self, client_authenticator, mock_requests, response_cases
+    ):
+        client_authenticator.token["expires_at"] = time.time() - 1.0
+        client_authenticator._client._expires_at = time.time() - 1.0
+        mock_requests.reset_mock()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for _ in range(16):
+                executor.submit(client_authenticator.get, "https://foo/bar/baz")
+
+        token_requests = [
+            call
+            for call in mock_requests.call_args_list
+            if (call.kwargs.get("data") or {}).get("grant_type") == "client_credentials"
+        ]
+        assert len(token_requests) == 1
+        assert mock_requests.call_count == 17
+        assert client_authenticator.token["expires_at"] > time.time()
+
+    def test__refresh_token_in_background(self, client_authenticator, mock_requests):
+        refresher = client_authenticator._token_refresher
+        mock_requests.reset_mock()
+
+        _refresh_token_in_background(
+            weakref.ref(client_authenticator), client_authenticator.access_token
+        )
+
+        assert mock_requests.call_count == 1
+        assert (
+            mock_requests.call_args.kwargs["data"]["grant_type"] == "client_credentials"
+        )
+        assert client_authenticator._token_refresher is not refresher
+        assert not refresher.is_alive() or refresher.finished.is_set()
+
+    def test__refresh_token_in_background_renewed(
+        self, client_authenticator, mock_requests
+    ):
+        mock_requests.reset_mock()
+        _refresh_token_in_background(weakref.ref(client_authenticator), "outdated")
+        mock_requests.assert_not_called()
+
+    def test__refresh_token_in_background_fails(
+        self, client_authenticator, mock_requests, monkeypatch
+    ):
+        monkeypatch.setattr(
+            client_authenticator,
+            "fetch_token",
+            Mock(side_effect=requests.ConnectionError("boom")),
+        )
+
+        _refresh_token_in_background(
+            weakref.ref(client_authenticator), client_authenticator.access_token
+        )
+
+        # retried later, while the current token is still valid
+        refresher = client_authenticator._token_refresher
+        assert refresher.interval == drio.authenticate._TOKEN_REFRESH_RETRY
+
+    @pytest.mark.parametrize("status_code", [429, 503])
+    def test_request_throttled(
+        self, client_authenticator, mock_requests, monkeypatch, status_code
+    ):
+        throttled = []
+        monkeypatch.setattr(
+            client_authenticator._rate_limiter,
+            "throttled",
+            lambda retry_after: throttled.append(retry_after),
+        )
+
+        response_throttled = requests.Response()
+        response_throttled.status_code = status_code
+        response_throttled.headers["Retry-After"] = "2"
+        response_ok = requests.Response()
+        response_ok.status_code = 200
+        mock_requests.reset_mock()
+        mock_requests.side_effect = [response_throttled, response_ok]
+
+        response = client_authenticator.get("https://foo/bar/baz")
+
+        assert response is response_ok
+        assert mock_requests.call_count == 2
+        assert throttled == [2.0]
+
+    def test_request_throttled_pause_capped(
+        self, client_authenticator, mock_requests, monkeypatch
+    ):
+        throttled = []
+        monkeypatch.setattr(
+            client_authenticator._rate_limiter,
+            "throttled",
+            lambda retry_after: throttled.append(retry_after),
+        )
+
+        response_throttled = requests.Response()
+        response_throttled.status_code = 429
+        response_throttled.headers["Retry-After"] = "86400"
+        response_ok = requests.Response()
+        response_ok.status_code = 200
+        mock_requests.reset_mock()
+        mock_requests.side_effect = [response_throttled, response_ok]
+
+        client_authenticator.get("https://foo/bar/baz")
+        assert throttled == [drio.authenticate._THROTTLE_MAX_PAUSE]
+
+    def test_request_throttled_gives_up(
+        self, client_authenticator, mock_requests, monkeypatch
+    ):
+        throttled = []
+        monkeypatch.setattr(
+            client_authenticator._rate_limiter,
+            "throttled",
+            lambda retry_after: throttled.append(retry_after),
+        )
+
+        response_throttled = requests.Response()
+        response_throttled.status_code = 429
+        mock_requests.reset_mock()
+        mock_requests.side_effect = None
+        mock_requests.return_value = response_throttled
+
+        response = client_authenticator.get("https://foo/bar/baz")
+
+        assert response.status_code == 429
+        assert mock_requests.call_count == 4
+        assert throttled == [0.5, 1.0, 2.0, 4.0]  # exponential backoff by default
+
+
+class Test__file_lock:
+    def test__file_lock(self, tmp_path):
+        path = tmp_path / "token.lock"
+        events = []
+
+        def hold_lock(acquired):
+            with _file_lock(path):
+                acquired.set()
+                time.sleep(0.1)
+                events.append("released")
+
+        acquired = threading.Event()
+        thread = threading.Thread(target=hold_lock, args=(acquired,))
+        thread.start()
+        acquired.wait(1.0)
+        with _file_lock(path):
+            events.append("acquired")
+        thread.join()
+
+        assert events == ["released", "acquired"]
+        assert path.exists()
+
+
+class Test__retry_after:
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("3", 3.0),
+            ("0.5", 0.5),
+            ("-1", 0.0),
+            ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0),  # in the past
+            ("86400", 60.0),  # capped
+            ("Fri, 01 Jan 2100 00:00:00 GMT", 60.0),  # capped
+            ("nan", 1.0),
+            ("foo", 1.0),
+            (None, 1.0),
+        ],
+    )
+    def test__retry_after(self, value, expected):
+        response = requests.Response()
+        if value is not None:
+            response.headers["Retry-After"] = value
+        assert _retry_after(response, default=1.0) == expected
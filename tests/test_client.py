@@ -1,13 +1,16 @@
 import json
 import os
+import threading
 import time
 import types
+from concurrent.futures import CancelledError
 from encodings.utf_8 import encode
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
 import pytest
+import requests
 from requests import HTTPError, Response
 from requests.exceptions import InvalidJSONError
 from tenacity import RetryError
@@ -105,6 +108,12 @@ class Test_Client:
         }
         drio.Client(auth_session, cache=True, cache_opt=cache_opt)
 
+    def test__init__storage_opt(self, auth_session):
+        client = drio.Client(
+            auth_session, cache=False, storage_opt={"partial_fetch": True}
+        )
+        assert client._storage._partial_fetch is True
+
     def client_error_handler(self, client, method):
         exceptions_logger.exception = types.MethodType(change_logging, client)
         client._auth_session.get = types.MethodType(method, client._auth_session)
@@ -146,6 +155,50 @@ class Test_Client:
             request_url_expect = "https://reservoir-api.4subsea.net/api/timeseries/2fee7f8a-664a-41c9-9b71-25090517c275/data/days?start=-9214560000000000000&end=9214646399999999999"
         assert mock_requests.call_args_list[0].args[1] == request_url_expect
 
+    def test_get_phase_timings(self, client, response_cases, monkeypatch):
+        response_cases.set("group1")
+        monkeypatch.setenv("DRIO_PYTHON_PHASE_TIMINGS", "true")
+
+        records = []
+        monkeypatch.setattr(
+            drio.client.metric(),
+            "info",
+            lambda msg, extra=None: records.append((msg, extra)),
+        )
+
+        client.get(
+            "2fee7f8a-664a-41c9-9b71-25090517c275",
+            start=1672358400000000000,
+            end=1672703939999999999 + 1,
+        )
+
+        msg, properties = records[0]
+        assert msg == "Timer"
+        for phase in ("listing", "request", "transfer", "parse", "merge"):
+            assert properties[f"phase-{phase}"] >= 0.0
+        assert properties["phase-listing-count"] == 1
+        assert properties["phase-request-count"] == properties["phase-parse-count"]
+
+    def test_get_phase_timings_disabled(self, client, response_cases, monkeypatch):
+        response_cases.set("group1")
+        monkeypatch.delenv("DRIO_PYTHON_PHASE_TIMINGS", raising=False)
+
+        records = []
+        monkeypatch.setattr(
+            drio.client.metric(),
+            "info",
+            lambda msg, extra=None: records.append((msg, extra)),
+        )
+
+        client.get(
+            "2fee7f8a-664a-41c9-9b71-25090517c275",
+            start=1672358400000000000,
+            end=1672703939999999999 + 1,
+        )
+
+        _, properties = records[0]
+        assert not any(key.startswith("phase-") for key in properties)
+
     def test_get_convert_date(self, client, group1_data, response_cases):
         response_cases.set("group1")
 
@@ -181,7 +234,7 @@ class Test_Client:
 
         client._auth_session.get = MagicMock(return_value=response_mock)
 
-        def mock_storage_get(blob_sequence_i):
+        def mock_storage_get(blob_sequence_i, start=None, end=None, cancel_token=None):
             if blob_sequence_i == "file1":
                 return pd.DataFrame(
                     {
@@ -212,6 +265,54 @@ class Test_Client:
                 )
                 assert isinstance(result, pd.Series)
 
+    @pytest.fixture
+    def client_slow_day(self, client):
+        """Client where the download of the second day is slow."""
+        client._get_data_days = MagicMock(return_value={"Files": ["foo"]})
+
+        def mock_storage_get(blob_sequence_i, start=None, end=None, cancel_token=None):
+            if blob_sequence_i == "file2":
+                time.sleep(2.0)
+            return pd.DataFrame(
+                {"index": [int(blob_sequence_i[-1]) * 10**9], "values": [1.0]}
+            )
+
+        client._storage.get = MagicMock(side_effect=mock_storage_get)
+        with patch(
+            "datareservoirio.client._blob_sequence_days",
+            side_effect=_mock_blob_sequence_days,
+        ):
+            yield client
+
+    def test_get_deadline(self, client_slow_day):
+        time_start = time.perf_counter()
+        with pytest.raises(TimeoutError):
+            client_slow_day.get("foo", start=0, end=10**10, deadline=0.2)
+        assert time.perf_counter() - time_start < 1.0
+
+    def test_get_deadline_allow_partial(self, client_slow_day):
+        time_start = time.perf_counter()
+        series = client_slow_day.get(
+            "foo", start=0, end=10**10, deadline=0.2, allow_partial=True
+        )
+        assert time.perf_counter() - time_start < 1.0
+        assert series.index.tolist() == [pd.to_datetime(10**9, utc=True)]
+
+    def test_get_cancel_token(self, client_slow_day):
+        token = drio.CancellationToken()
+        threading.Timer(0.2, token.cancel).start()
+
+        time_start = time.perf_counter()
+        with pytest.raises(CancelledError):
+            client_slow_day.get("foo", start=0, end=10**10, cancel_token=token)
+        assert time.perf_counter() - time_start < 1.0
+
+    def test_get_cancelled_before_listing(self, client):
+        token = drio.CancellationToken()
+        token.cancel()
+        with pytest.raises(CancelledError):
+            client.get("foo", start=0, end=10**10, cancel_token=token)
+
     def test_get_raises_end_not_after_start(self, client):
         start = 1672358400000000000
         end = start - 1
@@ -330,6 +431,92 @@ class Test_Client:
 
         assert info_out == info_expect
 
+    @pytest.fixture
+    def client_with_response_cache(self, auth_session):
+        return drio.Client(
+            auth_session,
+            cache=False,
+            response_cache=True,
+            response_cache_opt={"ttl": 10.0},
+        )
+
+    def test_info_response_cache(
+        self, client_with_response_cache, response_cases, mock_requests
+    ):
+        response_cases.set("datareservoirio-api")
+        series_id = "2fee7f8a-664a-41c9-9b71-25090517c275"
+
+        info_0 = client_with_response_cache.info(series_id)
+        info_1 = client_with_response_cache.info(series_id)
+
+        assert info_0 == info_1
+        assert info_0 is not info_1
+        assert mock_requests.call_count == 1
+
+    def test_response_cache_disabled(self, client, response_cases, mock_requests):
+        response_cases.set("datareservoirio-api")
+        client.info("2fee7f8a-664a-41c9-9b71-25090517c275")
+        client.info("2fee7f8a-664a-41c9-9b71-25090517c275")
+        assert mock_requests.call_count == 2
+
+    def test_response_cache_revalidate(
+        self, client_with_response_cache, mock_requests, monkeypatch
+    ):
+        response_ok = Response()
+        response_ok.status_code = 200
+        response_ok.headers["ETag"] = '"v1"'
+        response_ok._content = b'{"Id": "foo"}'
+        response_not_modified = Response()
+        response_not_modified.status_code = 304
+        mock_requests.side_effect = [response_ok, response_not_modified]
+
+        assert client_with_response_cache.info("foo") == {"Id": "foo"}
+
+        now = time.monotonic()
+        monkeypatch.setattr("datareservoirio._utils.time.monotonic", lambda: now + 11.0)
+        assert client_with_response_cache.info("foo") == {"Id": "foo"}
+
+        assert mock_requests.call_count == 2
+        assert mock_requests.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+    def test_response_cache_no_store(self, client_with_response_cache, mock_requests):
+        response = Response()
+        response.status_code = 200
+        response.headers["Cache-Control"] = "no-store"
+        response._content = b'{"Id": "foo"}'
+        mock_requests.side_effect = None
+        mock_requests.return_value = response
+
+        client_with_response_cache.info("foo")
+        client_with_response_cache.info("foo")
+
+        assert mock_requests.call_count == 2
+
+    def test_response_cache_invalidated(
+        self, client_with_response_cache, response_cases, mock_requests
+    ):
+        response_cases.set("datareservoirio-api")
+        client = client_with_response_cache
+        series_id = "2fee7f8a-664a-41c9-9b71-25090517c275"
+
+        client.info(series_id)
+        client.search("foo.bar")
+        client.metadata_get(namespace="foo.bar", key="baz")
+        assert len(client._response_cache) == 3
+
+        client.remove_metadata(
+            "857ca134-5bf7-4c14-b687-ede7d5cbf22f",
+            "19b7230b-f88a-4217-b1c9-08daff938054",
+        )
+        assert len(client._response_cache) == 1  # info of other series kept
+
+        client.search("foo.bar")
+        client.delete("7bd106dd-d87f-4504-a888-6aeaff1ec31f")
+        assert len(client._response_cache) == 1
+
+        client.metadata_set("foo.bar", "baz", vendor="Sensor Corp")
+        assert len(client._response_cache) == 0
+
     def test_search(self, client, response_cases):
         response_cases.set("datareservoirio-api")
 
@@ -956,9 +1143,11 @@ class Test_Client:
     def test_client_retries_on_connection_errors(self, client_with_connection_error):
         client_with_connection_error.get("e3d82cda-4737-4af9-8d17-d9dfda8703d0")
 
-        attempts_from_tenacity = client_with_connection_error.get.retry.statistics[
-            "attempt_number"
-        ]
+        attempts_from_tenacity = (
+            client_with_connection_error._get_data_days.retry.statistics[
+                "attempt_number"
+            ]
+        )
         call_count_from_fake_auth_counter = (
             client_with_connection_error._auth_session.call_count
         )
@@ -971,9 +1160,59 @@ class Test_Client:
         with pytest.raises(InvalidJSONError) as ex:
             client_with_invalid_json_error.get("e3d82cda-4737-4af9-8d17-d9dfda8703d0")
 
-        attempts = client_with_invalid_json_error.get.retry.statistics["attempt_number"]
+        attempts = client_with_invalid_json_error._get_data_days.retry.statistics[
+            "attempt_number"
+        ]
         assert attempts == 1
 
+    @pytest.mark.response_irrelevant
+    def test_get_samples_aggregate_deadline(self, client, response_cases):
+        response_cases.set("datareservoirio-api")
+        token = drio.CancellationToken()
+        token.cancel()
+
+        kwargs = {
+            "start": "2023-12-01",
+            "end": "2023-12-02",
+            "aggregation_period": "15m",
+            "aggregation_function": "mean",
+            "cancel_token": token,
+        }
+        with pytest.raises(CancelledError):
+            client.get_samples_aggregate("foo", **kwargs)
+
+        series = client.get_samples_aggregate("foo", allow_partial=True, **kwargs)
+        assert series.empty
+
+    def test_get_samples_aggregate_deadline_during_page(self, client, monkeypatch):
+        def mock_get(url, timeout=None):
+            if url.endswith("page2"):
+                time.sleep(timeout[1])  # slow page, times out
+                raise requests.ReadTimeout()
+            response = MagicMock(status_code=200)
+            response.json.return_value = {
+                "value": [{"Timestamp": 1701388800000000000, "Value": 1.0}],
+                "@odata.nextLink": "http://example/page2",
+            }
+            return response
+
+        monkeypatch.setattr(client._auth_session, "get", mock_get)
+
+        kwargs = {
+            "start": "2023-12-01",
+            "end": "2023-12-02",
+            "aggregation_period": "15m",
+            "aggregation_function": "mean",
+            "deadline": 0.3,
+        }
+        with pytest.raises(TimeoutError):
+            client.get_samples_aggregate("foo", **kwargs)
+
+        time_start = time.perf_counter()
+        series = client.get_samples_aggregate("foo", allow_partial=True, **kwargs)
+        assert time.perf_counter() - time_start < 1.0
+        assert series.index.tolist() == [pd.to_datetime(1701388800000000000, utc=True)]
+
     @pytest.mark.response_irrelevant
     @pytest.mark.parametrize(
         "aggregation_function, expected",
@@ -1040,3 +1279,31 @@ class Test_Client:
 
         request_url = mock_requests.call_args.args[1]
         assert f"aggregationPeriod={expected}" in request_url
+
+
+@pytest.mark.parametrize(
+    "day, start, end, bounds_expect",
+    [
+        (19357, 0, 2 * 10**18, {"start": None, "end": None}),
+        (
+            19357,
+            1672444800000000000 + 1,
+            2 * 10**18,
+            {"start": 1672444800000000000 + 1, "end": None},
+        ),
+        (
+            19357,
+            0,
+            1672531200000000000 - 2,
+            {"start": None, "end": 1672531200000000000 - 2},
+        ),
+        (
+            19357,
+            1672444800000000000,
+            1672531200000000000 - 1,
+            {"start": None, "end": None},
+        ),
+    ],
+)
+def test__day_bounds(day, start, end, bounds_expect):
+    assert drio.client._day_bounds(day, start, end) == bounds_expect
@@ -0,0 +1,175 @@
+import time
+
+import pytest
+import requests
+from urllib3 import Retry
+
+from benchmarks.faults import FaultInjector, fixed, lognormal, uniform
+from benchmarks.server import StandInServer
+
+# The real implementation; ``mock_requests`` (autouse) patches it per test.
+SESSION_REQUEST = requests.sessions.Session.request
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr("requests.sessions.Session.request", SESSION_REQUEST)
+    with StandInServer() as server:
+        yield server
+
+
+@pytest.fixture
+def blob_url(server):
+    content = b"".join(f"{i},{i * 0.5}\n".encode() for i in range(10_000))
+    requests.put(f"{server.url}/blob/foo", data=content).raise_for_status()
+    return f"{server.url}/blob/foo", content
+
+
+def session_with(**kwargs):
+    injector = FaultInjector(**kwargs)
+    session = requests.Session()
+    session.mount("http://", injector)
+    return session, injector
+
+
+def test_no_faults(blob_url):
+    url, content = blob_url
+    session, injector = session_with()
+
+    assert session.get(url).content == content
+    assert injector.stats() == {"requests": 1}
+
+
+def test_latency(blob_url):
+    url, _ = blob_url
+    session, _ = session_with(latency=0.1)
+
+    time_start = time.perf_counter()
+    session.get(url)
+    assert time.perf_counter() - time_start >= 0.1
+
+
+def test_latency_distributions():
+    import random
+
+    rng = random.Random(0)
+    assert fixed(0.5)(rng) == 0.5
+    assert 0.1 <= uniform(0.1, 0.2)(rng) <= 0.2
+    samples = sorted(lognormal(0.01, 1.0)(rng) for _ in range(1001))
+    assert samples[500] == pytest.approx(0.01, rel=0.2)
+
+
+def test_bandwidth(blob_url):
+    url, content = blob_url
+    session, _ = session_with(bandwidth=len(content) / 0.2)
+
+    time_start = time.perf_counter()
+    assert session.get(url).content == content
+    assert time.perf_counter() - time_start >= 0.18
+
+
+@pytest.mark.parametrize("status", [429, 503, 504])
+def test_error_response(blob_url, status):
+    url, _ = blob_url
+    session, injector = session_with(errors={status: 1.0})
+
+    response = session.get(url)
+
+    assert response.status_code == status
+    assert "Retry-After" not in response.headers
+    assert injector.stats() == {"requests": 1, f"status-{status}": 1}
+
+
+def test_error_response_retry_after(blob_url):
+    url, _ = blob_url
+    session, _ = session_with(errors={503: 1.0}, retry_after=2)
+
+    assert session.get(url).headers["Retry-After"] == "2"
+
+
+def test_error_response_retried_by_wrapped_adapter(blob_url):
+    url, content = blob_url
+    retry = Retry(total=3, backoff_factor=0, status_forcelist=[504])
+    session, injector = session_with(
+        adapter=requests.adapters.HTTPAdapter(max_retries=retry),
+        errors={504: 0.5},
+        seed=3,
+    )
+
+    responses = [session.get(url) for _ in range(10)]
+
+    stats = injector.stats()
+    assert stats["status-504"] > 0
+    assert stats["requests"] == 10 + stats["status-504"] - sum(
+        response.status_code == 504 for response in responses
+    )
+    for response in responses:
+        assert response.status_code == 504 or response.content == content
+
+
+def test_error_response_retries_exhausted(blob_url):
+    url, _ = blob_url
+    retry = Retry(total=2, backoff_factor=0, status_forcelist=[504])
+    session, injector = session_with(
+        adapter=requests.adapters.HTTPAdapter(max_retries=retry), errors={504: 1.0}
+    )
+
+    with pytest.raises(requests.exceptions.RetryError):
+        session.get(url)
+    assert injector.stats()["requests"] == 3
+
+
+def test_reset(blob_url):
+    url, _ = blob_url
+    session, injector = session_with(reset_rate=1.0)
+
+    with pytest.raises(requests.ConnectionError):
+        session.get(url)
+    assert injector.stats() == {"requests": 1, "resets": 1}
+
+
+def test_reset_retried_by_wrapped_adapter(blob_url):
+    url, content = blob_url
+    session, injector = session_with(
+        adapter=requests.adapters.HTTPAdapter(
+            max_retries=Retry(total=10, backoff_factor=0)
+        ),
+        reset_rate=0.5,
+    )
+
+    for _ in range(10):
+        assert session.get(url).content == content
+    assert injector.stats()["resets"] > 0
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_truncated(blob_url, stream):
+    url, _ = blob_url
+    session, injector = session_with(truncate_rate=1.0)
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        response = session.get(url, stream=stream)
+        list(response.iter_lines())
+    assert injector.stats() == {"requests": 1, "truncated": 1}
+
+
+def test_match(blob_url, server):
+    url, content = blob_url
+    session, injector = session_with(
+        reset_rate=1.0, match=lambda request: "/api/" in request.url
+    )
+
+    assert session.get(url).content == content
+    with pytest.raises(requests.ConnectionError):
+        session.get(server.api_base_url + "ping")
+
+
+def test_seed_is_reproducible(blob_url):
+    url, _ = blob_url
+
+    def run():
+        session, injector = session_with(errors={503: 0.3}, seed=42)
+        return [session.get(url).status_code for _ in range(20)]
+
+    assert run() == run()
+    assert 503 in run()
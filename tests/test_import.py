@@ -0,0 +1,55 @@
+import subprocess
+import sys
+
+import pytest
+
+# Import time (in seconds) of the package itself, i.e. on top of its required
+# dependencies (pandas, requests etc.). Typically well below 0.1 seconds; the
+# budget leaves room for slow CI machines, but catches new heavy imports.
+IMPORT_TIME_BUDGET = 0.25
+
+REQUIRED_DEPENDENCIES = [
+    "numpy",
+    "oauthlib.oauth2",
+    "pandas",
+    "requests",
+    "requests_oauthlib",
+    "tenacity",
+    "urllib3",
+]
+
+
+def run_python(code):
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "azure.monitor.opentelemetry",
+        "opentelemetry",
+        "tqdm",
+        "httpx",
+        "backports.zstd",
+        "compression.zstd",
+    ],
+)
+def test_import_is_lazy(module):
+    imported = run_python(
+        f"import sys, datareservoirio; print({module!r} in sys.modules)"
+    )
+    assert imported == "False"
+
+
+def test_import_time_budget():
+    seconds = run_python(
+        f"import {', '.join(REQUIRED_DEPENDENCIES)}\n"
+        "import time\n"
+        "time_start = time.perf_counter()\n"
+        "import datareservoirio\n"
+        "print(time.perf_counter() - time_start)"
+    )
+    assert float(seconds) < IMPORT_TIME_BUDGET
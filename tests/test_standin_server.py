@@ -0,0 +1,210 @@
+import gzip
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+import datareservoirio as drio
+from benchmarks.server import StandInServer
+from datareservoirio.globalsettings import environment
+from datareservoirio.storage.storage import _df_to_blob
+from datareservoirio.transport import RecordingTransport, ReplayTransport
+
+# The real implementation; ``mock_requests`` (autouse) patches it per test.
+SESSION_REQUEST = requests.sessions.Session.request
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr("requests.sessions.Session.request", SESSION_REQUEST)
+    with StandInServer() as server:
+        monkeypatch.setattr(environment, "_api_base_url", server.api_base_url)
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    return drio.Client(requests.Session(), cache=False)
+
+
+def test_get_synthetic_series(server, client):
+    series_id = server.add_series(days=3, frequency=0.1, start="2024-01-01")
+
+    series = client.get(series_id, start="2024-01-01", end="2024-01-04")
+
+    assert len(series) == 3 * 8640
+    assert series.index[0] == pd.Timestamp("2024-01-01", tz="UTC")
+    assert series.index[-1] == pd.Timestamp("2024-01-03 23:59:50", tz="UTC")
+    assert series.dtype == "float64"
+
+    series_again = client.get(series_id, start="2024-01-01", end="2024-01-04")
+    pd.testing.assert_series_equal(series, series_again)
+
+    info = client.info(series_id)
+    assert info["TimeOfFirstSample"] == series.index[0].value
+    assert info["TimeOfLastSample"] == series.index[-1].value
+
+
+def test_get_synthetic_series_multiple_files(server, client):
+    series_id = server.add_series(days=2, frequency=0.01, kind="string", files=3)
+
+    series = client.get(series_id, start="2024-01-01", end="2024-01-03")
+
+    assert len(series) == 2 * 864
+    assert series.index.is_unique
+    assert series.str.startswith("value-").all()
+
+
+def test_get_partial_fetch(server, client):
+    client_partial = drio.Client(
+        requests.Session(), cache=False, storage_opt={"partial_fetch": True}
+    )
+    series_id = server.add_series(days=1, frequency=1.0)
+
+    kwargs = dict(start="2024-01-01 12:00:00", end="2024-01-01 12:00:09")
+    series = client_partial.get(series_id, **kwargs)
+
+    assert len(series) == 9
+    assert series.index[0] == pd.Timestamp("2024-01-01 12:00:00", tz="UTC")
+    pd.testing.assert_series_equal(series, client.get(series_id, **kwargs))
+
+
+def test_create_append_get(server, client):
+    index = pd.date_range("2024-01-01 12:00", periods=48, freq="h", tz="UTC")
+    series = pd.Series(np.arange(48.0), index=index)
+
+    response = client.create(series[:24])
+    series_id = response["TimeSeriesId"]
+    client.append(series[24:], series_id)
+
+    series_out = client.get(series_id, start="2024-01-01", end="2024-01-04")
+    pd.testing.assert_series_equal(
+        series_out, series, check_names=False, check_freq=False
+    )
+
+    data_days = requests.get(
+        server.api_base_url + f"timeseries/{series_id}/data/days",
+        params={"start": 0, "end": pd.Timestamp("2024-01-04").value},
+    ).json()
+    assert [len(file_["Chunks"]) for file_ in data_days["Files"]] == [2, 2]
+
+
+def test_blob_upload_content_encoding(server):
+    server_response = requests.post(server.api_base_url + "files/upload").json()
+    requests.put(
+        server_response["Endpoint"],
+        data=gzip.compress(b"0,1.0\n1,2.0\n"),
+        headers={"x-ms-blob-content-encoding": "gzip"},
+    ).raise_for_status()
+    requests.post(
+        server.api_base_url + "files/commit",
+        json={"FileId": server_response["FileId"]},
+    ).raise_for_status()
+
+    response = requests.post(
+        server.api_base_url + "timeseries/create",
+        data={"FileId": server_response["FileId"]},
+    ).json()
+    assert response["TimeOfFirstSample"] == 0
+    assert response["TimeOfLastSample"] == 1
+
+
+def test_blob_upload_blocks(server):
+    df = pd.DataFrame({"index": np.arange(10_000), "values": np.arange(10_000) / 2})
+    blob_url = server.url + "/blob/files/foo"
+
+    _df_to_blob(df, blob_url, content_encoding="gzip", block_size=4096)
+
+    assert server.blob("files/foo") == b"".join(
+        f"{i},{i / 2}\n".encode() for i in range(10_000)
+    )
+    assert server.request_counts["PUT blob"] > 2
+    response = requests.get(blob_url + "?comp=blocklist&blocklisttype=uncommitted")
+    assert "<Block>" not in response.text
+
+
+def test_create_empty_and_delete(server, client):
+    series_id = client.create()["TimeSeriesId"]
+    assert client.info(series_id)["TimeSeriesId"] == series_id
+
+    client.delete(series_id)
+    with pytest.raises(requests.HTTPError):
+        client.info(series_id)
+
+
+def test_get_samples_aggregate(server, client):
+    series_id = server.add_series(days=1, frequency=1.0)
+
+    aggregate = client.get_samples_aggregate(
+        series_id,
+        start="2024-01-01 00:00",
+        end="2024-01-01 01:00",
+        aggregation_period="1m",
+        aggregation_function="Avg",
+        max_page_size=25,
+    )
+
+    series = client.get(series_id, start="2024-01-01 00:00", end="2024-01-01 01:00")
+    expected = series.resample("1min").mean()
+    assert len(aggregate) == 60
+    np.testing.assert_allclose(aggregate.to_numpy(), expected.to_numpy())
+    assert (aggregate.index == expected.index).all()
+
+
+def test_metadata(server, client):
+    series_id = server.add_series(days=1, frequency=0.01)
+
+    response = client.metadata_set("foo.bar", "baz", vessel="Jupiter", draft=7.5)
+    metadata_id = response["Id"]
+    with pytest.raises(ValueError):
+        client.set_metadata(
+            series_id, namespace="foo.bar", key="baz", overwrite=False, vessel="Mars"
+        )
+    client.set_metadata(series_id, metadata_id=metadata_id)
+
+    assert client.metadata_browse() == ["foo.bar"]
+    assert client.metadata_browse("foo.bar") == ["baz"]
+    assert client.metadata_get(metadata_id)["TimeSeries"][0]["TimeSeriesId"] == (
+        series_id
+    )
+    assert client.metadata_get(namespace="foo.bar", key="baz")["Value"] == {
+        "vessel": "Jupiter",
+        "draft": 7.5,
+    }
+    assert len(client.metadata_search("foo.bar", "ba")) == 1
+
+    assert client.search("foo.bar", "baz", "vessel", "Jup*") == [series_id]
+    assert list(client.search("foo.bar")) == [series_id]
+    assert client.info(series_id)["Metadata"][0]["Id"] == metadata_id
+
+    client.remove_metadata(series_id, metadata_id)
+    assert client.info(series_id)["Metadata"] == []
+    client.metadata_delete(metadata_id)
+    assert client.metadata_browse() == []
+
+
+def test_record_and_replay(server, client, tmp_path):
+    series_id = server.add_series(days=3, frequency=0.1, files=2)
+    kwargs = dict(start="2024-01-01", end="2024-01-03 12:00")
+
+    with client.recording(tmp_path):
+        drio.Client(requests.Session(), cache=False)  # must not stop recording
+        series = client.get(series_id, **kwargs)
+        info = client.info(series_id)
+    server.stop()
+
+    assert server.api_base_url not in client._auth_session.adapters
+    assert not isinstance(
+        client._storage._blob_session.get_adapter("http://"), RecordingTransport
+    )
+
+    transport = ReplayTransport(tmp_path)
+    session = requests.Session()
+    session.mount("http://", transport)
+    client_replay = drio.Client(
+        session, cache=False, storage_opt={"transport": transport}
+    )
+    drio.Client(requests.Session(), cache=False)  # must not replace the transport
+    pd.testing.assert_series_equal(client_replay.get(series_id, **kwargs), series)
+    assert client_replay.info(series_id) == info
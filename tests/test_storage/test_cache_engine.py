@@ -1,10 +1,13 @@
+import contextlib
 import os
 import shutil
 from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import pytest
 
 from datareservoirio.storage.cache_engine import CacheIO, _CacheIndex
@@ -29,6 +32,53 @@ class Test_CacheIO:
         df_from_file = pd.read_parquet(filepath)
         pd.testing.assert_frame_equal(df_from_file, df)
 
+    def test__write_row_groups(self, monkeypatch, tmp_path):
+        monkeypatch.setattr("datareservoirio.storage.cache_engine._ROW_GROUP_SIZE", 10)
+        df = pd.DataFrame(
+            {"index": np.arange(100, dtype="int64"), "values": np.arange(100.0)}
+        )
+
+        filepath = tmp_path / "foobar.parquet"
+        CacheIO._write(df, str(filepath))
+
+        assert pq.ParquetFile(filepath).num_row_groups == 10
+
+    def test__write_unsorted(self, tmp_path):
+        df = pd.DataFrame(
+            {"index": np.array([3, 1, 2], dtype="int64"), "values": ["c", "a", "b"]}
+        )
+
+        filepath = tmp_path / "foobar.parquet"
+        CacheIO._write(df, str(filepath))
+
+        df_expect = pd.DataFrame(
+            {"index": np.array([1, 2, 3], dtype="int64"), "values": ["a", "b", "c"]}
+        )
+        pd.testing.assert_frame_equal(pd.read_parquet(filepath), df_expect)
+
+    @pytest.mark.parametrize(
+        "start, end, index_expect",
+        [
+            (None, None, np.arange(100)),
+            (25, None, np.arange(25, 100)),
+            (None, 74, np.arange(0, 75)),
+            (25, 74, np.arange(25, 75)),
+            (200, None, np.arange(0)),
+        ],
+    )
+    def test__read_start_end(self, monkeypatch, tmp_path, start, end, index_expect):
+        monkeypatch.setattr("datareservoirio.storage.cache_engine._ROW_GROUP_SIZE", 10)
+        df = pd.DataFrame(
+            {"index": np.arange(100, dtype="int64"), "values": np.arange(100.0)}
+        )
+        filepath = tmp_path / "foobar.parquet"
+        CacheIO._write(df, str(filepath))
+
+        df_out = CacheIO._read(str(filepath), start=start, end=end)
+
+        df_expect = df.loc[index_expect].reset_index(drop=True)
+        pd.testing.assert_frame_equal(df_out, df_expect)
+
     @pytest.mark.parametrize(
         "filename, data",
         [("data_float.parquet", "data_float"), ("data_string.parquet", "data_string")],
@@ -275,6 +325,59 @@ class Test__CacheIndex:
         cache_index._register_file(id_popped, item_popped["md5"])
         assert key_popped in cache_index
 
+    def test_popitem_empty(self, tmp_path):
+        cache_index = _CacheIndex(tmp_path, 1024)
+        with pytest.raises(KeyError):
+            cache_index.popitem()
+
+    def test_popitem_second_chance(self, cache_index):
+        keys_before = list(cache_index.keys())
+        for key in keys_before[:2]:
+            cache_index.touch(*key.split("_"))
+
+        popped = [cache_index.popitem() for _ in range(len(keys_before))]
+
+        keys_popped = [cache_index._key(id_, item["md5"]) for id_, item in popped]
+        assert keys_popped == keys_before[2:] + keys_before[:2]
+        assert cache_index.size == 0
+
+    def test__register_file_again(self, cache_index):
+        key = list(cache_index.keys())[0]
+
+        cache_index._register_file(*key.split("_"))
+
+        assert len(cache_index) == 6
+        assert cache_index.size == 690851
+        assert list(cache_index.keys())[-1] == key
+
+    def test__register_file_vanished(self, tmp_path):
+        cache_index = _CacheIndex(tmp_path, 1024)
+        assert cache_index._register_file("foo", "bar") is False
+        assert len(cache_index) == 0
+
+    def test_concurrent(self, tmp_path):
+        for i in range(50):
+            (tmp_path / f"id{i}_md5").write_bytes(b"x" * (i + 1))
+        cache_index = _CacheIndex(tmp_path, 1024)
+
+        def work(seed):
+            rng = np.random.default_rng(seed)
+            for _ in range(2_000):
+                id_ = f"id{rng.integers(50)}"
+                if rng.random() < 0.2:
+                    cache_index._register_file(id_, "md5")
+                elif cache_index.exists(id_, "md5"):
+                    cache_index.touch(id_, "md5")
+                if rng.random() < 0.05:
+                    with contextlib.suppress(KeyError):
+                        cache_index.popitem()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(work, range(8)))
+
+        assert len(list(cache_index.keys())) == len(cache_index)
+        assert cache_index.size == sum(item["size"] for item in cache_index.values())
+
     def test__get_filepath(self, cache_index):
         id_ = "parquet03fc12505d3d41fea77df405b2563e4920221230daycsv19356csv"
         md5 = "Zko4NU1ESnFzVFc2ekRKYmQrRmE0QT09"
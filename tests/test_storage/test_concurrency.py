@@ -0,0 +1,125 @@
+import threading
+
+import pytest
+
+from datareservoirio.storage.concurrency import AdaptiveConcurrency
+
+
+def run_window(concurrency, nbytes=1000, latency=0.01, throttled=False):
+    """Run (at least) one window of downloads, all in flight at once."""
+    n = concurrency.limit
+    for _ in range(n):
+        concurrency.acquire()
+    for _ in range(n):
+        concurrency.release(nbytes=nbytes, latency=latency, throttled=throttled)
+
+
+class Test_AdaptiveConcurrency:
+    def test__init__(self):
+        concurrency = AdaptiveConcurrency(initial=4, min_limit=1, max_limit=8)
+        assert concurrency.limit == 4
+        assert concurrency.max_limit == 8
+
+    def test__init__clipped(self):
+        assert AdaptiveConcurrency(initial=100, max_limit=8).limit == 8
+        assert AdaptiveConcurrency(initial=0, min_limit=2).limit == 2
+
+    def test_increase_while_throughput_improves(self):
+        concurrency = AdaptiveConcurrency(initial=2, max_limit=4)
+
+        run_window(concurrency, nbytes=1000)
+        assert concurrency.limit == 3
+
+        run_window(concurrency, nbytes=10_000_000)
+        assert concurrency.limit == 4
+
+        run_window(concurrency, nbytes=10_000_000_000)
+        assert concurrency.limit == 4  # max_limit
+
+    def test_hold_when_not_saturated(self):
+        concurrency = AdaptiveConcurrency(initial=4)
+        for _ in range(4):
+            concurrency.acquire()
+            concurrency.release(nbytes=1000, latency=0.01)
+        assert concurrency.limit == 4
+
+    def test_decrease_when_throttled(self):
+        concurrency = AdaptiveConcurrency(initial=8, backoff=0.5)
+        concurrency.acquire()
+        concurrency.release(throttled=True)
+        assert concurrency.limit == 4
+
+    def test_decrease_when_latency_inflated(self):
+        concurrency = AdaptiveConcurrency(initial=4, backoff=0.5, latency_factor=2.0)
+        run_window(concurrency, nbytes=10_000_000_000, latency=0.01)
+        limit = concurrency.limit
+
+        run_window(concurrency, nbytes=1, latency=0.1)
+        assert concurrency.limit == limit // 2
+
+    def test_min_limit(self):
+        concurrency = AdaptiveConcurrency(initial=2, min_limit=1, backoff=0.5)
+        for _ in range(3):
+            concurrency.acquire()
+            concurrency.release(throttled=True)
+        assert concurrency.limit == 1
+
+    def test_acquire_blocks_at_limit(self):
+        concurrency = AdaptiveConcurrency(initial=1, max_limit=1)
+        concurrency.acquire()
+
+        acquired = threading.Event()
+
+        def worker():
+            concurrency.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        assert not acquired.wait(0.05)
+
+        concurrency.release()
+        assert acquired.wait(1.0)
+        thread.join()
+
+    @staticmethod
+    def run_bandwidth_limited(concurrency, clock, bandwidth_limit, windows):
+        """
+        Throughput increases with concurrency up to ``bandwidth_limit``, and
+        latency increases beyond it.
+        """
+        for _ in range(windows):
+            n = concurrency.limit
+            latency = 0.01 * max(1.0, n / bandwidth_limit)
+            for _ in range(n):
+                concurrency.acquire()
+            clock[0] += latency
+            for _ in range(n):
+                concurrency.release(nbytes=1000, latency=latency)
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        clock = [0.0]
+        monkeypatch.setattr(
+            "datareservoirio.storage.concurrency.time.perf_counter", lambda: clock[0]
+        )
+        return clock
+
+    @pytest.mark.parametrize("bandwidth_limit", [2, 6])
+    def test_converges(self, bandwidth_limit, clock):
+        concurrency = AdaptiveConcurrency(initial=1, max_limit=16)
+        self.run_bandwidth_limited(concurrency, clock, bandwidth_limit, 50)
+        assert bandwidth_limit // 2 <= concurrency.limit <= 2 * bandwidth_limit
+
+    def test_recovers_after_throttling(self, clock):
+        concurrency = AdaptiveConcurrency(initial=1, max_limit=64)
+        self.run_bandwidth_limited(concurrency, clock, 16, 50)
+        assert concurrency.limit >= 16
+
+        concurrency.acquire()
+        concurrency.release(nbytes=1000, latency=0.01, throttled=True)
+        limit_throttled = concurrency.limit
+        assert limit_throttled < 16
+
+        self.run_bandwidth_limited(concurrency, clock, 16, 50)
+        assert 16 <= concurrency.limit <= 32
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from datareservoirio._utils import PhaseTimings, phase
+from datareservoirio.storage.hedging import Hedger
+
+
+def warm_up(hedger, n, latency=0.0):
+    for _ in range(n):
+        hedger.call(time.sleep, latency)
+
+
+class Test_Hedger:
+    def test_delay_not_enough_samples(self):
+        hedger = Hedger(min_samples=5)
+        warm_up(hedger, 4)
+        assert hedger.delay() is None
+
+        warm_up(hedger, 1)
+        assert hedger.delay() == pytest.approx(hedger._min_delay)
+
+    def test_delay_percentile(self):
+        hedger = Hedger(percentile=50.0, min_delay=0.0, min_samples=3)
+        hedger._latencies.extend([0.1, 0.2, 0.3])
+        assert hedger.delay() == pytest.approx(0.2)
+
+    def test_call_no_hedge_before_min_samples(self):
+        hedger = Hedger(min_samples=5, max_ratio=1.0)
+        assert hedger.call(lambda x: x + 1, 1) == 2
+        assert hedger.stats == {"requests": 1, "hedged": 0, "hedge-wins": 0}
+
+    def test_call_hedge_wins(self):
+        hedger = Hedger(min_delay=0.01, min_samples=5, max_ratio=1.0)
+        warm_up(hedger, 5)
+
+        first = threading.Event()
+        release = threading.Event()
+
+        def func():
+            if not first.is_set():  # primary is stuck
+                first.set()
+                release.wait(5.0)
+                return "primary"
+            return "hedge"
+
+        try:
+            assert hedger.call(func) == "hedge"
+        finally:
+            release.set()
+        assert hedger.stats == {"requests": 6, "hedged": 1, "hedge-wins": 1}
+
+    def test_call_hedge_budget(self):
+        hedger = Hedger(min_delay=0.01, min_samples=5, max_ratio=0.1)
+        warm_up(hedger, 5)
+
+        # 6 requests allows no hedging with 10% budget
+        assert hedger.call(time.sleep, 0.05) is None
+        assert hedger.stats["hedged"] == 0
+
+    def test_call_no_hedge_while_queued(self):
+        hedger = Hedger(min_delay=0.01, min_samples=5, max_ratio=1.0, max_workers=1)
+        warm_up(hedger, 5)
+
+        hedger._executor.submit(time.sleep, 0.1)  # occupy the only thread
+        assert hedger.call(lambda: "primary") == "primary"
+        assert hedger.stats["hedged"] == 0
+
+    def test_call_hedge_primary_fails(self):
+        hedger = Hedger(min_delay=0.01, min_samples=5, max_ratio=1.0)
+        warm_up(hedger, 5)
+
+        first = threading.Event()
+
+        def func():
+            if not first.is_set():
+                first.set()
+                time.sleep(0.05)
+                raise ValueError("primary failed")
+            return "hedge"
+
+        assert hedger.call(func) == "hedge"
+
+    def test_call_hedge_both_fail(self):
+        hedger = Hedger(min_delay=0.01, min_samples=5, max_ratio=1.0)
+        warm_up(hedger, 5)
+
+        def func():
+            time.sleep(0.05)
+            raise ValueError("failed")
+
+        with pytest.raises(ValueError):
+            hedger.call(func)
+        assert hedger.stats["hedge-wins"] == 0
+
+    def test_call_hedge_context(self):
+        hedger = Hedger(min_delay=0.01, min_samples=5, max_ratio=1.0)
+        warm_up(hedger, 5)
+
+        timings = PhaseTimings()
+
+        def func():
+            with phase("foo"):
+                time.sleep(0.05)
+
+        with timings.activate():
+            hedger.call(func)
+        time.sleep(0.1)  # let the loser complete
+        assert timings.as_dict()["phase-foo-count"] == 2
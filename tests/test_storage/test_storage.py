@@ -1,18 +1,31 @@
+import base64
+import gzip
 import os
 import shutil
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from pathlib import Path
-from unittest.mock import ANY, call
+from unittest.mock import ANY, Mock, call, patch
+from urllib.parse import parse_qsl, urlsplit
+from xml.etree import ElementTree
 
+import numpy as np
 import pandas as pd
 import pytest
 import requests
+import urllib3
 from requests import HTTPError
+from tenacity import wait_none
 
 import datareservoirio as drio
 from datareservoirio._utils import DataHandler
 from datareservoirio.storage import StorageCache
 from datareservoirio.storage.cache_engine import CacheIO
+from datareservoirio.storage.concurrency import AdaptiveConcurrency
+from datareservoirio.storage.hedging import Hedger
+from datareservoirio.transport import HTTP2Transport, HTTPTransport, RecordingTransport
 
 TEST_PATH = Path(__file__).parent
 
@@ -64,6 +77,18 @@ class Test__blob_to_df:
 
         pd.testing.assert_frame_equal(df_out, df_expect)
 
+    def test__blob_to_df_stats(self):
+        path_csv = (
+            TEST_PATH.parent
+            / "testdata"
+            / "response_cases"
+            / "azure_blob_storage"
+            / "dayfile_numeric.csv"
+        )
+        stats = {}
+        drio.storage.storage._blob_to_df("http://blob/dayfile/numeric", stats=stats)
+        assert stats["bytes"] == path_csv.stat().st_size
+
     def test_raise_for_status(self):
         """Tests if ``raise_for_status`` is called"""
         with pytest.raises(requests.HTTPError):
@@ -111,6 +136,237 @@ class Test__df_to_blob:
 
         assert mock_requests.call_args.kwargs["data"].memory == data.as_binary_csv()
 
+    @pytest.mark.parametrize("data", ("data_float", "data_string"))
+    def test__df_to_blob_gzip(self, mock_requests, bytesio_with_memory, data, request):
+        data = request.getfixturevalue(data)
+        blob_url = "http://example/blob/url"
+        _ = drio.storage.storage._df_to_blob(
+            data.as_dataframe(), blob_url, content_encoding="gzip"
+        )
+
+        assert mock_requests.call_args.kwargs["headers"] == {
+            "x-ms-blob-type": "BlockBlob",
+            "x-ms-blob-content-encoding": "gzip",
+        }
+        body = mock_requests.call_args.kwargs["data"].memory
+        assert len(body) < len(data.as_binary_csv())
+        assert gzip.decompress(body) == data.as_binary_csv()
+
+    def test__df_to_blob_zstd(self, mock_requests, bytesio_with_memory, data_float):
+        try:
+            zstd = drio.storage.storage._import_zstd()
+        except ImportError:
+            pytest.skip("zstd not available")
+        blob_url = "http://example/blob/url"
+        _ = drio.storage.storage._df_to_blob(
+            data_float.as_dataframe(), blob_url, content_encoding="zstd"
+        )
+
+        body = mock_requests.call_args.kwargs["data"].memory
+        assert zstd.decompress(body) == data_float.as_binary_csv()
+
+    def test__df_to_blob_raises_content_encoding(self, data_float):
+        with pytest.raises(ValueError):
+            drio.storage.storage._df_to_blob(
+                data_float.as_dataframe(),
+                "http://example/blob/url",
+                content_encoding="br",
+            )
+
+
+class _BlockStore:
+    """
+    Session emulating blob storage block uploads (Put Block, Put Block List
+    and Get Block List). ``fail`` maps block index to status codes of
+    responses to the first attempts to put the block.
+    """
+
+    def __init__(self, fail=None):
+        self.staged = {}
+        self.committed = None
+        self.headers = None
+        self.puts = []  # block index per Put Block request
+        self.fail = {index: list(codes) for index, codes in (fail or {}).items()}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, headers=None, data=None, timeout=None):
+        query = dict(parse_qsl(urlsplit(url).query))
+        response = requests.Response()
+        response.status_code = 201
+        response._content = b""
+
+        if query.get("comp") == "block":
+            index = int(base64.b64decode(query["blockid"]).split(b"-")[0])
+            with self._lock:
+                self.puts.append(index)
+                codes = self.fail.get(index)
+                if codes:
+                    response.status_code = codes.pop(0)
+                else:
+                    self.staged[query["blockid"]] = data
+        elif query.get("comp") == "blocklist" and method == "put":
+            block_ids = [element.text for element in ElementTree.fromstring(data)]
+            self.committed = b"".join(self.staged.pop(i) for i in block_ids)
+            self.headers = headers
+        elif query.get("comp") == "blocklist":
+            response.status_code = 200
+            response._content = (
+                "<BlockList><UncommittedBlocks>"
+                + "".join(
+                    f"<Block><Name>{block_id}</Name><Size>{len(block)}</Size></Block>"
+                    for block_id, block in self.staged.items()
+                )
+                + "</UncommittedBlocks></BlockList>"
+            ).encode()
+        else:
+            self.committed = data.read()
+            self.headers = headers
+        return response
+
+
+class Test__df_to_blob_blocks:
+    """
+    Tests the :func:`_df_to_blob` function with block uploads.
+    """
+
+    @pytest.fixture(autouse=True)
+    def no_wait(self, monkeypatch):
+        request_with_retry = drio.storage.storage._request_with_retry
+        monkeypatch.setattr(
+            drio.storage.storage,
+            "_request_with_retry",
+            request_with_retry.retry_with(wait=wait_none()),
+        )
+
+    @pytest.fixture
+    def df(self):
+        index = 1640995215379000000 + np.arange(1_000, dtype="int64") * 10**9
+        return pd.DataFrame({"index": index, "values": np.linspace(0.0, 1.0, 1_000)})
+
+    @staticmethod
+    def csv(df):
+        return "".join(f"{i},{v}\n" for i, v in zip(df["index"], df["values"]))
+
+    def test_single_request(self, df):
+        session = _BlockStore()
+        drio.storage.storage._df_to_blob(
+            df, "http://example/blob/url?sig=x", session=session
+        )
+
+        assert session.puts == []
+        assert session.committed == self.csv(df).encode()
+        assert session.headers == {"x-ms-blob-type": "BlockBlob"}
+
+    def test_blocks(self, df):
+        session = _BlockStore()
+        drio.storage.storage._df_to_blob(
+            df, "http://example/blob/url?sig=x", session=session, block_size=4096
+        )
+
+        content = self.csv(df).encode()
+        assert sorted(session.puts) == list(range(-(-len(content) // 4096)))
+        assert session.committed == content
+        assert session.headers == {"Content-Type": "application/xml"}
+
+    def test_blocks_gzip(self, df):
+        session = _BlockStore()
+        drio.storage.storage._df_to_blob(
+            df,
+            "http://example/blob/url",
+            session=session,
+            content_encoding="gzip",
+            block_size=1024,
+        )
+
+        assert len(session.puts) > 1
+        assert gzip.decompress(session.committed) == self.csv(df).encode()
+        assert session.headers["x-ms-blob-content-encoding"] == "gzip"
+
+    def test_blocks_retried(self, df):
+        session = _BlockStore(fail={1: [503, 500]})
+        drio.storage.storage._df_to_blob(
+            df, "http://example/blob/url", session=session, block_size=4096
+        )
+
+        assert session.puts.count(1) == 3
+        assert session.puts.count(0) == 1
+        assert session.committed == self.csv(df).encode()
+
+    def test_blocks_resumed(self, df):
+        session = _BlockStore(fail={2: [403]})
+        with pytest.raises(HTTPError):
+            drio.storage.storage._df_to_blob(
+                df,
+                "http://example/blob/url",
+                session=session,
+                block_size=4096,
+                max_workers=1,
+            )
+        assert session.committed is None
+        assert session.puts == [0, 1, 2]
+
+        session.puts.clear()
+        drio.storage.storage._df_to_blob(
+            df, "http://example/blob/url", session=session, block_size=4096
+        )
+
+        assert 0 not in session.puts and 1 not in session.puts
+        assert 2 in session.puts
+        assert session.committed == self.csv(df).encode()
+
+    def test_blocks_equal_single_request(self, df):
+        content = b"".join(
+            drio.storage.storage._csv_blocks(df, content_encoding="gzip", block_size=7)
+        )
+        session = _BlockStore()
+        drio.storage.storage._df_to_blob(
+            df, "http://example/blob/url", session=session, content_encoding="gzip"
+        )
+
+        assert content == session.committed
+
+
+class Test__response_to_df:
+    """
+    Tests the :func:`_response_to_df` function.
+    """
+
+    @staticmethod
+    def make_response(body, content_encoding=None):
+        headers = {}
+        if content_encoding:
+            headers["Content-Encoding"] = content_encoding
+        response = requests.Response()
+        response.status_code = 200
+        response.headers = requests.structures.CaseInsensitiveDict(headers)
+        response.raw = urllib3.HTTPResponse(
+            body=BytesIO(body),
+            headers=headers,
+            preload_content=False,
+            decode_content=True,
+        )
+        return response
+
+    def test_gzip(self):
+        response = self.make_response(gzip.compress(b"1,1.0\n2,2.0\n"), "gzip")
+        df_out = drio.storage.storage._response_to_df(response)
+        df_expect = pd.DataFrame({"index": [1, 2], "values": [1.0, 2.0]})
+        pd.testing.assert_frame_equal(df_out, df_expect)
+
+    def test_zstd(self):
+        if "zstd" not in drio.storage.storage._CONTENT_DECODERS:
+            pytest.skip("zstd not available")
+        zstd = drio.storage.storage._import_zstd()
+        response = self.make_response(zstd.compress(b"1,1.0\n2,2.0\n"), "zstd")
+        df_out = drio.storage.storage._response_to_df(response)
+        df_expect = pd.DataFrame({"index": [1, 2], "values": [1.0, 2.0]})
+        pd.testing.assert_frame_equal(df_out, df_expect)
+
+    def test_raises_unsupported_encoding(self):
+        response = self.make_response(b"foo", "compress")
+        with pytest.raises(ValueError):
+            drio.storage.storage._response_to_df(response)
+
 
 class Test_Storage:
     """
@@ -134,6 +390,386 @@ class Test_Storage:
         assert storage._storage_cache is None
         assert storage._session is auth_session
 
+    def test__init__partial_fetch(self, auth_session):
+        storage = drio.storage.Storage(auth_session, cache=False, partial_fetch=True)
+        assert storage._partial_fetch is True
+
+    def test__blob_to_df_partial_fetch(self, auth_session, monkeypatch):
+        storage = drio.storage.Storage(auth_session, cache=False, partial_fetch=True)
+        chunk = {
+            "Path": "foo/bar/baz",
+            "Endpoint": "http://blob/url",
+            "ContentMd5": "1",
+        }
+
+        calls = []
+
+        def mock_blob_range_to_df(blob_url, start, end, offsets=None, session=None):
+            calls.append((blob_url, start, end, offsets))
+            return "partial"
+
+        monkeypatch.setattr(
+            drio.storage.storage, "_blob_range_to_df", mock_blob_range_to_df
+        )
+
+        assert storage._blob_to_df(chunk, start=1, end=None) == "partial"
+        assert storage._blob_to_df(chunk, start=2, end=3) == "partial"
+        assert calls[0][:3] == ("http://blob/url", 1, None)
+        assert calls[0][3] is calls[1][3]  # offsets are reused
+
+    def test__init__hedge(self, auth_session):
+        storage = drio.storage.Storage(auth_session, cache=False)
+        assert storage._hedger is None
+        assert "hedged-requests" not in storage.metrics()
+
+        storage = drio.storage.Storage(auth_session, cache=False, hedge=True)
+        assert isinstance(storage._hedger, Hedger)
+        assert storage.metrics()["hedged-requests"] == 0
+        assert storage.metrics()["hedged-requests-won"] == 0
+
+    @pytest.mark.parametrize("adaptive_concurrency", [False, True])
+    def test__init__hedge_workers(self, auth_session, adaptive_concurrency):
+        storage = drio.storage.Storage(
+            auth_session,
+            cache=False,
+            hedge=True,
+            adaptive_concurrency=adaptive_concurrency,
+        )
+        max_workers = (
+            storage.max_concurrency or drio.storage.storage._DEFAULT_MAX_WORKERS
+        )
+        assert storage._hedger._executor._max_workers == 2 * max_workers
+
+    def test__blob_to_df_hedge(self, auth_session, monkeypatch):
+        storage = drio.storage.Storage(auth_session, cache=False, hedge=True)
+        chunk = {
+            "Path": "foo/bar/baz",
+            "Endpoint": "http://blob/url",
+            "ContentMd5": "1",
+        }
+
+        calls = []
+
+        def mock_call(func, *args, **kwargs):
+            calls.append(args)
+            return pd.DataFrame({"index": [1], "values": [1.0]})
+
+        monkeypatch.setattr(storage._hedger, "call", mock_call)
+
+        df_out = storage._blob_to_df(chunk)
+        assert calls == [("http://blob/url",)]
+        assert df_out["index"].tolist() == [1]
+
+    def test__init__adaptive_concurrency(self, auth_session):
+        storage = drio.storage.Storage(auth_session, cache=False)
+        assert storage._concurrency is None
+        assert storage.max_concurrency is None
+
+        storage = drio.storage.Storage(
+            auth_session, cache=False, adaptive_concurrency=True
+        )
+        assert isinstance(storage._concurrency, AdaptiveConcurrency)
+        assert storage.max_concurrency == storage._concurrency.max_limit
+        assert storage.metrics()["concurrency-limit"] == storage._concurrency.limit
+
+    def test__init__pool_maxsize_follows_concurrency(self, auth_session):
+        storage = drio.storage.Storage(auth_session, cache=False)
+        transport = storage._blob_session.get_adapter("https://")
+        assert transport.pool_config == (
+            16,
+            drio.storage.storage._DEFAULT_MAX_WORKERS,
+            True,
+        )
+
+        storage = drio.storage.Storage(
+            auth_session, cache=False, adaptive_concurrency=True
+        )
+        transport = storage._blob_session.get_adapter("https://")
+        assert transport.pool_config == (16, storage.max_concurrency, True)
+
+    def test__init__pool_opt(self, auth_session):
+        storage = drio.storage.Storage(
+            auth_session,
+            cache=False,
+            pool_connections=4,
+            pool_maxsize=8,
+            keep_alive=False,
+        )
+        transport = storage._blob_session.get_adapter("https://")
+        assert isinstance(transport, HTTPTransport)
+        assert transport.pool_config == (4, 8, False)
+        assert transport.max_retries is drio.storage.storage._BLOBSTORAGE_RETRY
+
+    def test__init__transport_http2(self, auth_session):
+        pytest.importorskip("httpx")
+        storage = drio.storage.Storage(
+            auth_session, cache=False, transport="http2", pool_maxsize=4
+        )
+        transport = storage._blob_session.get_adapter("https://")
+        assert isinstance(transport, HTTP2Transport)
+        assert transport.pool_config == (4,)
+        assert storage._blob_session.get_adapter("http://") is transport
+
+    def test__init__transport_instance(self, auth_session):
+        transport = requests.adapters.HTTPAdapter()
+        storage = drio.storage.Storage(auth_session, cache=False, transport=transport)
+        assert storage._blob_session.get_adapter("https://") is transport
+
+    def test__init__transport_kept(self, auth_session):
+        transport = requests.adapters.HTTPAdapter()
+        storage = drio.storage.Storage(auth_session, cache=False, transport=transport)
+        drio.storage.Storage(auth_session, cache=False)
+        assert storage._blob_session.get_adapter("https://") is transport
+
+    def test__init__transport_http2_kept(self, auth_session):
+        pytest.importorskip("httpx")
+        storage = drio.storage.Storage(auth_session, cache=False, transport="http2")
+        drio.storage.Storage(auth_session, cache=False)
+        assert isinstance(storage._blob_session.get_adapter("https://"), HTTP2Transport)
+
+    def test_recording(self, auth_session, tmp_path):
+        storage = drio.storage.Storage(auth_session, cache=False)
+        transport = storage._blob_session.get_adapter("https://")
+
+        with storage.recording(tmp_path):
+            drio.storage.Storage(auth_session, cache=False)
+            recording = storage._blob_session.get_adapter("https://")
+            assert isinstance(recording, RecordingTransport)
+            assert storage._blob_session.get_adapter("http://") is recording
+        assert storage._blob_session.get_adapter("https://") is transport
+        assert storage._blob_session.get_adapter("http://") is transport
+
+    def test__init__content_encoding_raises(self, auth_session):
+        with pytest.raises(ValueError):
+            drio.storage.Storage(auth_session, cache=False, content_encoding="br")
+
+    def test_put_content_encoding(self, auth_session, data_float, monkeypatch):
+        storage = drio.storage.Storage(
+            auth_session, cache=False, content_encoding="gzip"
+        )
+
+        calls = []
+
+        def mock_df_to_blob(df, blob_url, session=None, content_encoding=None):
+            calls.append(content_encoding)
+
+        monkeypatch.setattr(drio.storage.storage, "_df_to_blob", mock_df_to_blob)
+        monkeypatch.setattr(auth_session, "request", lambda **kwargs: Mock())
+
+        storage.put(
+            data_float.as_dataframe(),
+            "http://example/blob/url",
+            ("POST", "http://example/commit", {}),
+        )
+        assert calls == ["gzip"]
+
+    def test_put_resumed(self, auth_session, monkeypatch):
+        block_store = _BlockStore(fail={1: [503] * 4})
+        df_to_blob = drio.storage.storage._df_to_blob
+        calls = []
+
+        def mock_df_to_blob(df, blob_url, session=None, content_encoding=None):
+            calls.append(blob_url)
+            df_to_blob(
+                df, blob_url, session=block_store, block_size=1024, max_workers=1
+            )
+
+        monkeypatch.setattr(drio.storage.storage, "_df_to_blob", mock_df_to_blob)
+        monkeypatch.setattr(
+            drio.storage.storage,
+            "_request_with_retry",
+            drio.storage.storage._request_with_retry.retry_with(wait=wait_none()),
+        )
+        monkeypatch.setattr(
+            drio.storage.Storage,
+            "_upload",
+            drio.storage.Storage._upload.retry_with(wait=wait_none()),
+        )
+        monkeypatch.setattr(auth_session, "request", lambda **kwargs: Mock())
+        storage = drio.storage.Storage(auth_session, cache=False)
+
+        df = pd.DataFrame({"index": np.arange(1_000), "values": np.ones(1_000)})
+        storage.put(df, "http://example/blob/url", ("POST", "http://example", {}))
+
+        assert calls == ["http://example/blob/url"] * 2
+        assert block_store.puts == [0, 1, 1, 1, 1, 1, 2, 3, 4, 5, 6, 7]
+        assert block_store.committed.startswith(b"0,1.0\n1,1.0\n")
+
+    def test__init__transport_raises(self, auth_session):
+        with pytest.raises(ValueError):
+            drio.storage.Storage(auth_session, cache=False, transport="http3")
+
+    def test__init__pool_per_instance(self, auth_session):
+        storage = drio.storage.Storage(
+            auth_session, cache=False, adaptive_concurrency=True
+        )
+        transport = storage._blob_session.get_adapter("https://")
+        other = drio.storage.Storage(auth_session, cache=False)
+
+        assert storage._blob_session.get_adapter("https://") is transport
+        assert transport.pool_config == (16, storage.max_concurrency, True)
+        assert other._blob_session.get_adapter("https://") is not transport
+        assert (
+            drio.storage.storage._BLOBSTORAGE_SESSION.get_adapter("https://")
+            is not transport
+        )
+
+    def test_metrics_connections(self, auth_session):
+        storage = drio.storage.Storage(auth_session, cache=False)
+        metrics = storage.metrics()
+        assert "blob-connections" in metrics
+        assert "blob-connection-reuse-rate" in metrics
+        assert "api-connections" not in metrics  # plain requests.Session
+
+    def test__init__warm_up(self, auth_session, monkeypatch):
+        warmed = threading.Event()
+        monkeypatch.setattr(drio.storage.Storage, "_warm_up", lambda self: warmed.set())
+        drio.storage.Storage(auth_session, cache=False, warm_up=True)
+        assert warmed.wait(1.0)
+
+    def test__warm_up_never_raises(self, auth_session, monkeypatch):
+        transport = HTTPTransport()
+
+        def mock_warm_up(url):
+            raise ConnectionError()
+
+        monkeypatch.setattr(transport, "warm_up", mock_warm_up)
+        auth_session.mount("https://", transport)
+
+        storage = drio.storage.Storage(auth_session, cache=False)
+        storage._warm_up()
+
+    def test__download_adaptive_concurrency(self, auth_session, monkeypatch):
+        storage = drio.storage.Storage(
+            auth_session, cache=False, adaptive_concurrency=True
+        )
+
+        def mock_blob_to_df(blob_url, session=None, stats=None):
+            stats["bytes"] = 100
+            return "data"
+
+        monkeypatch.setattr(drio.storage.storage, "_blob_to_df", mock_blob_to_df)
+
+        releases = []
+        monkeypatch.setattr(
+            storage._concurrency,
+            "release",
+            lambda **kwargs: releases.append(kwargs),
+        )
+
+        assert storage._download("http://blob/url") == "data"
+        assert releases[0]["nbytes"] == 100
+        assert releases[0]["throttled"] is False
+
+    @pytest.mark.parametrize("status_code, throttled", [(429, True), (404, False)])
+    def test__download_adaptive_concurrency_throttled(
+        self, auth_session, monkeypatch, status_code, throttled
+    ):
+        storage = drio.storage.Storage(
+            auth_session, cache=False, adaptive_concurrency=True
+        )
+
+        def mock_blob_to_df(blob_url, session=None, stats=None):
+            response = requests.Response()
+            response.status_code = status_code
+            raise requests.HTTPError(response=response)
+
+        monkeypatch.setattr(drio.storage.storage, "_blob_to_df", mock_blob_to_df)
+
+        releases = []
+        monkeypatch.setattr(
+            storage._concurrency,
+            "release",
+            lambda **kwargs: releases.append(kwargs),
+        )
+
+        with pytest.raises(requests.HTTPError):
+            storage._download("http://blob/url")
+        assert releases[0]["nbytes"] == 0
+        assert releases[0]["throttled"] is throttled
+
+    def test__blob_to_df_retries_chunk(self, storage_no_cache, monkeypatch):
+        monkeypatch.setattr("tenacity.nap.time.sleep", lambda seconds: None)
+
+        calls = []
+
+        def mock_blob_to_df(blob_url, session=None):
+            calls.append(blob_url)
+            if blob_url == "http://blob/2" and calls.count(blob_url) == 1:
+                raise requests.exceptions.ChunkedEncodingError()
+            return pd.DataFrame({"index": [int(blob_url[-1])], "values": [1.0]})
+
+        monkeypatch.setattr(drio.storage.storage, "_blob_to_df", mock_blob_to_df)
+
+        blob_sequence = [
+            {"Path": f"foo/{i}", "Endpoint": f"http://blob/{i}", "ContentMd5": "1"}
+            for i in (1, 2, 3)
+        ]
+        df_out = storage_no_cache.get(blob_sequence)
+
+        assert df_out["index"].tolist() == [1, 2, 3]
+        assert calls.count("http://blob/1") == 1
+        assert calls.count("http://blob/2") == 2
+        assert calls.count("http://blob/3") == 1
+
+    def test_get_retries_throttled_chunk(self, auth_session, monkeypatch):
+        monkeypatch.setattr("tenacity.nap.time.sleep", lambda seconds: None)
+        storage = drio.storage.Storage(
+            auth_session, cache=False, adaptive_concurrency=True
+        )
+        limit = storage._concurrency.limit
+
+        calls = []
+
+        def mock_blob_to_df(blob_url, session=None, stats=None):
+            calls.append(blob_url)
+            if len(calls) == 1:
+                response = requests.Response()
+                response.status_code = 503
+                raise requests.HTTPError(response=response)
+            stats["bytes"] = 100
+            return pd.DataFrame({"index": [1], "values": [1.0]})
+
+        monkeypatch.setattr(drio.storage.storage, "_blob_to_df", mock_blob_to_df)
+
+        blob_sequence = [
+            {"Path": "foo/1", "Endpoint": "http://blob/1", "ContentMd5": "1"}
+        ]
+        df_out = storage.get(blob_sequence)
+
+        assert df_out["index"].tolist() == [1]
+        assert calls == ["http://blob/1"] * 2
+        assert storage._concurrency.limit < limit
+
+    def test__blob_to_df_retries_within_deadline(self, storage_no_cache, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr("tenacity.nap.time.sleep", sleeps.append)
+        monkeypatch.setattr("tenacity.wait.random.uniform", lambda low, high: high)
+
+        def mock_blob_to_df(blob_url, session=None):
+            raise requests.ConnectionError()
+
+        monkeypatch.setattr(drio.storage.storage, "_blob_to_df", mock_blob_to_df)
+
+        chunk = {"Path": "foo/1", "Endpoint": "http://blob/1", "ContentMd5": "1"}
+        token = drio.CancellationToken(deadline=1.0)
+        with pytest.raises(requests.ConnectionError):
+            storage_no_cache._blob_to_df(chunk, cancel_token=token)
+        assert sleeps[0] == 0.5
+        assert all(0.9 < seconds <= 1.0 for seconds in sleeps[1:])  # not 1 and 2
+
+    def test__blob_to_df_retries_gives_up(self, storage_no_cache, monkeypatch):
+        monkeypatch.setattr("tenacity.nap.time.sleep", lambda seconds: None)
+
+        def mock_blob_to_df(blob_url, session=None):
+            raise requests.ConnectionError()
+
+        monkeypatch.setattr(drio.storage.storage, "_blob_to_df", mock_blob_to_df)
+
+        chunk = {"Path": "foo/1", "Endpoint": "http://blob/1", "ContentMd5": "1"}
+        with pytest.raises(requests.ConnectionError):
+            storage_no_cache._blob_to_df(chunk)
+
     def test__init__cache(self, auth_session):
         storage = drio.storage.Storage(
             auth_session,
@@ -507,6 +1143,33 @@ class Test_Storage:
         # Check that the cache folder now contains one file
         assert len(list(CACHE_PATH.iterdir())) == 1
 
+    @pytest.mark.parametrize("storage", ("storage_no_cache", "storage_with_cache"))
+    def test__blob_to_df_start_end(self, request, storage, response_cases):
+        response_cases.set("azure-blob-storage")
+        storage = request.getfixturevalue(storage)
+        chunk = {
+            "Path": "foo/bar/baz",
+            "Endpoint": "http://blob/dayfile/numeric",
+            "ContentMd5": "1234abc",
+        }
+        start, end = 1640995219176000000, 1640995267223000000
+
+        df_expect = DataHandler.from_csv(
+            TEST_PATH.parent
+            / "testdata"
+            / "response_cases"
+            / "azure_blob_storage"
+            / "dayfile_numeric.csv"
+        ).as_dataframe()
+        df_expect = df_expect.loc[
+            (df_expect["index"] >= start) & (df_expect["index"] <= end)
+        ].reset_index(drop=True)
+
+        # First call downloads (and caches, if enabled), second may use cache
+        for _ in range(2):
+            df_out = storage._blob_to_df(chunk, start=start, end=end)
+            pd.testing.assert_frame_equal(df_out, df_expect)
+
     @pytest.mark.parametrize("data", ("data_float", "data_string"))
     def test_put(
         self,
@@ -587,6 +1250,205 @@ class Test_Storage:
             )
 
 
+class RangeSession:
+    """
+    Minimal blob storage session that honors HTTP range requests.
+    """
+
+    def __init__(self, content, honor_range=True, headers=None):
+        self._content = content
+        self._honor_range = honor_range
+        self._headers = headers or {}
+        self.calls = []
+
+    def request(self, method, url, headers=None, timeout=None, stream=False):
+        response = requests.Response()
+        response.url = url
+        response.headers.update(self._headers)
+        range_ = (headers or {}).get("Range")
+        if range_ and self._honor_range:
+            first, last = map(int, range_.removeprefix("bytes=").split("-"))
+            last = min(last, len(self._content) - 1)
+            body = self._content[first : last + 1]
+            response.status_code = 206
+            response.headers["Content-Range"] = (
+                f"bytes {first}-{last}/{len(self._content)}"
+            )
+        else:
+            body = self._content
+            response.status_code = 200
+        response.raw = BytesIO(body)
+        self.calls.append(len(body))
+        return response
+
+
+class Test__blob_range_to_df:
+    """
+    Tests the :func:`_blob_range_to_df` function.
+    """
+
+    @pytest.fixture(autouse=True)
+    def small_ranges(self, monkeypatch):
+        monkeypatch.setattr(drio.storage.storage, "_RANGE_HEAD_SIZE", 1024)
+        monkeypatch.setattr(drio.storage.storage, "_RANGE_PROBE_SIZE", 128)
+        monkeypatch.setattr(drio.storage.storage, "_RANGE_MIN_SPAN", 1024)
+
+    @pytest.fixture
+    def df(self):
+        index = 1640995200000000000 + 100_000_000 * pd.RangeIndex(10_000)
+        return pd.DataFrame({"index": index.astype("int64"), "values": 0.5})
+
+    @pytest.fixture
+    def content(self, df):
+        return DataHandler(
+            df.set_index("index")["values"].rename_axis(None)
+        ).as_binary_csv()
+
+    @pytest.mark.parametrize(
+        "i_start, i_end",
+        [(5000, 5100), (0, 10), (9990, 9999), (None, 2000), (8000, None)],
+    )
+    def test__blob_range_to_df(self, df, content, i_start, i_end):
+        session = RangeSession(content)
+        start = None if i_start is None else int(df["index"][i_start])
+        end = None if i_end is None else int(df["index"][i_end])
+
+        df_out = drio.storage.storage._blob_range_to_df(
+            "http://blob/url", start, end, session=session
+        )
+
+        df_expect = drio.storage.storage._slice_df(df, start, end)
+        pd.testing.assert_frame_equal(df_out, df_expect)
+
+    def test_transfers_less(self, df, content):
+        session = RangeSession(content)
+        start, end = int(df["index"][5000]), int(df["index"][5100])
+        _ = drio.storage.storage._blob_range_to_df(
+            "http://blob/url", start, end, session=session
+        )
+        assert sum(session.calls) < len(content) // 10
+
+    def test_offsets_reused(self, df, content):
+        session = RangeSession(content)
+        offsets = {"size": None, "points": {}}
+        start, end = int(df["index"][5000]), int(df["index"][5100])
+
+        _ = drio.storage.storage._blob_range_to_df(
+            "http://blob/url", start, end, offsets=offsets, session=session
+        )
+        assert offsets["size"] == len(content)
+        n_calls_first = len(session.calls)
+
+        session.calls.clear()
+        df_out = drio.storage.storage._blob_range_to_df(
+            "http://blob/url", start, end, offsets=offsets, session=session
+        )
+        assert len(session.calls) == 1
+        assert len(session.calls) < n_calls_first
+        pd.testing.assert_frame_equal(
+            df_out, drio.storage.storage._slice_df(df, start, end)
+        )
+
+    @pytest.mark.parametrize(
+        "order",
+        [
+            np.r_[5000:10_000, 0:5000],  # out of order blob
+            np.r_[0:5050, 5060:5049:-1, 5061:10_000],  # out of order range
+        ],
+    )
+    def test_unsorted_falls_back(self, df, order):
+        df = df.iloc[order].reset_index(drop=True)
+        content = DataHandler(
+            df.set_index("index")["values"].rename_axis(None)
+        ).as_binary_csv()
+        session = RangeSession(content)
+        first = int(df["index"].min())
+        start, end = first + 5000 * 10**8, first + 5100 * 10**8
+
+        df_out = drio.storage.storage._blob_range_to_df(
+            "http://blob/url", start, end, session=session
+        )
+        assert session.calls[-1] == len(content)
+        pd.testing.assert_frame_equal(
+            df_out, drio.storage.storage._slice_df(df, start, end)
+        )
+
+    def test_offsets_shared_by_threads(self, df, content):
+        session = RangeSession(content)
+        offsets = drio.storage.storage._BlobOffsetIndex().get(
+            {"Path": "foo/bar/baz", "ContentMd5": "1"}
+        )
+        start, end = int(df["index"][5000]), int(df["index"][5100])
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [
+                executor.submit(
+                    drio.storage.storage._blob_range_to_df,
+                    "http://blob/url",
+                    start + i * 10**8,
+                    end,
+                    offsets=offsets,
+                    session=session,
+                )
+                for i in range(32)
+            ]
+            for i, future in enumerate(futures):
+                pd.testing.assert_frame_equal(
+                    future.result(),
+                    drio.storage.storage._slice_df(df, start + i * 10**8, end),
+                )
+
+    def test_range_not_supported(self, df, content):
+        session = RangeSession(content, honor_range=False)
+        start, end = int(df["index"][5000]), int(df["index"][5100])
+
+        df_out = drio.storage.storage._blob_range_to_df(
+            "http://blob/url", start, end, session=session
+        )
+        assert len(session.calls) == 1
+        pd.testing.assert_frame_equal(
+            df_out, drio.storage.storage._slice_df(df, start, end)
+        )
+
+    def test_small_blob(self, df, content, monkeypatch):
+        monkeypatch.setattr(drio.storage.storage, "_RANGE_HEAD_SIZE", len(content))
+        session = RangeSession(content)
+        start, end = int(df["index"][5000]), int(df["index"][5100])
+
+        df_out = drio.storage.storage._blob_range_to_df(
+            "http://blob/url", start, end, session=session
+        )
+        assert len(session.calls) == 1
+        pd.testing.assert_frame_equal(
+            df_out, drio.storage.storage._slice_df(df, start, end)
+        )
+
+
+class Test__slice_df:
+    """
+    Tests the :func:`_slice_df` function.
+    """
+
+    @pytest.fixture
+    def df(self):
+        return pd.DataFrame({"index": [1, 2, 3, 4], "values": [1.0, 2.0, 3.0, 4.0]})
+
+    @pytest.mark.parametrize(
+        "start, end, index_expect",
+        [
+            (None, None, [1, 2, 3, 4]),
+            (2, None, [2, 3, 4]),
+            (None, 3, [1, 2, 3]),
+            (2, 3, [2, 3]),
+            (5, None, []),
+        ],
+    )
+    def test__slice_df(self, df, start, end, index_expect):
+        df_out = drio.storage.storage._slice_df(df, start, end)
+        assert df_out["index"].tolist() == index_expect
+        assert df_out.index.tolist() == list(range(len(index_expect)))
+
+
 class Test_StorageCache:
     @pytest.fixture
     def cache_root(self, tmp_path):
@@ -747,6 +1609,19 @@ class Test_StorageCache:
         key_cached_last = list(storage_cache._cache_index.keys())[-1]
         assert key_cached_last == f"{id_}_{md5}"
 
+    def test__get_cached_data_vanished(self, storage_cache, chunk_id_md5):
+        id_, md5 = chunk_id_md5
+        filepath = storage_cache._cache_index._get_filepath(id_, md5)
+
+        with patch.object(
+            storage_cache._cache_index, "_file_exists", side_effect=[True, False]
+        ):
+            os.remove(filepath)
+            data_out = storage_cache._get_cached_data(id_, md5)
+
+        assert data_out is None
+        assert f"{id_}_{md5}" not in storage_cache._cache_index
+
     def test__get_cached_data_empty(self, storage_cache_empty, chunk_id_md5):
         id_, md5 = chunk_id_md5
         data_out = storage_cache_empty._get_cached_data(id_, md5)
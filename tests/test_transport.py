@@ -0,0 +1,331 @@
+import gzip
+import json
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from datareservoirio._utils import PhaseTimings
+from datareservoirio.transport import (
+    HTTP2Transport,
+    HTTPTransport,
+    RecordingTransport,
+    ReplayTransport,
+    _keep_alive_socket_options,
+    _redact_content,
+    _redact_url,
+)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        body = b"foo"
+        if self.path == "/lines":
+            body = b"1,a\n2,b\n3,c\n"
+        if self.path == "/broken":  # connection closed partway through
+            self.send_response(200)
+            self.send_header("Content-Length", "100")
+            self.end_headers()
+            self.wfile.write(b"1,a\n")
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.send_response(200)
+        if self.path == "/gzip":
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def send(transport, url):
+    request = requests.Request("GET", url).prepare()
+    response = transport.send(request, timeout=5)
+    assert response.content == b"foo"
+    return response
+
+
+def test__keep_alive_socket_options():
+    options = _keep_alive_socket_options()
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in options
+
+
+class Test_HTTPTransport:
+    def test__init__(self):
+        transport = HTTPTransport(pool_connections=4, pool_maxsize=8)
+        assert transport.pool_config == (4, 8, True)
+        assert transport.poolmanager.connection_pool_kw["maxsize"] == 8
+        assert "socket_options" in transport.poolmanager.connection_pool_kw
+
+    def test__init__no_keep_alive(self):
+        transport = HTTPTransport(keep_alive=False)
+        assert transport.pool_config == (16, 10, False)
+        assert "socket_options" not in transport.poolmanager.connection_pool_kw
+
+    def test_stats_empty(self):
+        assert HTTPTransport().stats() == {
+            "connections": 0,
+            "requests": 0,
+            "connection-reuse-rate": 0.0,
+        }
+
+    def test_stats_reuse(self, server_url):
+        transport = HTTPTransport()
+        for _ in range(4):
+            send(transport, server_url)
+        assert transport.stats() == {
+            "connections": 1,
+            "requests": 4,
+            "connection-reuse-rate": 0.75,
+        }
+
+    def test_stats_no_keep_alive(self, server_url):
+        transport = HTTPTransport(keep_alive=False)
+        for _ in range(4):
+            response = send(transport, server_url)
+            assert response.request.headers["Connection"] == "close"
+        stats = transport.stats()
+        assert stats["connections"] == 4
+        assert stats["connection-reuse-rate"] == 0.0
+
+    def test_stats_evicted_pools(self, server_url):
+        transport = HTTPTransport(pool_connections=1)
+        send(transport, server_url)
+        send(transport, server_url.replace("127.0.0.1", "localhost"))  # evicts
+        send(transport, server_url)  # evicts
+        assert transport.stats()["connections"] == 3
+        assert transport.stats()["requests"] == 3
+
+    def test_phase_timings_connect(self, server_url):
+        transport = HTTPTransport()
+        timings = PhaseTimings()
+        with timings.activate():
+            send(transport, server_url)
+            send(transport, server_url)
+        assert timings.as_dict()["phase-connect-count"] == 1
+
+    def test_warm_up(self, server_url):
+        transport = HTTPTransport()
+        transport.warm_up(server_url, connections=2)
+        assert transport.stats()["connections"] == 2
+
+        send(transport, server_url)
+        send(transport, server_url)
+        stats = transport.stats()
+        assert stats["connections"] == 2
+        assert stats["requests"] == 2
+        assert stats["connection-reuse-rate"] == 0.0  # warmed, not reused
+
+    def test_warm_up_pool_maxsize(self, server_url):
+        transport = HTTPTransport(pool_maxsize=2)
+        transport.warm_up(server_url, connections=5)
+        assert transport.stats()["connections"] == 2
+
+
+class Test_HTTP2Transport:
+    @pytest.fixture(autouse=True)
+    def httpx(self):
+        return pytest.importorskip("httpx")
+
+    def test__init__(self):
+        transport = HTTP2Transport(max_connections=4)
+        assert transport.pool_config == (4,)
+
+    def test__init__no_httpx(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "httpx", None)
+        with pytest.raises(ImportError, match="httpx"):
+            HTTP2Transport()
+
+    def test_send(self, server_url):
+        transport = HTTP2Transport()
+        response = send(transport, server_url)
+        assert response.status_code == 200
+        assert response.headers["content-length"] == "3"
+        assert response.request.url == server_url
+        assert transport.stats() == {"requests": 1}
+
+    @pytest.mark.parametrize("path", ["gzip", "lines"])
+    def test_send_stream(self, server_url, path):
+        transport = HTTP2Transport()
+        request = requests.Request("GET", server_url + path).prepare()
+        response = transport.send(request, stream=True, timeout=(5, 5))
+
+        if path == "gzip":
+            assert response.content == b"foo"  # decoded
+            assert response.raw.tell() > len(b"foo")  # bytes transferred
+        else:
+            response.encoding = "utf-8"
+            lines = list(response.iter_lines(decode_unicode=True))
+            assert lines == ["1,a", "2,b", "3,c"]
+
+    def test_send_read(self, server_url):
+        transport = HTTP2Transport()
+        request = requests.Request("GET", server_url + "lines").prepare()
+        response = transport.send(request, stream=True)
+        assert response.raw.read(4) == b"1,a\n"
+        assert response.raw.read() == b"2,b\n3,c\n"
+
+    @pytest.mark.parametrize("read", ["stream", "read"])
+    def test_send_body_broken(self, server_url, read):
+        transport = HTTP2Transport()
+        request = requests.Request("GET", server_url + "broken").prepare()
+        response = transport.send(request, stream=True, timeout=(5, 5))
+
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            if read == "stream":
+                list(response.raw.stream(2))
+            else:
+                response.raw.read()
+
+    def test_send_connection_error(self):
+        with socket.socket() as sock:  # find a closed port
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        transport = HTTP2Transport()
+        with pytest.raises(requests.ConnectionError):
+            send(transport, f"http://127.0.0.1:{port}/")
+
+    def test_session(self, server_url, monkeypatch):
+        monkeypatch.undo()  # real requests.Session.request
+        session = requests.Session()
+        session.mount("http://", HTTP2Transport())
+        assert session.get(server_url).text == "foo"
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://foo/bar", "https://foo/bar"),
+        ("https://foo/bar?a=1&b=2", "https://foo/bar?a=1&b=2"),
+        (
+            "https://foo/bar?sv=2020&sig=abc%2Bdef%3D&se=2024",
+            "https://foo/bar?sv=2020&sig=REDACTED&se=2024",
+        ),
+        ("https://foo/bar?code=abc", "https://foo/bar?code=REDACTED"),
+    ],
+)
+def test__redact_url(url, expected):
+    assert _redact_url(url) == expected
+
+
+def test__redact_content():
+    content = (
+        b'{"access_token": "abc", "refresh_token":"def", "TimeSeriesId": "ghi", '
+        b'"Endpoint": "https://foo/bar?sv=2020&sig=abc%2B&se=2024"}'
+    )
+    assert _redact_content(content) == (
+        b'{"access_token": "REDACTED", "refresh_token":"REDACTED", '
+        b'"TimeSeriesId": "ghi", '
+        b'"Endpoint": "https://foo/bar?sv=2020&sig=REDACTED&se=2024"}'
+    )
+
+
+class Test_RecordingTransport:
+    def test_send(self, server_url, tmp_path):
+        transport = RecordingTransport(HTTPTransport(), tmp_path)
+        request = requests.Request(
+            "GET", server_url + "?sig=secret", headers={"Authorization": "secret"}
+        ).prepare()
+        response = transport.send(request, timeout=5)
+
+        assert response.content == b"foo"
+        recorded = (tmp_path / "exchanges.jsonl").read_text()
+        assert "secret" not in recorded
+        exchange = json.loads(recorded)
+        assert exchange["url"] == server_url + "?sig=REDACTED"
+        assert exchange["status"] == 200
+        assert (tmp_path / "bodies" / exchange["body"]).read_bytes() == b"foo"
+
+    def test_send_gzip(self, server_url, tmp_path):
+        transport = RecordingTransport(HTTPTransport(), tmp_path)
+        request = requests.Request("GET", server_url + "gzip").prepare()
+        transport.send(request, stream=True, timeout=5)
+
+        exchange = json.loads((tmp_path / "exchanges.jsonl").read_text())
+        assert "Content-Encoding" not in exchange["headers"]
+        assert (tmp_path / "bodies" / exchange["body"]).read_bytes() == b"foo"
+
+    def test_send_same_content_stored_once(self, server_url, tmp_path):
+        transport = RecordingTransport(HTTPTransport(), tmp_path)
+        for _ in range(3):
+            send(transport, server_url)
+
+        assert len((tmp_path / "exchanges.jsonl").read_text().splitlines()) == 3
+        assert len(list((tmp_path / "bodies").iterdir())) == 1
+
+
+class Test_ReplayTransport:
+    @pytest.fixture
+    def bundle(self, server_url, tmp_path):
+        transport = RecordingTransport(HTTPTransport(), tmp_path)
+        send(transport, server_url + "?sig=secret")
+        for path in ("lines", "gzip"):
+            request = requests.Request("GET", server_url + path).prepare()
+            transport.send(request, timeout=5)
+        return tmp_path
+
+    def test_send(self, bundle, server_url):
+        transport = ReplayTransport(bundle)
+
+        response = send(transport, server_url + "?sig=other")
+        assert response.status_code == 200
+
+        request = requests.Request("GET", server_url + "lines").prepare()
+        response = transport.send(request, stream=True)
+        response.encoding = "utf-8"
+        assert list(response.iter_lines(decode_unicode=True)) == ["1,a", "2,b", "3,c"]
+
+        request = requests.Request("GET", server_url + "gzip").prepare()
+        assert transport.send(request).content == b"foo"
+
+    def test_send_not_recorded(self, bundle, server_url):
+        transport = ReplayTransport(bundle)
+        request = requests.Request("GET", server_url + "missing").prepare()
+        response = transport.send(request)
+        assert response.status_code == 404
+        assert response.reason == "Not Recorded"
+
+    def test_send_recorded_order(self, tmp_path):
+        exchanges = [
+            {
+                "method": "GET",
+                "url": "https://foo/status",
+                "range": None,
+                "status": 200,
+                "reason": "OK",
+                "headers": {},
+                "body": name,
+            }
+            for name in ("a", "b")
+        ]
+        (tmp_path / "bodies").mkdir()
+        (tmp_path / "bodies" / "a").write_bytes(b"Uploading")
+        (tmp_path / "bodies" / "b").write_bytes(b"Ready")
+        (tmp_path / "exchanges.jsonl").write_text(
+            "".join(json.dumps(exchange) + "\n" for exchange in exchanges)
+        )
+
+        transport = ReplayTransport(tmp_path)
+        request = requests.Request("GET", "https://foo/status").prepare()
+        contents = [transport.send(request).content for _ in range(3)]
+        assert contents == [b"Uploading", b"Ready", b"Ready"]